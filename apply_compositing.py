@@ -0,0 +1,82 @@
+# ----------------------------------------------------------------------------------------------------
+# バッチモードで複数の.blendにCompositing設定を反映する用
+# ジョブファイル(JSON)の.blendを順に開いて反映、保存し、1ファイル毎の結果を結果ファイルに追記する
+# (途中でクラッシュしても反映済みのファイルの結果は残る)
+# ----------------------------------------------------------------------------------------------------
+
+import bpy
+import json
+import os
+import sys
+import time
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if len(argv) < 1:
+        print("Job file is not specified.")
+        sys.exit(1)
+
+    try:
+        with open(argv[0], "r") as f:
+            job = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Can't read job file {argv[0]} : {e}")
+        sys.exit(1)
+
+    with open(job["result_path"], "a") as result_file:
+        for target in job["targets"]:
+            result = _apply(job, target)
+            result_file.write(json.dumps(result) + "\n")
+            result_file.flush()
+
+    sys.exit(0)
+
+def _apply(job, target):
+    """ 1ファイルを開いてCompositing設定を反映し、保存
+
+    Args:
+        job (dict): ジョブ (設定ファイル、反映方法)
+        target (dict): 反映するファイル (path : 開くパス, output : 保存先のパス)
+
+    Returns:
+        dict: 反映結果
+    """
+    result = {"target": target["path"], "output": target["output"], "is_success": False, "is_skipped": False}
+    start_time = time.monotonic()
+
+    try:
+        bpy.ops.wm.open_mainfile(filepath=target["path"], load_ui=False)
+
+        # ファイルに保存されている設定ではなくジョブの設定で反映する
+        # (先読みは読込パスを変えた時に始まるので先に止める)
+        props = bpy.context.scene.compositing_io
+        props.use_prefetch = False
+        for key, value in job["options"].items():
+            setattr(props, key, value)
+
+        apply_result = bpy.ops.qcommon.compositing_io_apply(
+            filepath=job["preset_path"],
+            source_path=job["source_path"],
+            scene_name=job["scene_name"],
+        )
+        # 失敗した場合はエラーで例外になるので、CANCELLEDは既に同じ構成で何もしなかった場合
+        # (別の保存先の場合は、変更がなくても保存先にファイルを揃える)
+        result["is_skipped"] = "CANCELLED" in apply_result
+        if not result["is_skipped"] and "FINISHED" not in apply_result:
+            result["error"] = "Apply failed."
+        elif target["output"] == target["path"]:
+            if not result["is_skipped"]:
+                bpy.ops.wm.save_mainfile()
+            result["is_success"] = True
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(target["output"])), exist_ok=True)
+            bpy.ops.wm.save_as_mainfile(filepath=target["output"], copy=True)
+            result["is_success"] = True
+    except Exception as e:
+        result["error"] = str(e)
+
+    result["seconds"] = time.monotonic() - start_time
+    return result
+
+if __name__ == "__main__":
+    main()
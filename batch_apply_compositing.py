@@ -0,0 +1,302 @@
+# ----------------------------------------------------------------------------------------------------
+# 1つのCompositing設定を複数の.blendに一括で反映して保存するコマンドライン用
+# ※Blenderの外からPythonで実行する (Blender側ではアドオンを有効にしておく)
+#
+#   python batch_apply_compositing.py --blender <blender> --template <元の.blend> <ディレクトリ or glob> ...
+#   python batch_apply_compositing.py --blender <blender> --preset <書き出した設定> <ディレクトリ or glob> ...
+# ----------------------------------------------------------------------------------------------------
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+if __package__:
+    from . import batch_export_compositing
+    from . import compositing_io_util as comp_util
+else:
+    import batch_export_compositing
+    import compositing_io_util as comp_util
+
+# ----------------------------------------------------------------------------------------------------
+# 定数
+# ----------------------------------------------------------------------------------------------------
+
+SUMMARY_FILE_NAME = "apply_summary.json"
+# 1つのBlenderで続けて反映するファイル数 (起動時間と設定の解釈を使い回す)
+DEFAULT_FILES_PER_PROCESS = 8
+WORK_DIR_PREFIX = "compositing_apply_"
+
+# ----------------------------------------------------------------------------------------------------
+# Public Functions
+# ----------------------------------------------------------------------------------------------------
+
+def main(argv=None):
+    args = _parse_args(argv)
+
+    try:
+        targets = batch_export_compositing.collect_sources(args.targets)
+    except ValueError as e:
+        print(e)
+        return 1
+    if len(targets) == 0:
+        print("No .blend files found.")
+        return 1
+
+    options = {
+        "is_reconcile_node": args.reconcile,
+        "is_clear_node": not args.keep_nodes,
+        "is_load_view_layer": not args.no_view_layers,
+        "is_clear_view_layer": args.clear_view_layers,
+        "is_clear_freestyle": args.clear_freestyle,
+        "is_clear_node_groups": args.clear_node_groups,
+        "import_node_names": "",
+        "add_view_layer_name": args.view_layer_prefix,
+        "use_fingerprint": not args.force,
+    }
+
+    work_dir = tempfile.mkdtemp(prefix=WORK_DIR_PREFIX)
+    try:
+        # 元の.blendは1度だけ書き出して、全てのファイルで同じ設定を使う
+        preset_path = args.preset
+        source_path = args.source
+        if args.template:
+            preset_path = os.path.join(work_dir, "preset" + batch_export_compositing.INDEXED_OUTPUT_EXT)
+            source_path = source_path or args.template
+            print(f"Export : {args.template}")
+            if not comp_util.run_export_process(args.blender, args.template, preset_path, args.timeout, is_compact=True, is_indexed=True, is_all_scenes=args.scene != None):
+                print(f"Can't export the template {args.template}.")
+                return 1
+
+        summary = apply_all(
+            args.blender,
+            preset_path,
+            targets,
+            args.output,
+            options,
+            source_path=source_path,
+            scene_name=args.scene,
+            jobs=args.jobs,
+            files_per_process=args.files_per_process,
+            timeout=args.timeout,
+            work_dir=work_dir,
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.template:
+        summary["template"] = os.path.abspath(args.template)
+    summary_path = args.summary if args.summary else os.path.join(args.output or ".", SUMMARY_FILE_NAME)
+    _write_summary(summary, summary_path)
+    _print_summary(summary, summary_path)
+
+    return 1 if len(summary["failed"]) > 0 else 0
+
+def apply_all(binary_path, preset_path, targets, output_dir, options, source_path=None, scene_name=None, jobs=None, files_per_process=DEFAULT_FILES_PER_PROCESS, timeout=None, work_dir=None):
+    """ 書き出したCompositing設定を複数の.blendに並列で反映して保存
+
+    Args:
+        binary_path (str): Blenderの実行ファイルのパス
+        preset_path (str): 書き出したCompositing設定のパス
+        targets ((str, str)[]): (.blendのパス, 保存先で使う相対パス)のリスト
+        output_dir (str): 保存先のディレクトリ (Noneは元のファイルに上書き)
+        options (dict): 反映方法 (Sceneのcompositing_ioのプロパティ名 -> 値)
+        source_path (str): NodeGroups, LineStyleのアペンド元 (Noneは設定に記録された元ファイル)
+        scene_name (str): 反映するScene名 (Noneは出力時のアクティブなScene)
+        jobs (int): 同時に起動するBlenderの最大数 (NoneはCPU数)
+        files_per_process (int): 1つのBlenderで続けて反映するファイル数
+        timeout (float): 1ファイルあたりのタイムアウト(秒)
+        work_dir (str): ジョブファイルの作業ディレクトリ (Noneは一時ディレクトリを作成して削除)
+
+    Returns:
+        dict: 反映結果のサマリー
+    """
+    summary = {
+        "blender": binary_path,
+        "preset": os.path.abspath(preset_path),
+        "source": os.path.abspath(source_path) if source_path else None,
+        "output_dir": os.path.abspath(output_dir) if output_dir else None,
+        "applied": [],
+        "skipped": [],
+        "failed": [],
+    }
+    start_time = time.monotonic()
+
+    job = {
+        "preset_path": os.path.abspath(preset_path),
+        "source_path": os.path.abspath(source_path) if source_path else "",
+        "scene_name": scene_name or "",
+        "options": options,
+    }
+    paths = [
+        {"path": target, "output": os.path.join(output_dir, rel_path) if output_dir else target}
+        for target, rel_path in targets
+    ]
+    files_per_process = max(files_per_process, 1)
+    chunks = [paths[i:i + files_per_process] for i in range(0, len(paths), files_per_process)]
+
+    is_temp_dir = work_dir == None
+    if is_temp_dir:
+        work_dir = tempfile.mkdtemp(prefix=WORK_DIR_PREFIX)
+    if jobs == None:
+        jobs = os.cpu_count() or 1
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(_apply_chunk, binary_path, job, chunk, os.path.join(work_dir, f"job_{i}"), timeout) for i, chunk in enumerate(chunks)]
+            for future in as_completed(futures):
+                for result in future.result():
+                    if not result["is_success"]:
+                        summary["failed"].append(result)
+                    elif result.get("is_skipped"):
+                        summary["skipped"].append(result)
+                    else:
+                        summary["applied"].append(result)
+                    del result["is_success"]
+                    result.pop("is_skipped", None)
+                    count = len(summary["applied"]) + len(summary["skipped"]) + len(summary["failed"])
+                    print(f'[{count}/{len(paths)}] {result["target"]} : {result["seconds"]:.2f} sec')
+    finally:
+        if is_temp_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    for key in ("applied", "skipped", "failed"):
+        summary[key].sort(key=lambda r: r["target"])
+    summary["seconds"] = time.monotonic() - start_time
+
+    return summary
+
+# ----------------------------------------------------------------------------------------------------
+# Private Functions
+# ----------------------------------------------------------------------------------------------------
+
+# -- Apply --
+
+def _apply_chunk(binary_path, job, chunk, job_base_path, timeout):
+    """ 1つのBlenderで複数のファイルに続けて反映(スレッド用)
+        ※途中でBlenderが止まった場合は、止まったファイルを失敗にして残りを新しいBlenderで続ける
+
+    Args:
+        binary_path (str): Blenderの実行ファイルのパス
+        job (dict): ジョブ (設定ファイル、反映方法)
+        chunk (dict[]): 反映するファイル (path : 開くパス, output : 保存先のパス)
+        job_base_path (str): ジョブファイル、結果ファイルのパス (拡張子なし)
+        timeout (float): 1ファイルあたりのタイムアウト(秒)
+
+    Returns:
+        dict[]: ファイル毎の反映結果
+    """
+    results = []
+    remaining = chunk
+    while len(remaining) > 0:
+        job_path = f"{job_base_path}_{len(results)}.json"
+        result_path = f"{job_base_path}_{len(results)}.jsonl"
+        start_time = time.monotonic()
+
+        error = None
+        try:
+            with open(job_path, "w") as f:
+                json.dump(dict(job, targets=remaining, result_path=result_path), f)
+            if not comp_util.run_apply_process(binary_path, job_path, timeout * len(remaining) if timeout != None else None):
+                error = "Blender crashed or timed out."
+        except OSError as e:
+            error = str(e)
+
+        done = {result["target"]: result for result in _read_results(result_path)}
+        results += [done[target["path"]] for target in remaining if target["path"] in done]
+        remaining = [target for target in remaining if target["path"] not in done]
+        if len(remaining) == 0:
+            break
+
+        if error == None or not os.path.isfile(result_path):
+            # 起動出来ない場合などは続けても同じなので残りも全て失敗にする
+            failed = remaining
+        else:
+            # 結果がない最初のファイルの反映中に止まった
+            failed = remaining[:1]
+        seconds = time.monotonic() - start_time
+        results += [
+            {
+                "target": target["path"],
+                "output": target["output"],
+                "is_success": False,
+                "error": error or "No result.",
+                "seconds": seconds,
+            }
+            for target in failed
+        ]
+        remaining = remaining[len(failed):]
+
+    return results
+
+def _read_results(result_path):
+    """ 結果ファイルを読み込み
+        ※書き込み途中で止まった行は無視する
+
+    Args:
+        result_path (str): 結果ファイルのパス
+
+    Returns:
+        dict[]: ファイル毎の反映結果
+    """
+    if not os.path.isfile(result_path):
+        return []
+
+    results = []
+    with open(result_path, "r") as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except ValueError:
+                continue
+
+    return results
+
+# -- Helper --
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Apply one Compositing setup to many .blend files and save them.")
+    parser.add_argument("targets", nargs="+", help="directories or glob patterns of .blend files to update")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--template", default=None, help=".blend file to take the Compositing setup from")
+    source.add_argument("--preset", default=None, help="Compositing setup already exported by the addon")
+    parser.add_argument("--source", default=None, help=".blend file to append NodeGroups and LineStyles from (default: the template, or the file recorded in the preset)")
+    parser.add_argument("--scene", default=None, help="scene of the template to apply (default: the active scene)")
+    parser.add_argument("-o", "--output", default=None, help="save the results under this directory instead of overwriting the targets")
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="path to the Blender executable")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of Blender processes (default: CPU count)")
+    parser.add_argument("--files-per-process", type=int, default=DEFAULT_FILES_PER_PROCESS, help=f"files handled by one Blender process (default: {DEFAULT_FILES_PER_PROCESS})")
+    parser.add_argument("--timeout", type=float, default=None, help="timeout per file in seconds")
+    parser.add_argument("--force", action="store_true", help="apply and save even if the file already has the same setup")
+    parser.add_argument("--reconcile", action="store_true", help="update the existing nodes in place instead of rebuilding them")
+    parser.add_argument("--keep-nodes", action="store_true", help="add the nodes below the existing ones instead of replacing them")
+    parser.add_argument("--no-view-layers", action="store_true", help="do not apply the view layers")
+    parser.add_argument("--clear-view-layers", action="store_true", help="delete the view layers that are not in the setup")
+    parser.add_argument("--clear-freestyle", action="store_true", help="delete the existing LineSets and LineStyles")
+    parser.add_argument("--clear-node-groups", action="store_true", help="delete the existing NodeGroups before appending")
+    parser.add_argument("--view-layer-prefix", default="", help="text added to the names of the created view layers")
+    parser.add_argument("--summary", default=None, help=f"summary file path (default: <output or current directory>/{SUMMARY_FILE_NAME})")
+
+    return parser.parse_args(argv)
+
+def _write_summary(summary, summary_path):
+    os.makedirs(os.path.dirname(os.path.abspath(summary_path)), exist_ok=True)
+    with open(summary_path, "w") as f:
+        json.dump(summary, f, indent=2)
+
+def _print_summary(summary, summary_path):
+    print(
+        f'Applied : {len(summary["applied"])}, '
+        f'Skipped : {len(summary["skipped"])}, '
+        f'Failed : {len(summary["failed"])}, '
+        f'Time : {summary["seconds"]:.2f} sec'
+    )
+    for result in summary["failed"]:
+        print(f'  Failed : {result["target"]} ({result.get("error", "")})')
+    print(f"Summary : {summary_path}")
+
+if __name__ == "__main__":
+    sys.exit(main())
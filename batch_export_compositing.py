@@ -0,0 +1,328 @@
+# ----------------------------------------------------------------------------------------------------
+# ディレクトリ以下の.blendのCompositing設定を一括で出力するコマンドライン用
+# ※Blenderの外からPythonで実行する (Blender側ではアドオンを有効にしておく)
+#
+#   python batch_export_compositing.py --blender <blender> -o <出力先> <ディレクトリ or glob> ...
+# ----------------------------------------------------------------------------------------------------
+
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+if __package__:
+    from . import compositing_blend
+    from . import compositing_io_util as comp_util
+else:
+    import compositing_blend
+    import compositing_io_util as comp_util
+
+# ----------------------------------------------------------------------------------------------------
+# 定数
+# ----------------------------------------------------------------------------------------------------
+
+BLEND_EXT = ".blend"
+OUTPUT_EXT = ".json"
+# セクション毎に読み込める形式はJSONではないので別の拡張子 (圧縮もセクション毎)
+INDEXED_OUTPUT_EXT = ".cio"
+COMPRESSION_EXTS = {
+    comp_util.COMPRESSION_NONE: "",
+    comp_util.COMPRESSION_GZIP: ".gz",
+    comp_util.COMPRESSION_LZMA: ".xz",
+}
+SUMMARY_FILE_NAME = "export_summary.json"
+
+# ----------------------------------------------------------------------------------------------------
+# Public Functions
+# ----------------------------------------------------------------------------------------------------
+
+def main(argv=None):
+    args = _parse_args(argv)
+
+    try:
+        sources = collect_sources(args.sources)
+    except ValueError as e:
+        print(e)
+        return 1
+    if len(sources) == 0:
+        print("No .blend files found.")
+        return 1
+
+    summary = export_all(
+        args.blender,
+        sources,
+        args.output,
+        jobs=args.jobs,
+        is_force=args.force,
+        timeout=args.timeout,
+        is_compact=args.compact,
+        compression=args.compression,
+        is_indexed=args.indexed,
+        is_all_scenes=args.all_scenes,
+    )
+
+    summary_path = args.summary if args.summary else os.path.join(args.output, SUMMARY_FILE_NAME)
+    _write_summary(summary, summary_path)
+    _print_summary(summary, summary_path)
+
+    return 1 if len(summary["failed"]) > 0 else 0
+
+def collect_sources(patterns):
+    """ ディレクトリ、globから.blendを収集
+        ※別のディレクトリに同じ相対パスのファイルがある場合は、それぞれのディレクトリ名から始まる相対パスにする
+
+    Args:
+        patterns (str[]): ディレクトリまたはglobのリスト
+
+    Returns:
+        (str, str)[]: (.blendのパス, 出力先で使う相対パス)のリスト
+
+    Raises:
+        ValueError: 出力先で使う相対パスが重なる場合
+    """
+    sources = {}
+    roots = {}
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            root = pattern
+            paths = glob.glob(os.path.join(glob.escape(pattern), "**", "*" + BLEND_EXT), recursive=True)
+        else:
+            paths = [p for p in glob.glob(pattern, recursive=True) if p.endswith(BLEND_EXT)]
+            if len(paths) == 0:
+                continue
+            # globの場合はマッチしたファイルの共通ディレクトリを基準にする
+            root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+
+        for path in paths:
+            abs_path = os.path.abspath(path)
+            if abs_path in sources:
+                continue
+            sources[abs_path] = os.path.relpath(abs_path, os.path.abspath(root))
+            roots[abs_path] = os.path.abspath(root)
+
+    _resolve_rel_path_collisions(sources, roots)
+
+    return sorted(sources.items())
+
+def export_all(binary_path, sources, output_dir, jobs=None, is_force=False, timeout=None, is_compact=False, compression=comp_util.COMPRESSION_NONE, is_indexed=False, is_all_scenes=False):
+    """ .blendのCompositing設定を並列で出力
+
+    Args:
+        binary_path (str): Blenderの実行ファイルのパス
+        sources ((str, str)[]): (.blendのパス, 出力先で使う相対パス)のリスト
+        output_dir (str): 出力先のディレクトリ
+        jobs (int): 同時に起動するBlenderの最大数 (NoneはCPU数)
+        is_force (bool): 出力済みでも出力し直すか？
+        timeout (float): 1ファイルあたりのタイムアウト(秒)
+        is_compact (bool): デフォルト値を省略した形式で出力するか？
+        compression (str): 圧縮形式
+        is_indexed (bool): セクション毎に読み込める形式で出力するか？
+        is_all_scenes (bool): 全てのSceneの設定を出力するか？
+
+    Returns:
+        dict: 出力結果のサマリー
+    """
+    summary = {
+        "blender": binary_path,
+        "output_dir": os.path.abspath(output_dir),
+        "exported": [],
+        "skipped": [],
+        "failed": [],
+    }
+    start_time = time.monotonic()
+
+    targets = []
+    for source, rel_path in sources:
+        output_ext = INDEXED_OUTPUT_EXT if is_indexed else OUTPUT_EXT + COMPRESSION_EXTS[compression]
+        output_path = os.path.join(output_dir, os.path.splitext(rel_path)[0] + output_ext)
+        # 元ファイルより新しい出力があれば出力しない
+        if not is_force and _is_up_to_date(source, output_path):
+            summary["skipped"].append({"source": source, "output": output_path})
+            continue
+        # Blenderを起動する前にファイルの中身を確認
+        error = _check_source(source, is_all_scenes)
+        if error != None:
+            summary["failed"].append({"source": source, "output": output_path, "error": error, "seconds": 0.0})
+            continue
+        targets.append((source, output_path))
+
+    if jobs == None:
+        jobs = os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(_export, binary_path, source, output_path, timeout, is_compact, compression, is_indexed, is_all_scenes) for source, output_path in targets]
+        for future in as_completed(futures):
+            result = future.result()
+            if result["is_success"]:
+                summary["exported"].append(result)
+            else:
+                summary["failed"].append(result)
+            del result["is_success"]
+            print(f'[{len(summary["exported"]) + len(summary["failed"])}/{len(targets)}] {result["source"]} : {result["seconds"]:.2f} sec')
+
+    for key in ("exported", "skipped", "failed"):
+        summary[key].sort(key=lambda r: r["source"])
+    summary["seconds"] = time.monotonic() - start_time
+
+    return summary
+
+# ----------------------------------------------------------------------------------------------------
+# Private Functions
+# ----------------------------------------------------------------------------------------------------
+
+# -- Export --
+
+def _export(binary_path, source, output_path, timeout, is_compact, compression, is_indexed, is_all_scenes):
+    """ 1ファイルのCompositing設定を出力(スレッド用)
+
+    Args:
+        binary_path (str): Blenderの実行ファイルのパス
+        source (str): .blendのパス
+        output_path (str): 出力先のパス
+        timeout (float): タイムアウト(秒)
+        is_compact (bool): デフォルト値を省略した形式で出力するか？
+        compression (str): 圧縮形式
+        is_indexed (bool): セクション毎に読み込める形式で出力するか？
+        is_all_scenes (bool): 全てのSceneの設定を出力するか？
+
+    Returns:
+        dict: 出力結果
+    """
+    result = {"source": source, "output": output_path, "is_success": False}
+    start_time = time.monotonic()
+
+    # 途中で失敗しても前回の出力が壊れないように一時ファイルに出力してから置き換える
+    # (同時に出力しても重ならないように出力先と同じディレクトリに一意な名前で作る)
+    temp_path = None
+    try:
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(output_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(output_path) + ".", suffix=".tmp", dir=output_dir)
+        os.close(fd)
+        if comp_util.run_export_process(binary_path, source, temp_path, timeout, is_compact, compression, is_indexed, is_all_scenes):
+            os.replace(temp_path, output_path)
+            result["is_success"] = True
+        else:
+            result["error"] = "Blender export failed."
+    except OSError as e:
+        result["error"] = str(e)
+    finally:
+        if temp_path != None and os.path.isfile(temp_path):
+            os.remove(temp_path)
+
+    result["seconds"] = time.monotonic() - start_time
+    return result
+
+# -- Check --
+
+def _check_source(source, is_all_scenes=False):
+    """ Blenderを起動せずに出力出来るファイルか確認
+        ※判定出来ない場合(zstdで圧縮されていて展開出来ないなど)は出力してみる
+
+    Args:
+        source (str): .blendのパス
+        is_all_scenes (bool): 全てのSceneの設定を出力するか？
+
+    Returns:
+        str: 出力出来ない理由 (出力出来る場合はNone)
+    """
+    if not compositing_blend.is_blend_file(source):
+        return "Not a blend file."
+
+    blend_info = compositing_blend.read_blend_info(source)
+    if blend_info == None:
+        return None
+    if is_all_scenes:
+        if all(blend_info.has_compositing(name) == False for name in blend_info.scenes):
+            return "No Compositing nodes in any scene."
+    elif blend_info.has_compositing() == False:
+        return f"No Compositing nodes in scene {blend_info.active_scene}."
+
+    return None
+
+def _is_up_to_date(source, output_path):
+    """ 出力が元ファイルより新しいか？
+
+    Args:
+        source (str): .blendのパス
+        output_path (str): 出力先のパス
+
+    Returns:
+        bool: True = Yes, False = No
+    """
+    if not os.path.isfile(output_path):
+        return False
+
+    return os.path.getmtime(output_path) >= os.path.getmtime(source)
+
+# -- Helper --
+
+def _resolve_rel_path_collisions(sources, roots):
+    """ 別のディレクトリで同じになった相対パスを、ディレクトリの共通の親からの相対パスに変更
+
+    Args:
+        sources (dict): .blendのパス -> 出力先で使う相対パス (変更する)
+        roots (dict): .blendのパス -> 基準のディレクトリ
+
+    Raises:
+        ValueError: 変更しても相対パスが重なる場合
+    """
+    groups = {}
+    for abs_path, rel_path in sources.items():
+        groups.setdefault(os.path.normcase(rel_path), []).append(abs_path)
+
+    for abs_paths in groups.values():
+        if len(abs_paths) < 2:
+            continue
+        try:
+            base = os.path.commonpath([os.path.dirname(roots[abs_path]) for abs_path in abs_paths])
+        except ValueError:
+            # ドライブが異なる場合は共通の親がない
+            base = None
+        for abs_path in abs_paths:
+            if base != None:
+                sources[abs_path] = os.path.relpath(abs_path, base)
+
+    rel_paths = {}
+    for abs_path, rel_path in sorted(sources.items()):
+        other = rel_paths.setdefault(os.path.normcase(rel_path), abs_path)
+        if other != abs_path:
+            raise ValueError(f"{other} and {abs_path} have the same output path {rel_path}.")
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Export the Compositing settings of .blend files in bulk.")
+    parser.add_argument("sources", nargs="+", help="directories or glob patterns of .blend files")
+    parser.add_argument("-o", "--output", required=True, help="output directory")
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="path to the Blender executable")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of Blender processes (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=None, help="timeout per file in seconds")
+    parser.add_argument("--force", action="store_true", help="export even if the output is newer than the source")
+    parser.add_argument("--compact", action="store_true", help="omit values equal to the Blender defaults")
+    parser.add_argument("--compression", default=comp_util.COMPRESSION_NONE, choices=list(COMPRESSION_EXTS.keys()), help="compression of the output (default: NONE)")
+    parser.add_argument("--indexed", action="store_true", help="write a section index so that parts of the output can be read alone")
+    parser.add_argument("--all-scenes", action="store_true", help="export every scene with a Compositing node tree, not only the active one")
+    parser.add_argument("--summary", default=None, help=f"summary file path (default: <output>/{SUMMARY_FILE_NAME})")
+
+    return parser.parse_args(argv)
+
+def _write_summary(summary, summary_path):
+    os.makedirs(os.path.dirname(os.path.abspath(summary_path)), exist_ok=True)
+    with open(summary_path, "w") as f:
+        json.dump(summary, f, indent=2)
+
+def _print_summary(summary, summary_path):
+    print(
+        f'Exported : {len(summary["exported"])}, '
+        f'Skipped : {len(summary["skipped"])}, '
+        f'Failed : {len(summary["failed"])}, '
+        f'Time : {summary["seconds"]:.2f} sec'
+    )
+    for result in summary["failed"]:
+        print(f'  Failed : {result["source"]} ({result.get("error", "")})')
+    print(f"Summary : {summary_path}")
+
+if __name__ == "__main__":
+    sys.exit(main())
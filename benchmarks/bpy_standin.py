@@ -0,0 +1,998 @@
+# ----------------------------------------------------------------------------------------------------
+# Blenderの外でベンチマークを実行するためのbpyの代用
+# アドオンが使うRNAの挙動(bl_rnaのプロパティ定義、読み取り専用のプロパティ、ツリー内でユニークなノード名、
+# ソケット、リンク、IDプロパティ)だけを再現する
+# ※ノードの評価などは行わないので、計測できるのはアドオンのPython側の処理時間のみ
+# ----------------------------------------------------------------------------------------------------
+
+import contextlib
+import os
+import struct
+import sys
+import types
+
+# ----------------------------------------------------------------------------------------------------
+# RNA
+# ----------------------------------------------------------------------------------------------------
+
+class Property:
+    def __init__(self, identifier, type, default=None, is_readonly=False, array_length=0, subtype="NONE", is_enum_flag=False):
+        self.identifier = identifier
+        self.type = type
+        self.is_readonly = is_readonly
+        self.subtype = subtype
+        self.is_enum_flag = is_enum_flag
+        if type in ("BOOLEAN", "INT", "FLOAT"):
+            self.array_length = array_length
+        if array_length:
+            self.default_array = tuple(default)
+            self.default = 0
+        else:
+            self.default = default
+
+class _PropertyCollection(list):
+    def get(self, identifier, default=None):
+        for prop in self:
+            if prop.identifier == identifier:
+                return prop
+        return default
+
+    def keys(self):
+        return [prop.identifier for prop in self]
+
+class StructRNA:
+    def __init__(self, identifier, properties):
+        self.identifier = identifier
+        self.properties = _PropertyCollection(properties)
+
+class Vector(list):
+    pass
+
+class Color(list):
+    pass
+
+def _array_value(prop, value):
+    if prop.subtype in ("COLOR", "COLOR_GAMMA") and prop.array_length == 3:
+        return Color(value)
+    if prop.subtype in ("TRANSLATION", "DIRECTION", "XYZ", "COORDINATES"):
+        return Vector(value)
+    return list(value)
+
+class Struct:
+    """ RNAのStructの基底クラス
+        ※継承先は_propsに自身のプロパティを定義する
+    """
+    _props = ()
+    bl_rna = StructRNA("Struct", [])
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        props = {}
+        for base in reversed(cls.__mro__[1:]):
+            for prop in getattr(base, "_props", ()):
+                props[prop.identifier] = prop
+        for prop in cls.__dict__.get("_props", ()):
+            props[prop.identifier] = prop
+        cls._all_props = props
+        cls.bl_rna = StructRNA(cls.__dict__.get("bl_idname", cls.__name__), list(props.values()))
+
+    def __init__(self):
+        object.__setattr__(self, "_idprops", {})
+        for prop in self._all_props.values():
+            # 参照時に計算するプロパティ(Node.location_absoluteなど)
+            if isinstance(getattr(type(self), prop.identifier, None), property):
+                continue
+            if getattr(prop, "array_length", 0):
+                value = _array_value(prop, prop.default_array)
+            else:
+                value = prop.default
+            object.__setattr__(self, prop.identifier, value)
+
+    def __setattr__(self, name, value):
+        prop = self._all_props.get(name)
+        if prop != None:
+            if prop.is_readonly:
+                raise AttributeError(f'bpy_struct: attribute "{name}" from "{self.bl_rna.identifier}" is read-only')
+            value = self._check_value(prop, value)
+        object.__setattr__(self, name, value)
+
+    def _check_value(self, prop, value):
+        if getattr(prop, "array_length", 0):
+            if len(value) != prop.array_length:
+                raise ValueError(f"{prop.identifier} expects {prop.array_length} items")
+            return _array_value(prop, [float(v) for v in value])
+        if prop.type == "BOOLEAN":
+            if not isinstance(value, (bool, int)):
+                raise TypeError(f"{prop.identifier} expects a bool")
+            return bool(value)
+        if prop.type == "INT":
+            if not isinstance(value, int):
+                raise TypeError(f"{prop.identifier} expects an int")
+            return value
+        if prop.type == "FLOAT":
+            if not isinstance(value, (int, float)):
+                raise TypeError(f"{prop.identifier} expects a float")
+            return float(value)
+        if prop.type in ("STRING", "ENUM"):
+            if not isinstance(value, str):
+                raise TypeError(f"{prop.identifier} expects a str")
+        return value
+
+    # ID properties
+    def __getitem__(self, key):
+        return self._idprops[key]
+
+    def __setitem__(self, key, value):
+        self._idprops[key] = value
+
+    def __contains__(self, key):
+        return key in self._idprops
+
+    def get(self, key, default=None):
+        return self._idprops.get(key, default)
+
+    @property
+    def id_data(self):
+        return getattr(self, "_id_data", self)
+
+def _string(identifier, default="", **kwargs):
+    return Property(identifier, "STRING", default, **kwargs)
+
+def _enum(identifier, default, **kwargs):
+    return Property(identifier, "ENUM", default, **kwargs)
+
+def _bool(identifier, default=False, **kwargs):
+    return Property(identifier, "BOOLEAN", default, **kwargs)
+
+def _int(identifier, default=0, **kwargs):
+    return Property(identifier, "INT", default, **kwargs)
+
+def _float(identifier, default=0.0, **kwargs):
+    return Property(identifier, "FLOAT", default, **kwargs)
+
+def _pointer(identifier, is_readonly=False):
+    return Property(identifier, "POINTER", None, is_readonly=is_readonly)
+
+def _collection(identifier):
+    return Property(identifier, "COLLECTION", None, is_readonly=True)
+
+# ----------------------------------------------------------------------------------------------------
+# Collections
+# ----------------------------------------------------------------------------------------------------
+
+class Collection:
+    def __init__(self):
+        self._items = []
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, slice)):
+            return self._items[key]
+        for item in self._items:
+            if item.name == key:
+                return item
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return any(item.name == key for item in self._items)
+        return key in self._items
+
+    def get(self, key, default=None):
+        for item in self._items:
+            if item.name == key:
+                return item
+        return default
+
+    def keys(self):
+        return [item.name for item in self._items]
+
+    def find(self, key):
+        for i, item in enumerate(self._items):
+            if item.name == key:
+                return i
+        return -1
+
+    def foreach_get(self, attr, seq):
+        i = 0
+        for item in self._items:
+            value = getattr(item, attr)
+            if isinstance(value, list):
+                for v in value:
+                    seq[i] = v
+                    i += 1
+            else:
+                seq[i] = value
+                i += 1
+
+    def foreach_set(self, attr, seq):
+        i = 0
+        for item in self._items:
+            value = getattr(item, attr)
+            if isinstance(value, list):
+                n = len(value)
+                setattr(item, attr, [float(v) for v in seq[i:i + n]])
+                i += n
+            else:
+                # Blenderと同じくnumpyの配列の要素もPythonの値として設定する
+                value = seq[i]
+                setattr(item, attr, value.item() if hasattr(value, "item") else value)
+                i += 1
+
+def _unique_name(name, used):
+    if name not in used:
+        return name
+    base = name
+    if len(name) > 4 and name[-4] == "." and name[-3:].isdigit():
+        base = name[:-4]
+    number = 1
+    while f"{base}.{number:03d}" in used:
+        number += 1
+    return f"{base}.{number:03d}"
+
+# ----------------------------------------------------------------------------------------------------
+# Sockets / Links
+# ----------------------------------------------------------------------------------------------------
+
+SOCKET_TYPES = {
+    "NodeSocketFloat": ("VALUE", 0.0),
+    "NodeSocketFloatFactor": ("VALUE", 0.5),
+    "NodeSocketFloatAngle": ("VALUE", 0.0),
+    "NodeSocketColor": ("RGBA", (0.8, 0.8, 0.8, 1.0)),
+    "NodeSocketVector": ("VECTOR", (0.0, 0.0, 0.0)),
+    "NodeSocketInt": ("INT", 0),
+    "NodeSocketBool": ("BOOLEAN", False),
+    "NodeSocketShader": ("SHADER", None),
+}
+
+# 値を32bitの小数で保持するソケットの種類
+FLOAT_SOCKET_TYPES = ("VALUE", "RGBA", "VECTOR")
+
+def _to_float32(value):
+    return struct.unpack("f", struct.pack("f", value))[0]
+
+class NodeSocket:
+    def __init__(self, node, identifier, name, bl_idname, is_output):
+        self.node = node
+        self.identifier = identifier
+        self.name = name
+        self.bl_idname = bl_idname
+        self.is_output = is_output
+        self.enabled = True
+        self.hide = False
+        self.type, default = SOCKET_TYPES[bl_idname]
+        if default != None:
+            self.default_value = list(default) if isinstance(default, tuple) else default
+
+    def __setattr__(self, name, value):
+        if name == "default_value" and hasattr(self, "default_value"):
+            current = self.default_value
+            if isinstance(current, list):
+                if len(value) != len(current):
+                    raise ValueError(f"{self.identifier} expects {len(current)} items")
+                value = [float(v) for v in value]
+            elif isinstance(current, bool):
+                value = bool(value)
+            elif isinstance(current, int):
+                if not isinstance(value, int):
+                    raise TypeError(f"{self.identifier} expects an int")
+            elif not isinstance(value, (int, float)):
+                raise TypeError(f"{self.identifier} expects a float")
+        # Blenderと同じくソケットの小数は32bitで保持する
+        if name == "default_value" and self.type in FLOAT_SOCKET_TYPES:
+            value = [_to_float32(v) for v in value] if isinstance(value, (list, tuple)) else _to_float32(value)
+        object.__setattr__(self, name, value)
+
+    @property
+    def is_linked(self):
+        tree = self.node.id_data
+        return any(l.from_socket is self or l.to_socket is self for l in tree.links)
+
+class NodeSockets(Collection):
+    def __init__(self, node, is_output):
+        super().__init__()
+        self._node = node
+        self._is_output = is_output
+
+    def new(self, bl_idname, name, identifier=None):
+        used = {s.identifier for s in self._items}
+        socket = NodeSocket(self._node, _unique_name(identifier or name, used), name, bl_idname, self._is_output)
+        self._items.append(socket)
+        return socket
+
+    def remove(self, socket):
+        self._items.remove(socket)
+
+    def clear(self):
+        self._items.clear()
+
+class NodeLink:
+    def __init__(self, from_socket, to_socket):
+        self.from_socket = from_socket
+        self.to_socket = to_socket
+        self.from_node = from_socket.node
+        self.to_node = to_socket.node
+        self.is_valid = True
+
+class NodeLinks(Collection):
+    def __init__(self, tree):
+        super().__init__()
+        self._tree = tree
+
+    def new(self, input, output, verify_limits=True):
+        # Blenderも逆の順番で渡されたソケットは入れ替える
+        if not input.is_output:
+            input, output = output, input
+        for link in list(self._items):
+            if link.to_socket is output:
+                self._items.remove(link)
+        link = NodeLink(input, output)
+        self._items.append(link)
+        self._tree._tag_update()
+        return link
+
+    def remove(self, link):
+        self._items.remove(link)
+        self._tree._tag_update()
+
+    def clear(self):
+        self._items.clear()
+
+# ----------------------------------------------------------------------------------------------------
+# Nodes
+# ----------------------------------------------------------------------------------------------------
+
+class Node(Struct):
+    bl_idname = "Node"
+    bl_label = "Node"
+    _inputs = ()
+    _outputs = ()
+    _props = (
+        _string("name"),
+        _string("label"),
+        _string("bl_idname"),
+        _string("bl_label", is_readonly=True),
+        _enum("type", "CUSTOM", is_readonly=True),
+        _float("location", (0.0, 0.0), array_length=2, subtype="TRANSLATION"),
+        _float("location_absolute", (0.0, 0.0), array_length=2, subtype="TRANSLATION", is_readonly=True),
+        _float("width", 140.0),
+        _float("height", 100.0),
+        _float("dimensions", (0.0, 0.0), array_length=2, subtype="XYZ", is_readonly=True),
+        _bool("select", True),
+        _bool("hide"),
+        _bool("mute"),
+        _bool("show_options", True),
+        _bool("show_preview"),
+        _bool("use_custom_color"),
+        _float("color", (0.608, 0.608, 0.608), array_length=3, subtype="COLOR"),
+        _pointer("parent"),
+        _collection("inputs"),
+        _collection("outputs"),
+        _pointer("rna_type", is_readonly=True),
+    )
+
+    def __init__(self, tree):
+        super().__init__()
+        object.__setattr__(self, "_id_data", tree)
+        object.__setattr__(self, "bl_idname", type(self).bl_idname)
+        object.__setattr__(self, "bl_label", type(self).bl_label)
+        object.__setattr__(self, "parent", None)
+        object.__setattr__(self, "inputs", NodeSockets(self, False))
+        object.__setattr__(self, "outputs", NodeSockets(self, True))
+        object.__setattr__(self, "dimensions", Vector((self.width, self.height)))
+        for bl_idname, name in self._inputs:
+            self.inputs.new(bl_idname, name)
+        for bl_idname, name in self._outputs:
+            self.outputs.new(bl_idname, name)
+
+    def __setattr__(self, name, value):
+        if name == "name":
+            # Blenderもリネームの度にツリー全体で名前の重複を確認する
+            tree = self._id_data
+            used = {n.name for n in tree.nodes if n is not self}
+            value = _unique_name(value, used)
+        super().__setattr__(name, value)
+        if name in self._all_props:
+            self._id_data._tag_update()
+        if name == "width":
+            object.__setattr__(self, "dimensions", Vector((value, self.height)))
+
+    def update(self):
+        self._id_data._tag_update()
+
+    @property
+    def location_absolute(self):
+        location = list(self.location)
+        parent = self.parent
+        while parent != None:
+            location[0] += parent.location[0]
+            location[1] += parent.location[1]
+            parent = parent.parent
+        return Vector(location)
+
+def _node_type(bl_idname, bl_label, props=(), inputs=(), outputs=(), base=Node):
+    return type(bl_idname, (base,), {
+        "bl_idname": bl_idname,
+        "bl_label": bl_label,
+        "_props": tuple(props),
+        "_inputs": tuple(inputs),
+        "_outputs": tuple(outputs),
+    })
+
+class ImageFormatSettings(Struct):
+    bl_idname = "ImageFormatSettings"
+    _props = (
+        _enum("file_format", "PNG"),
+        _enum("color_mode", "RGBA"),
+        _enum("color_depth", "8"),
+        _int("compression", 15),
+        _int("quality", 90),
+        _enum("exr_codec", "ZIP"),
+        _bool("use_preview"),
+    )
+
+class _Slot(Struct):
+    _props = (_string("name"), _string("path"), _bool("use_node_format", True))
+
+class _Slots(Collection):
+    def __init__(self, node, attr):
+        super().__init__()
+        self._node = node
+        self._attr = attr
+
+    def new(self, name):
+        slot = _Slot()
+        slot.name = name
+        slot.path = name
+        self._items.append(slot)
+        self._node.inputs.new("NodeSocketColor", name, name)
+        return slot
+
+    def clear(self):
+        self._items.clear()
+        self._node.inputs.clear()
+
+class CompositorNodeOutputFile(Node):
+    bl_idname = "CompositorNodeOutputFile"
+    bl_label = "File Output"
+    _props = (
+        _string("base_path", "/tmp/"),
+        _int("active_input_index"),
+        _pointer("format", is_readonly=True),
+    )
+
+    def __init__(self, tree):
+        super().__init__(tree)
+        object.__setattr__(self, "format", ImageFormatSettings())
+        object.__setattr__(self, "layer_slots", _Slots(self, "layer_slots"))
+        object.__setattr__(self, "file_slots", _Slots(self, "file_slots"))
+        self.file_slots.new("Image")
+
+class CompositorNodeGroup(Node):
+    bl_idname = "CompositorNodeGroup"
+    bl_label = "Group"
+    _inputs = (("NodeSocketColor", "Image"), ("NodeSocketFloatFactor", "Fac"))
+    _outputs = (("NodeSocketColor", "Image"),)
+    _props = (_pointer("node_tree"),)
+
+    def __init__(self, tree):
+        super().__init__(tree)
+        object.__setattr__(self, "node_tree", None)
+
+class NodeFrame(Node):
+    bl_idname = "NodeFrame"
+    bl_label = "Frame"
+    _props = (_int("label_size", 20), _bool("shrink", True))
+
+class NodeReroute(Node):
+    bl_idname = "NodeReroute"
+    bl_label = "Reroute"
+    _inputs = (("NodeSocketColor", "Input"),)
+    _outputs = (("NodeSocketColor", "Output"),)
+
+class CompositorNodeRLayers(Node):
+    bl_idname = "CompositorNodeRLayers"
+    bl_label = "Render Layers"
+    _outputs = (("NodeSocketColor", "Image"), ("NodeSocketFloat", "Alpha"), ("NodeSocketFloat", "Depth"))
+    _props = (_string("layer", "ViewLayer"), _pointer("scene"))
+
+NODE_TYPES = [
+    _node_type("CompositorNodeBlur", "Blur",
+        [_int("size_x"), _int("size_y"), _enum("filter_type", "GAUSS"), _bool("use_relative"),
+         _bool("use_bokeh"), _bool("use_gamma_correction"), _float("factor"), _bool("use_extended_bounds")],
+        [("NodeSocketColor", "Image"), ("NodeSocketFloat", "Size")],
+        [("NodeSocketColor", "Image")]),
+    _node_type("CompositorNodeMixRGB", "Mix",
+        [_enum("blend_type", "MIX"), _bool("use_alpha"), _bool("use_clamp")],
+        [("NodeSocketFloatFactor", "Fac"), ("NodeSocketColor", "Image"), ("NodeSocketColor", "Image")],
+        [("NodeSocketColor", "Image")]),
+    _node_type("CompositorNodeMath", "Math",
+        [_enum("operation", "ADD"), _bool("use_clamp")],
+        [("NodeSocketFloat", "Value"), ("NodeSocketFloat", "Value"), ("NodeSocketFloat", "Value")],
+        [("NodeSocketFloat", "Value")]),
+    _node_type("CompositorNodeTransform", "Transform",
+        [_enum("filter_type", "NEAREST")],
+        [("NodeSocketColor", "Image"), ("NodeSocketFloat", "X"), ("NodeSocketFloat", "Y"),
+         ("NodeSocketFloatAngle", "Angle"), ("NodeSocketFloat", "Scale")],
+        [("NodeSocketColor", "Image")]),
+    _node_type("CompositorNodeNormal", "Normal",
+        [],
+        [("NodeSocketVector", "Normal")],
+        [("NodeSocketVector", "Normal"), ("NodeSocketFloat", "Dot")]),
+    _node_type("CompositorNodeSwitch", "Switch",
+        [_bool("check")],
+        [("NodeSocketColor", "Off"), ("NodeSocketColor", "On")],
+        [("NodeSocketColor", "Image")]),
+    _node_type("CompositorNodeDilateErode", "Dilate/Erode",
+        [_enum("mode", "STEP"), _int("distance", -5), _float("edge"), _enum("falloff", "SMOOTH")],
+        [("NodeSocketFloatFactor", "Mask")],
+        [("NodeSocketFloatFactor", "Mask")]),
+    _node_type("CompositorNodeValue", "Value", [], [], [("NodeSocketFloat", "Value")]),
+    _node_type("CompositorNodeComposite", "Composite",
+        [_bool("use_alpha", True)],
+        [("NodeSocketColor", "Image"), ("NodeSocketFloat", "Alpha")],
+        []),
+    CompositorNodeOutputFile,
+    CompositorNodeGroup,
+    NodeFrame,
+    NodeReroute,
+    CompositorNodeRLayers,
+]
+
+# ----------------------------------------------------------------------------------------------------
+# IDs
+# ----------------------------------------------------------------------------------------------------
+
+class ID(Struct):
+    _props = (_string("name"), _pointer("library", is_readonly=True), _int("users", is_readonly=True))
+
+    def __init__(self, name):
+        super().__init__()
+        object.__setattr__(self, "library", None)
+        object.__setattr__(self, "name", name)
+
+    def update_tag(self):
+        pass
+
+class Nodes(Collection):
+    def __init__(self, tree):
+        super().__init__()
+        self._tree = tree
+
+    def new(self, type):
+        cls = _node_types.get(type)
+        if cls == None:
+            raise RuntimeError(f'Node type {type} undefined')
+        node = cls(self._tree)
+        self._items.append(node)
+        object.__setattr__(node, "name", _unique_name(cls.bl_label, {n.name for n in self._items if n is not node}))
+        self._tree._tag_update()
+        return node
+
+    def remove(self, node):
+        for link in list(self._tree.links):
+            if link.from_node is node or link.to_node is node:
+                self._tree.links.remove(link)
+        for n in self._items:
+            if n.parent is node:
+                object.__setattr__(n, "parent", None)
+        self._items.remove(node)
+        self._tree._tag_update()
+
+    def clear(self):
+        self._items.clear()
+        self._tree.links.clear()
+
+class NodeTree(ID):
+    bl_idname = "NodeTree"
+    _props = (_enum("type", "COMPOSITING", is_readonly=True),)
+
+    def __init__(self, name, type="CompositorNodeTree"):
+        super().__init__(name)
+        object.__setattr__(self, "type", {"CompositorNodeTree": "COMPOSITING", "ShaderNodeTree": "SHADER"}.get(type, type))
+        object.__setattr__(self, "nodes", Nodes(self))
+        object.__setattr__(self, "links", NodeLinks(self))
+        object.__setattr__(self, "update_count", 0)
+
+    def _tag_update(self):
+        object.__setattr__(self, "update_count", self.update_count + 1)
+
+class LineStyle(ID):
+    bl_idname = "FreestyleLineStyle"
+    _props = (_float("color", (0.0, 0.0, 0.0), array_length=3, subtype="COLOR"), _float("thickness", 3.0))
+
+class Library(ID):
+    bl_idname = "Library"
+    _props = (_string("filepath"),)
+
+# ----------------------------------------------------------------------------------------------------
+# ViewLayer / Freestyle
+# ----------------------------------------------------------------------------------------------------
+
+class AOV(Struct):
+    bl_idname = "AOV"
+    _props = (_string("name"), _enum("type", "COLOR"), _bool("is_valid", True, is_readonly=True))
+
+class AOVs(Collection):
+    def add(self):
+        aov = AOV()
+        aov.name = _unique_name("AOV", {a.name for a in self._items})
+        self._items.append(aov)
+        return aov
+
+    def remove(self, aov):
+        self._items.remove(aov)
+
+    def clear(self):
+        self._items.clear()
+
+class FreestyleLineSet(Struct):
+    bl_idname = "FreestyleLineSet"
+    _props = (
+        _string("name"),
+        _bool("show_render", True),
+        _bool("select_by_visibility", True),
+        _bool("select_by_edge_types", True),
+        _bool("select_by_face_marks"),
+        _bool("select_by_collection"),
+        _enum("visibility", "VISIBLE"),
+        _enum("edge_type_negation", "INCLUSIVE"),
+        _enum("edge_type_combination", "OR"),
+        _bool("select_silhouette", True),
+        _bool("select_border", True),
+        _bool("select_crease", True),
+        _int("qi_start"),
+        _int("qi_end", 100),
+        _pointer("linestyle"),
+    )
+
+class LineSets(Collection):
+    def __init__(self, owner):
+        super().__init__()
+        self._owner = owner
+
+    def new(self, name):
+        lineset = FreestyleLineSet()
+        object.__setattr__(lineset, "_id_data", self._owner.id_data)
+        lineset.name = _unique_name(name, {l.name for l in self._items})
+        linestyle = _data.linestyles.new("LineStyle")
+        lineset.linestyle = linestyle
+        self._items.append(lineset)
+        return lineset
+
+    def remove(self, lineset):
+        self._items.remove(lineset)
+
+class FreestyleSettings(Struct):
+    bl_idname = "FreestyleSettings"
+    _props = (
+        _enum("mode", "EDITOR"),
+        _bool("as_render_pass"),
+        _bool("use_culling"),
+        _bool("use_smoothness"),
+        _float("crease_angle", 2.18),
+        _bool("use_view_map_cache"),
+        _collection("linesets"),
+    )
+
+    def __init__(self, view_layer):
+        super().__init__()
+        object.__setattr__(self, "_id_data", view_layer.id_data)
+        object.__setattr__(self, "linesets", LineSets(self))
+
+class ViewLayerCycles(Struct):
+    bl_idname = "CyclesRenderLayerSettings"
+    _props = (_bool("denoising_store_passes"), _bool("use_pass_debug_sample_count"))
+
+class ViewLayer(Struct):
+    bl_idname = "ViewLayer"
+    _props = (
+        _string("name"),
+        _bool("use", True),
+        _int("samples"),
+        _float("pass_alpha_threshold", 0.5),
+        _bool("use_pass_combined", True),
+        _bool("use_pass_z", True),
+        _bool("use_pass_mist"),
+        _bool("use_pass_normal"),
+        _bool("use_pass_diffuse_direct"),
+        _bool("use_pass_diffuse_color"),
+        _bool("use_pass_glossy_direct"),
+        _bool("use_pass_emit"),
+        _bool("use_pass_ambient_occlusion"),
+        _bool("use_pass_shadow"),
+        _bool("use_pass_cryptomatte_object"),
+        _bool("use_pass_cryptomatte_material"),
+        _int("pass_cryptomatte_depth", 6),
+        _bool("use_freestyle", True),
+        _bool("use_sky", True),
+        _bool("use_solid", True),
+        _bool("use_strand", True),
+        _bool("use_volumes", True),
+        _bool("use_motion_blur", True),
+        _int("active_aov_index"),
+        _collection("aovs"),
+        _pointer("cycles", is_readonly=True),
+        _pointer("freestyle_settings", is_readonly=True),
+        _bool("has_export_collections", is_readonly=True),
+    )
+
+    def __init__(self, scene, name):
+        super().__init__()
+        object.__setattr__(self, "_id_data", scene)
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "aovs", AOVs())
+        object.__setattr__(self, "cycles", ViewLayerCycles())
+        object.__setattr__(self, "freestyle_settings", FreestyleSettings(self))
+
+class ViewLayers(Collection):
+    def __init__(self, scene):
+        super().__init__()
+        self._scene = scene
+
+    def new(self, name):
+        layer = ViewLayer(self._scene, _unique_name(name, {l.name for l in self._items}))
+        self._items.append(layer)
+        return layer
+
+    def remove(self, layer):
+        self._items.remove(layer)
+
+class RenderSettings(Struct):
+    bl_idname = "RenderSettings"
+    _props = (_enum("engine", "CYCLES"), _bool("use_freestyle"), _bool("use_compositing", True))
+
+# ----------------------------------------------------------------------------------------------------
+# Scene
+# ----------------------------------------------------------------------------------------------------
+
+class Scene(ID):
+    bl_idname = "Scene"
+
+    def __init__(self, name):
+        super().__init__(name)
+        object.__setattr__(self, "render", RenderSettings())
+        object.__setattr__(self, "view_layers", ViewLayers(self))
+        object.__setattr__(self, "node_tree", None)
+        object.__setattr__(self, "_use_nodes", False)
+        self.view_layers.new(DEFAULT_VIEW_LAYER)
+
+    @property
+    def use_nodes(self):
+        return self._use_nodes
+
+    @use_nodes.setter
+    def use_nodes(self, value):
+        object.__setattr__(self, "_use_nodes", value)
+        if value and self.node_tree == None:
+            tree = NodeTree("Compositing Nodetree")
+            object.__setattr__(tree, "_owner", self)
+            object.__setattr__(self, "node_tree", tree)
+
+class _IDCollection(Collection):
+    def __init__(self, cls):
+        super().__init__()
+        self._cls = cls
+
+    def new(self, name, *args):
+        item = self._cls(_unique_name(name, {i.name for i in self._items}), *args)
+        self._items.append(item)
+        return item
+
+    def remove(self, item):
+        self._items.remove(item)
+
+class _Libraries(_IDCollection):
+    def __init__(self):
+        super().__init__(Library)
+
+    @contextlib.contextmanager
+    def load(self, filepath, link=False, relative=False):
+        content = _blend_files.get(os.path.normcase(os.path.abspath(filepath)))
+        if content == None:
+            raise OSError(f"Cannot read file '{filepath}'")
+        data_from = types.SimpleNamespace(**{k: list(v) for k, v in content.items()})
+        data_to = types.SimpleNamespace(**{k: [] for k in content})
+        yield data_from, data_to
+
+        library = None
+        if link:
+            library = self.new(os.path.basename(filepath))
+            library.filepath = filepath
+        for attr in content:
+            collection = getattr(_data, attr, None)
+            if collection == None:
+                continue
+            created = []
+            for name in getattr(data_to, attr):
+                item = collection.new(name)
+                if library != None:
+                    object.__setattr__(item, "library", library)
+                created.append(item)
+            setattr(data_to, attr, created)
+
+class BlendData:
+    def __init__(self):
+        self.scenes = _IDCollection(Scene)
+        self.node_groups = _IDCollection(NodeTree)
+        self.linestyles = _IDCollection(LineStyle)
+        self.libraries = _Libraries()
+        self.filepath = ""
+
+    def batch_remove(self, ids):
+        for item in ids:
+            for collection in (self.scenes, self.node_groups, self.linestyles, self.libraries):
+                if item in collection._items:
+                    collection.remove(item)
+
+# ----------------------------------------------------------------------------------------------------
+# bpy.props / bpy.types (registration)
+# ----------------------------------------------------------------------------------------------------
+
+class _PropDef:
+    def __init__(self, kind, kwargs):
+        self.kind = kind
+        self.kwargs = kwargs
+        self.attr = None
+
+    def __set_name__(self, owner, name):
+        self.attr = name
+
+    def default(self):
+        if self.kind == "POINTER":
+            return self.kwargs["type"]()
+        if self.kind == "COLLECTION":
+            return []
+        return self.kwargs.get("default", {"BOOLEAN": False, "INT": 0, "FLOAT": 0.0, "STRING": "", "ENUM": None}[self.kind])
+
+    def __get__(self, obj, cls=None):
+        if obj == None:
+            return self
+        key = "_prop_" + (self.attr or str(id(self)))
+        if key not in obj.__dict__:
+            obj.__dict__[key] = self.default()
+        return obj.__dict__[key]
+
+    def __set__(self, obj, value):
+        obj.__dict__["_prop_" + (self.attr or str(id(self)))] = value
+        update = self.kwargs.get("update")
+        if update != None:
+            update(obj, _context)
+
+def _prop_factory(kind):
+    return lambda **kwargs: _PropDef(kind, kwargs)
+
+class PropertyGroup:
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name, prop in cls.__dict__.get("__annotations__", {}).items():
+            if isinstance(prop, _PropDef):
+                prop.attr = name
+                setattr(cls, name, prop)
+
+    def __init__(self):
+        for name, prop in type(self).__dict__.items():
+            if isinstance(prop, _PropDef) and prop.kind == "ENUM" and prop.kwargs.get("default") == None:
+                items = prop.kwargs.get("items")
+                if isinstance(items, (list, tuple)) and items:
+                    self.__dict__["_prop_" + name] = items[0][0]
+
+class Operator:
+    def __init__(self):
+        self.reports = []
+
+    def report(self, type, message):
+        self.reports.append((set(type), message))
+
+class Panel:
+    pass
+
+class _Timers:
+    def __init__(self):
+        self.functions = []
+
+    def register(self, function, first_interval=0, persistent=False):
+        self.functions.append(function)
+
+    def unregister(self, function):
+        if function in self.functions:
+            self.functions.remove(function)
+
+    def is_registered(self, function):
+        return function in self.functions
+
+# ----------------------------------------------------------------------------------------------------
+# Install
+# ----------------------------------------------------------------------------------------------------
+
+DEFAULT_VIEW_LAYER = "ViewLayer"
+
+_node_types = {cls.bl_idname: cls for cls in NODE_TYPES}
+_blend_files = {}
+_data = None
+_context = None
+
+def register_blend_file(filepath, **content):
+    """ bpy.data.libraries.load()で読み込める.blendを登録
+
+    Args:
+        filepath (str): .blendのパス
+        content (dict): データの種類(scenes, node_groups, linestyles)毎の名前のリスト
+    """
+    _blend_files[os.path.normcase(os.path.abspath(filepath))] = content
+
+def reset():
+    """ Sceneが1つだけの空のファイルの状態に戻す
+    """
+    global _data, _context
+    _data = BlendData()
+    scene = _data.scenes.new("Scene")
+    window = types.SimpleNamespace(view_layer=scene.view_layers[0], scene=scene)
+    if _context == None:
+        _context = types.SimpleNamespace()
+    _context.scene = scene
+    _context.window = window
+    _context.view_layer = scene.view_layers[0]
+    _context.window_manager = None
+    bpy = sys.modules.get("bpy")
+    if bpy != None:
+        bpy.data = _data
+        bpy.context = _context
+
+def install():
+    """ bpy, bpy_extras, mathutilsの代用モジュールを登録
+
+    Returns:
+        module: 代用のbpy
+    """
+    bpy = types.ModuleType("bpy")
+    bpy.__is_standin__ = True
+    bpy.app = types.SimpleNamespace(
+        version=(4, 1, 0),
+        version_string="4.1.0",
+        binary_path="blender",
+        timers=_Timers(),
+        handlers=types.SimpleNamespace(load_pre=[], persistent=lambda function: function),
+        background=True,
+    )
+    bpy.path = types.SimpleNamespace(abspath=lambda path, **kwargs: path)
+    bpy.types = types.SimpleNamespace(
+        Struct=Struct,
+        Node=Node,
+        NodeTree=NodeTree,
+        Scene=Scene,
+        ViewLayer=ViewLayer,
+        PropertyGroup=PropertyGroup,
+        Operator=Operator,
+        Panel=Panel,
+        **{cls.bl_idname: cls for cls in NODE_TYPES},
+    )
+    bpy.props = types.ModuleType("bpy.props")
+    for kind in ("Bool", "Int", "Float", "String", "Enum", "Pointer", "Collection"):
+        setattr(bpy.props, f"{kind}Property", _prop_factory(kind.upper() if kind != "Bool" else "BOOLEAN"))
+    bpy.utils = types.SimpleNamespace(register_class=lambda cls: None, unregister_class=lambda cls: None)
+    bpy.ops = types.SimpleNamespace(
+        ed=types.SimpleNamespace(undo_push=lambda **kwargs: {'FINISHED'}),
+        wm=types.SimpleNamespace(redraw_timer=lambda **kwargs: {'FINISHED'}),
+    )
+    sys.modules["bpy"] = bpy
+    sys.modules["bpy.props"] = bpy.props
+
+    bpy_extras = types.ModuleType("bpy_extras")
+    bpy_extras.io_utils = types.ModuleType("bpy_extras.io_utils")
+    bpy_extras.io_utils.ImportHelper = type("ImportHelper", (), {})
+    sys.modules["bpy_extras"] = bpy_extras
+    sys.modules["bpy_extras.io_utils"] = bpy_extras.io_utils
+
+    mathutils = types.ModuleType("mathutils")
+    mathutils.Vector = Vector
+    mathutils.Color = Color
+    sys.modules["mathutils"] = mathutils
+
+    reset()
+    return bpy
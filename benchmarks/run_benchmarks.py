@@ -0,0 +1,417 @@
+# ----------------------------------------------------------------------------------------------------
+# Compositing設定の書き出し、読み込みのベンチマーク
+# ノード数を変えた生成ツリーで各処理の時間、メモリを計測し、ノード数に対する増え方(log-logの傾き)を出す
+#
+#   python benchmarks/run_benchmarks.py [--sizes 10,100,1000,10000] [-o results.json]
+#   blender -b --factory-startup -P benchmarks/run_benchmarks.py -- [--sizes ...] [-o results.json]
+#
+# Blenderの外では代用のbpy(bpy_standin.py)を使う
+# ----------------------------------------------------------------------------------------------------
+
+import argparse
+import contextlib
+import importlib
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.dirname(BENCHMARK_DIR)
+
+sys.path.insert(0, BENCHMARK_DIR)
+import synthetic
+
+# ----------------------------------------------------------------------------------------------------
+# 定数
+# ----------------------------------------------------------------------------------------------------
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.25
+RESULT_VERSION = 1
+SOURCE_SCENE_NAME = "Benchmark Source"
+IMPORT_SCENE_NAME = "Benchmark Import"
+
+# ----------------------------------------------------------------------------------------------------
+# Public Functions
+# ----------------------------------------------------------------------------------------------------
+
+def main(argv=None):
+    args = _parse_args(argv)
+
+    bpy, is_standin = _setup_bpy(args.standin)
+    modules = _import_addon(bpy)
+
+    results = {
+        "version": RESULT_VERSION,
+        "environment": _get_environment(bpy, is_standin),
+        "options": {
+            "sizes": args.sizes,
+            "repeat": args.repeat,
+            "view_layers": args.view_layers,
+            "aovs": args.aovs,
+            "linesets": args.linesets,
+            "is_trace_memory": args.memory,
+        },
+        "runs": [],
+    }
+
+    for size in args.sizes:
+        run = run_size(bpy, modules, is_standin, size, args)
+        results["runs"].append(run)
+        _print_run(run)
+
+    results["scaling"] = calc_scaling(results["runs"])
+    _print_scaling(results["scaling"])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results : {args.output}")
+
+    if args.baseline:
+        regressions = compare_baseline(results, args.baseline, args.tolerance)
+        for message in regressions:
+            print(f"  Regression : {message}")
+        if len(regressions) > 0:
+            return 1
+
+    return 0
+
+def run_size(bpy, modules, is_standin, size, args):
+    """ 1つのノード数で計測
+
+    Args:
+        bpy (module): bpy
+        modules (dict): アドオンのモジュール
+        is_standin (bool): 代用のbpyか？
+        size (int): 生成するノード数
+        args (argparse.Namespace): 引数
+
+    Returns:
+        dict: 計測結果
+    """
+    timings = []
+    counts = None
+    for _ in range(args.repeat):
+        phases, counts = _run_once(bpy, modules, is_standin, size, args, is_trace_memory=False)
+        timings.append(phases)
+
+    run = {
+        "size": size,
+        "counts": counts,
+        # 最小値が一番ノイズが少ない
+        "seconds": {name: min(t[name]["seconds"] for t in timings) for name in timings[0].keys()},
+    }
+
+    # tracemalloc自体が遅いので時間とは別に計測
+    if args.memory:
+        phases, _ = _run_once(bpy, modules, is_standin, size, args, is_trace_memory=True)
+        # 内部の処理はメモリを計測しない
+        run["peak_bytes"] = {name: phases[name]["peak_bytes"] for name in phases.keys() if "peak_bytes" in phases[name]}
+    if resource != None:
+        run["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return run
+
+def calc_scaling(runs):
+    """ 処理毎にノード数に対する処理時間の増え方を計算
+        ※log(ノード数)とlog(時間)の最小二乗法の傾き (1 = 線形, 2 = 2乗)
+
+    Args:
+        runs (dict[]): 計測結果のリスト
+
+    Returns:
+        dict: 処理毎の傾き
+    """
+    scaling = {}
+    if len(runs) < 2:
+        return scaling
+
+    for name in runs[0]["seconds"].keys():
+        points = [
+            (math.log(run["counts"]["nodes"]), math.log(run["seconds"][name]))
+            for run in runs
+            if run["counts"]["nodes"] > 0 and run["seconds"][name] > 0
+        ]
+        if len(points) < 2:
+            continue
+        scaling[name] = _calc_slope(points)
+
+    return scaling
+
+def compare_baseline(results, baseline_path, tolerance=DEFAULT_TOLERANCE):
+    """ 以前の計測結果と比べて増え方が悪化した処理を取得
+
+    Args:
+        results (dict): 計測結果
+        baseline_path (str): 以前の計測結果のパス
+        tolerance (float): 許容する傾きの差
+
+    Returns:
+        str[]: 悪化した処理のメッセージ
+    """
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for name, exponent in results["scaling"].items():
+        base_exponent = baseline.get("scaling", {}).get(name)
+        if base_exponent == None:
+            continue
+        if exponent > base_exponent + tolerance:
+            regressions.append(f"{name} : {base_exponent:.2f} -> {exponent:.2f}")
+
+    return regressions
+
+# ----------------------------------------------------------------------------------------------------
+# Private Functions
+# ----------------------------------------------------------------------------------------------------
+
+# -- Run --
+
+def _run_once(bpy, modules, is_standin, size, args, is_trace_memory):
+    """ ツリーの生成から書き出し、読み込みまでを1回計測
+
+    Returns:
+        (dict, dict): (処理毎の計測結果, データの件数)
+    """
+    load = modules["compositing_load"]
+    profile = modules["compositing_profile"]
+    save = modules["compositing_save"]
+
+    phases = {}
+    counts = {}
+    phase = _PhaseRecorder(phases, is_trace_memory)
+
+    source_scene, import_scene = _create_scenes(bpy, is_standin)
+    try:
+        with phase("build"):
+            synthetic.build_scene(
+                bpy,
+                source_scene,
+                size,
+                view_layer_count=args.view_layers,
+                aov_count=args.aovs,
+                lineset_count=args.linesets,
+            )
+
+        with phase("export"):
+            data = save.get_compositing_option(source_scene)
+        with phase("serialize"):
+            text = json.dumps(data)
+        with phase("parse"):
+            json_data = json.loads(text)
+        with phase("export_compact"):
+            compact_text = json.dumps(save.get_compositing_option(source_scene, is_compact=True))
+
+        counts["nodes"] = len(json_data["nodes"])
+        counts["links"] = len(json_data["links"])
+        counts["view_layers"] = len(json_data["render_layers"]["render_layer_props"])
+        counts["json_bytes"] = len(text.encode("utf-8"))
+        counts["compact_json_bytes"] = len(compact_text.encode("utf-8"))
+
+        # 同じファイル内の別シーンに読み込むのでNodeGroup, LineStyleのアペンドは不要
+        with _use_scene(bpy, is_standin, import_scene):
+            with phase("view_layers"):
+                load.remove_view_layer(json_data)
+                load.create_view_layer(json_data)
+            with phase("render_layers"):
+                load.set_render_layer(json_data)
+            # 読み込み内部の処理毎の時間はアドオン側の記録から取得
+            load_profile = profile.start_profile()
+            try:
+                with phase("import"):
+                    load.import_compositing(json_data, True)
+            finally:
+                profile.stop_profile()
+            for name, seconds in load_profile.phases.items():
+                phases[f"import.{name}"] = {"seconds": seconds}
+            # 同じ設定での差分反映は全て変更なしになる
+            with phase("reconcile"):
+                load.reconcile_compositing(json_data)
+    finally:
+        _remove_scenes(bpy, is_standin, source_scene, import_scene)
+
+    return phases, counts
+
+def _create_scenes(bpy, is_standin):
+    """ 生成用、読み込み用のシーンを作成
+
+    Returns:
+        (bpy.types.Scene, bpy.types.Scene): (生成用, 読み込み用)
+    """
+    if is_standin:
+        import bpy_standin
+        bpy_standin.reset()
+        return bpy.context.scene, bpy.data.scenes.new(IMPORT_SCENE_NAME)
+
+    return bpy.data.scenes.new(SOURCE_SCENE_NAME), bpy.data.scenes.new(IMPORT_SCENE_NAME)
+
+def _remove_scenes(bpy, is_standin, *scenes):
+    """ 計測で作成したシーンを削除
+    """
+    if is_standin:
+        return
+
+    for scene in scenes:
+        bpy.data.scenes.remove(scene)
+
+@contextlib.contextmanager
+def _use_scene(bpy, is_standin, scene):
+    """ bpy.context.sceneを一時的に切り替え
+    """
+    if is_standin:
+        old_scene = bpy.context.scene
+        bpy.context.scene = scene
+        try:
+            yield
+        finally:
+            bpy.context.scene = old_scene
+    else:
+        with bpy.context.temp_override(scene=scene):
+            yield
+
+# -- Setup --
+
+def _setup_bpy(is_force_standin):
+    """ bpyを準備
+        ※Blenderから実行されていなければ代用のbpyを使う
+
+    Returns:
+        (module, bool): (bpy, 代用のbpyか？)
+    """
+    if not is_force_standin:
+        try:
+            import bpy
+            return bpy, False
+        except ImportError:
+            pass
+
+    import bpy_standin
+    return bpy_standin.install(), True
+
+def _import_addon(bpy):
+    """ アドオンを読み込んで登録
+
+    Returns:
+        dict: アドオンのモジュール
+    """
+    sys.path.insert(0, os.path.dirname(ADDON_DIR))
+    package = importlib.import_module(os.path.basename(ADDON_DIR))
+    # Blenderでアドオンを有効にしている場合は登録済み
+    if not hasattr(bpy.types.Scene, "compositing_io"):
+        package.register_package()
+
+    return {
+        name: importlib.import_module(f"{package.__name__}.{name}")
+        for name in ("compositing_load", "compositing_profile", "compositing_save")
+    }
+
+def _get_environment(bpy, is_standin):
+    return {
+        "bpy": "standin" if is_standin else bpy.app.version_string,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+# -- Helper --
+
+def _calc_slope(points):
+    """ 最小二乗法で傾きを計算
+
+    Args:
+        points ((float, float)[]): (x, y)のリスト
+
+    Returns:
+        float: 傾き
+    """
+    n = len(points)
+    mean_x = sum(p[0] for p in points) / n
+    mean_y = sum(p[1] for p in points) / n
+    var_x = sum((p[0] - mean_x) ** 2 for p in points)
+    if var_x == 0:
+        return 0.0
+
+    return sum((p[0] - mean_x) * (p[1] - mean_y) for p in points) / var_x
+
+def _parse_sizes(text):
+    return [int(s) for s in text.split(",") if s.strip()]
+
+def _parse_args(argv):
+    # blender -b -P から実行した場合は「--」以降が引数
+    if argv == None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+
+    parser = argparse.ArgumentParser(description="Benchmark exporting and importing Compositing settings.")
+    parser.add_argument("--sizes", type=_parse_sizes, default=list(DEFAULT_SIZES), help="comma separated node counts")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per size (the fastest is reported)")
+    parser.add_argument("--view-layers", type=int, default=4, help="number of view layers")
+    parser.add_argument("--aovs", type=int, default=4, help="AOVs per view layer")
+    parser.add_argument("--linesets", type=int, default=2, help="linesets per view layer")
+    parser.add_argument("--memory", action="store_true", help="also measure the peak memory of every phase")
+    parser.add_argument("--standin", action="store_true", help="use the bpy stand-in even if bpy can be imported")
+    parser.add_argument("-o", "--output", default=None, help="write the results as JSON")
+    parser.add_argument("--baseline", default=None, help="results JSON to compare the scaling with")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed increase of the scaling exponent")
+
+    return parser.parse_args(argv)
+
+def _print_run(run):
+    counts = run["counts"]
+    print(
+        f'Nodes : {counts["nodes"]}, Links : {counts["links"]}, '
+        f'JSON : {counts["json_bytes"]} bytes (compact {counts["compact_json_bytes"]} bytes)'
+    )
+    for name, seconds in run["seconds"].items():
+        line = f"  {name:<24}{seconds * 1000:>12.2f} ms"
+        if name in run.get("peak_bytes", {}):
+            line += f'{run["peak_bytes"][name] / 1024:>12.1f} KB'
+        print(line)
+
+def _print_scaling(scaling):
+    if len(scaling) == 0:
+        return
+
+    print("Scaling (1 = linear, 2 = quadratic)")
+    for name, exponent in scaling.items():
+        print(f"  {name:<24}{exponent:>8.2f}")
+
+# ----------------------------------------------------------------------------------------------------
+# Class
+# ----------------------------------------------------------------------------------------------------
+
+class _PhaseRecorder:
+    """ 処理毎の時間、メモリの計測
+    """
+    def __init__(self, phases, is_trace_memory):
+        self._phases = phases
+        self._is_trace_memory = is_trace_memory
+
+    @contextlib.contextmanager
+    def __call__(self, name):
+        if self._is_trace_memory:
+            tracemalloc.start()
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            result = {"seconds": time.perf_counter() - start_time}
+            if self._is_trace_memory:
+                result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            self._phases[name] = result
+
+if __name__ == "__main__":
+    # blender -b -P から実行した場合は終了コードを返すために明示的に終了する
+    sys.exit(main())
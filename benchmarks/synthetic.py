@@ -0,0 +1,150 @@
+# ----------------------------------------------------------------------------------------------------
+# ベンチマーク用のCompositingノードツリーの生成
+# bpyのAPIだけで生成するので、代用のbpyとblender -bのどちらでも同じ構成になる
+# ----------------------------------------------------------------------------------------------------
+
+import random
+
+# ----------------------------------------------------------------------------------------------------
+# 定数
+# ----------------------------------------------------------------------------------------------------
+
+# 大部分のノードの種類 (Blenderと代用のbpyの両方にあるもの)
+CHAIN_NODE_TYPES = (
+    "CompositorNodeBlur",
+    "CompositorNodeMixRGB",
+    "CompositorNodeMath",
+    "CompositorNodeTransform",
+    "CompositorNodeDilateErode",
+    "CompositorNodeSwitch",
+)
+CHAIN_LENGTH = 8
+
+# ----------------------------------------------------------------------------------------------------
+# Public Functions
+# ----------------------------------------------------------------------------------------------------
+
+def build_scene(bpy, scene, node_count, view_layer_count=4, aov_count=4, lineset_count=2, seed=0):
+    """ 指定したノード数程度のCompositingノードツリーを生成
+        ※RenderLayers -> 途中にRerouteを挟んだ処理ノード -> FileOutputの列を繰り返す
+          各列はFrameに入れ、4列に1つはNodeGroupを通す
+
+    Args:
+        bpy (module): bpy (代用のbpyも可)
+        scene (bpy.types.Scene): 対象シーン
+        node_count (int): ノード数
+        view_layer_count (int): ViewLayerの数
+        aov_count (int): ViewLayer毎のAOVの数
+        lineset_count (int): ViewLayer毎のLineSetの数 (0はFreestyleを使わない)
+        seed (int): 乱数のシード
+
+    Returns:
+        bpy.types.NodeTree: 生成したノードツリー
+    """
+    rng = random.Random(seed)
+
+    scene.use_nodes = True
+    scene.render.use_freestyle = lineset_count > 0
+    tree = scene.node_tree
+    tree.nodes.clear()
+
+    view_layers = _build_view_layers(bpy, scene, view_layer_count, aov_count, lineset_count)
+    group = _build_node_group(bpy)
+
+    chain = 0
+    while len(tree.nodes) < node_count:
+        _build_chain(tree, chain, view_layers[chain % len(view_layers)], group if chain % 4 == 3 else None, rng)
+        chain += 1
+
+    composite = tree.nodes.new("CompositorNodeComposite")
+    composite.location = (chain * 200.0 + 400.0, 0.0)
+
+    return tree
+
+# ----------------------------------------------------------------------------------------------------
+# Private Functions
+# ----------------------------------------------------------------------------------------------------
+
+def _build_view_layers(bpy, scene, count, aov_count, lineset_count):
+    """ AOV, LineSetを設定したViewLayerを生成
+
+    Returns:
+        bpy.types.ViewLayer[]: ViewLayerのリスト
+    """
+    layers = [scene.view_layers[0]]
+    while len(layers) < count:
+        layers.append(scene.view_layers.new(f"Layer_{len(layers):03d}"))
+
+    for i, layer in enumerate(layers):
+        layer.use_pass_mist = bool(i % 2)
+        layer.use_pass_normal = True
+        for a in range(aov_count):
+            aov = layer.aovs.add()
+            aov.name = f"aov_{a:02d}"
+            aov.type = "VALUE" if a % 2 else "COLOR"
+        if lineset_count > 0:
+            settings = layer.freestyle_settings
+            settings.as_render_pass = True
+            for l in range(lineset_count):
+                lineset = settings.linesets.new(f"LineSet_{l:02d}")
+                lineset.select_by_visibility = bool(l % 2)
+
+    return layers
+
+def _build_node_group(bpy):
+    """ 列から参照するNodeGroupを取得 (なければ生成)
+
+    Returns:
+        bpy.types.NodeTree: NodeGroup
+    """
+    group = bpy.data.node_groups.get("BenchGroup")
+    if group == None:
+        group = bpy.data.node_groups.new("BenchGroup", "CompositorNodeTree")
+    return group
+
+def _build_chain(tree, index, view_layer, group, rng):
+    """ RenderLayersからFileOutputまでの1列を生成
+    """
+    base_x = index * 200.0
+    base_y = -(index % 50) * 600.0
+
+    frame = tree.nodes.new("NodeFrame")
+    frame.label = f"Chain {index}"
+
+    render_layers = tree.nodes.new("CompositorNodeRLayers")
+    render_layers.layer = view_layer.name
+    render_layers.location = (base_x, base_y)
+    render_layers.parent = frame
+
+    previous = render_layers.outputs[0]
+    for i in range(CHAIN_LENGTH):
+        if i == CHAIN_LENGTH // 2:
+            node = tree.nodes.new("NodeReroute")
+        elif i == CHAIN_LENGTH // 2 + 1 and group != None:
+            node = tree.nodes.new("CompositorNodeGroup")
+            node.node_tree = group
+        else:
+            node = tree.nodes.new(rng.choice(CHAIN_NODE_TYPES))
+            _randomise_inputs(node, rng)
+        node.location = (base_x + (i + 1) * 180.0, base_y - rng.random() * 80.0)
+        node.parent = frame
+        tree.links.new(previous, node.inputs[0])
+        previous = node.outputs[0]
+
+    output = tree.nodes.new("CompositorNodeOutputFile")
+    output.location = (base_x + (CHAIN_LENGTH + 1) * 180.0, base_y)
+    output.parent = frame
+    output.file_slots.new("Extra")
+    tree.links.new(previous, output.inputs[0])
+    tree.links.new(render_layers.outputs[1], output.inputs[1])
+
+def _randomise_inputs(node, rng):
+    """ inputsのデフォルト値をランダムに設定
+    """
+    for socket in node.inputs:
+        if not hasattr(socket, "default_value"):
+            continue
+        if socket.type == "VALUE":
+            socket.default_value = rng.random()
+        elif socket.type == "RGBA":
+            socket.default_value = (rng.random(), rng.random(), rng.random(), 1.0)
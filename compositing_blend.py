@@ -0,0 +1,608 @@
+import gzip
+import mmap
+import os
+import re
+import struct
+
+# zstdで圧縮されたファイル用 (Blender 3.0以降の圧縮形式)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# ----------------------------------------------------------------------------------------------------
+# 定数
+# ----------------------------------------------------------------------------------------------------
+
+BLEND_MAGIC = b"BLENDER"
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# 旧形式のヘッダー : BLENDER + ポインタサイズ(_ or -) + エンディアン(v or V) + バージョン3桁
+LEGACY_HEADER_SIZE = 12
+# 新形式のヘッダー : BLENDER + ヘッダーサイズ2桁 + ポインタサイズ + 形式バージョン2桁 + エンディアン + バージョン4桁
+HEADER_SIZE_DIGITS = 2
+BLOCK_CODE_GLOBAL = b"GLOB"
+BLOCK_CODE_DNA = b"DNA1"
+BLOCK_CODE_END = b"ENDB"
+ID_CODE_SCENE = "SC"
+ID_CODE_NODE_TREE = "NT"
+ID_CODE_LINESTYLE = "LS"
+COMPOSITING_NODE_TREE_IDNAME = "CompositorNodeTree"
+# idnameがない古いファイル用のbNodeTree.type
+NTREE_COMPOSIT = 1
+# ファイル毎の読み込み結果を残す数
+INFO_CACHE_SIZE = 32
+SDNA_FIELD_NAME_PATTERN = re.compile(r"[\*\(]*(\w+)")
+SDNA_ARRAY_PATTERN = re.compile(r"\[(\d+)\]")
+
+# ----------------------------------------------------------------------------------------------------
+# Class
+# ----------------------------------------------------------------------------------------------------
+
+class BlendInfo:
+    """ Blenderを起動せずにファイルから読み取った情報
+        ※リンクしたデータブロックは含まない
+    """
+    def __init__(self, path, version, pointer_size, is_little_endian):
+        self.path = path
+        self.version = version
+        self.pointer_size = pointer_size
+        self.is_little_endian = is_little_endian
+        # IDコード("SC"など) -> データブロック名のリスト
+        self.ids = {}
+        # Scene名 -> Compositingのノードツリーがあるか？ (判定出来ない場合はNone)
+        self.scene_node_trees = {}
+        self.compositing_node_groups = []
+        self.active_scene = None
+
+    @property
+    def scenes(self):
+        """ Scene名のリスト
+        """
+        return self.get_names(ID_CODE_SCENE)
+
+    @property
+    def node_groups(self):
+        """ Compositing用のNodeGroups名のリスト
+        """
+        return list(self.compositing_node_groups)
+
+    @property
+    def linestyles(self):
+        """ LineStyle名のリスト
+        """
+        return self.get_names(ID_CODE_LINESTYLE)
+
+    def get_names(self, code):
+        """ データブロック名を取得
+
+        Args:
+            code (str): IDコード("SC", "NT"など)
+
+        Returns:
+            str[]: データブロック名のリスト
+        """
+        return list(self.ids.get(code, []))
+
+    def has_compositing(self, scene_name=None):
+        """ SceneにCompositingのノードツリーがあるか？
+
+        Args:
+            scene_name (str): Scene名 (Noneは保存時のアクティブなScene)
+
+        Returns:
+            bool: True = Yes, False = No, None = 判定出来ない
+        """
+        if scene_name == None:
+            scene_name = self.active_scene
+        if scene_name == None:
+            return None
+        return self.scene_node_trees.get(scene_name)
+
+class _SDNA:
+    """ ファイルに保存された構造体の定義
+        ※構造体のメンバーのオフセットはバージョン毎に変わるので、ファイルの定義から計算する
+    """
+    def __init__(self, names, types, type_lengths, structs, pointer_size):
+        self._names = names
+        self._types = types
+        self._type_lengths = type_lengths
+        # 構造体のインデックス -> (型のインデックス, [(型のインデックス, 名前のインデックス)])
+        self._structs = structs
+        self._struct_indexes = {types[type_index]: i for i, (type_index, _) in enumerate(structs)}
+        self._pointer_size = pointer_size
+        self._fields = {}
+
+    def get_struct_name(self, struct_index):
+        """ 構造体名を取得
+
+        Args:
+            struct_index (int): 構造体のインデックス
+
+        Returns:
+            str: 構造体名 (範囲外の場合はNone)
+        """
+        if struct_index < 0 or struct_index >= len(self._structs):
+            return None
+        return self._types[self._structs[struct_index][0]]
+
+    def get_field(self, struct_name, field_name):
+        """ 構造体のメンバーを取得
+
+        Args:
+            struct_name (str): 構造体名
+            field_name (str): メンバー名 (「*」や配列の要素数は除く)
+
+        Returns:
+            (int, int, bool): (オフセット, サイズ, ポインタか？) (ない場合はNone)
+        """
+        fields = self._fields.get(struct_name)
+        if fields == None:
+            fields = self._calc_fields(struct_name)
+            self._fields[struct_name] = fields
+        return fields.get(field_name)
+
+    def _calc_fields(self, struct_name):
+        """ 構造体のメンバーのオフセットを計算
+
+        Args:
+            struct_name (str): 構造体名
+
+        Returns:
+            dict: メンバー名 -> (オフセット, サイズ, ポインタか？)
+        """
+        fields = {}
+        struct_index = self._struct_indexes.get(struct_name)
+        if struct_index == None:
+            return fields
+
+        offset = 0
+        for type_index, name_index in self._structs[struct_index][1]:
+            raw_name = self._names[name_index]
+            is_pointer = raw_name.startswith("*") or raw_name.startswith("(*")
+            count = 1
+            # 関数ポインタの「()」は配列ではない
+            if not raw_name.startswith("(*"):
+                for size in SDNA_ARRAY_PATTERN.findall(raw_name):
+                    count *= int(size)
+            size = (self._pointer_size if is_pointer else self._type_lengths[type_index]) * count
+
+            match = SDNA_FIELD_NAME_PATTERN.match(raw_name)
+            if match != None and match.group(1) not in fields:
+                fields[match.group(1)] = (offset, size, is_pointer)
+            offset += size
+
+        return fields
+
+# ----------------------------------------------------------------------------------------------------
+# Public Functions
+# ----------------------------------------------------------------------------------------------------
+
+_info_cache = {}
+
+# -- Get --
+
+def get_blend_info(path):
+    """ Blenderファイルの情報を取得
+        ※ファイルが変わっていなければ前回の結果を返すので、UIの描画からも呼び出せる
+
+    Args:
+        path (str): Blenderファイルのパス
+
+    Returns:
+        BlendInfo: ファイルの情報 (Blenderファイルとして読めない場合はNone)
+    """
+    abs_path = os.path.normcase(os.path.abspath(path))
+    try:
+        stat = os.stat(abs_path)
+    except OSError:
+        return None
+
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _info_cache.get(abs_path)
+    if cached != None and cached[0] == stamp:
+        return cached[1]
+
+    info = read_blend_info(path)
+
+    # 古いものから破棄
+    if len(_info_cache) >= INFO_CACHE_SIZE:
+        del _info_cache[next(iter(_info_cache))]
+    _info_cache[abs_path] = (stamp, info)
+
+    return info
+
+def read_blend_info(path):
+    """ Blenderファイルのブロックを走査して情報を読み取る
+        ※Blenderを起動しないのでミリ秒程度で読み取れる
+
+    Args:
+        path (str): Blenderファイルのパス
+
+    Returns:
+        BlendInfo: ファイルの情報 (Blenderファイルとして読めない場合はNone)
+    """
+    try:
+        with open(path, "rb") as f:
+            data = _open_blend_data(f)
+            try:
+                return _scan_blend_data(path, data)
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+    except (OSError, ValueError, struct.error) as e:
+        print(f"Can't read blend file {path} : {e}")
+        return None
+
+def is_blend_file(path):
+    """ Blenderファイルか？
+        ※先頭だけ確認するので中身が壊れていてもTrueになることがある
+
+    Args:
+        path (str): ファイルのパス
+
+    Returns:
+        bool: True = Yes, False = No
+    """
+    try:
+        with open(path, "rb") as f:
+            magic = f.read(len(BLEND_MAGIC))
+    except OSError:
+        return False
+
+    return magic == BLEND_MAGIC or magic.startswith(GZIP_MAGIC) or magic.startswith(ZSTD_MAGIC)
+
+# ----------------------------------------------------------------------------------------------------
+# Private Functions
+# ----------------------------------------------------------------------------------------------------
+
+# -- Read --
+
+def _open_blend_data(f):
+    """ ファイルの中身を取得
+        ※非圧縮のファイルはメモリマップで必要な所だけ読む
+
+    Args:
+        f (file): Blenderファイル
+
+    Returns:
+        bytes or mmap.mmap: ファイルの中身
+    """
+    magic = f.read(len(BLEND_MAGIC))
+    f.seek(0)
+    if magic.startswith(GZIP_MAGIC):
+        with gzip.GzipFile(fileobj=f) as gz:
+            return gz.read()
+    if magic.startswith(ZSTD_MAGIC):
+        return _decompress_zstd(f)
+    if magic != BLEND_MAGIC:
+        raise ValueError("not a blend file")
+
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _decompress_zstd(f):
+    """ zstdで圧縮されたファイルを展開
+        ※Blenderはフレームを分けて圧縮しているので全てのフレームを読む
+
+    Args:
+        f (file): Blenderファイル
+
+    Returns:
+        bytes: 展開した中身
+    """
+    if zstandard == None:
+        raise ValueError("zstd compressed file needs the zstandard module")
+
+    chunks = []
+    reader = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+    while True:
+        chunk = reader.read(1024 * 1024)
+        if not chunk:
+            break
+        chunks.append(chunk)
+
+    return b"".join(chunks)
+
+def _scan_blend_data(path, data):
+    """ ブロックを走査して情報を読み取る
+
+    Args:
+        path (str): Blenderファイルのパス
+        data (bytes or mmap.mmap): ファイルの中身
+
+    Returns:
+        BlendInfo: ファイルの情報
+    """
+    header_size, pointer_size, endian, version, bhead, is_large_bhead = _read_file_header(data)
+    info = BlendInfo(path, version, pointer_size, endian == "<")
+    pointer_format = endian + ("Q" if pointer_size == 8 else "I")
+
+    # DNA1は最後の方にあるので、先にブロックの位置だけ集める
+    id_blocks = []
+    global_block = None
+    sdna = None
+    offset = header_size
+    size = len(data)
+    while offset + bhead.size <= size:
+        code, length, old, sdna_index = _unpack_bhead(bhead, is_large_bhead, data, offset)
+        data_offset = offset + bhead.size
+        if code == BLOCK_CODE_END:
+            break
+        if code == BLOCK_CODE_DNA:
+            sdna = _read_sdna(data, data_offset, endian, pointer_size)
+        elif code == BLOCK_CODE_GLOBAL:
+            global_block = (data_offset, sdna_index)
+        else:
+            id_code = _get_id_code(code, endian)
+            if id_code != None:
+                id_blocks.append((id_code, data_offset, old, sdna_index))
+        offset = data_offset + length
+
+    if sdna == None:
+        raise ValueError("SDNA block is not found")
+
+    name_field = sdna.get_field("ID", "name")
+    if name_field == None:
+        raise ValueError("ID.name is not found")
+
+    scene_pointers = {}
+    for code, data_offset, old, sdna_index in id_blocks:
+        name = _read_string(data, data_offset + name_field[0], name_field[1])[2:]
+        info.ids.setdefault(code, []).append(name)
+
+        struct_name = sdna.get_struct_name(sdna_index)
+        if code == ID_CODE_SCENE:
+            scene_pointers[old] = name
+            info.scene_node_trees[name] = _has_scene_node_tree(sdna, data, data_offset, pointer_format)
+        elif code == ID_CODE_NODE_TREE and struct_name == "bNodeTree":
+            if _is_compositing_node_tree(sdna, data, data_offset, endian):
+                info.compositing_node_groups.append(name)
+
+    # 保存時のアクティブなScene
+    if global_block != None:
+        field = sdna.get_field("FileGlobal", "curscene")
+        if field != None:
+            curscene = struct.unpack_from(pointer_format, data, global_block[0] + field[0])[0]
+            info.active_scene = scene_pointers.get(curscene)
+
+    return info
+
+def _read_file_header(data):
+    """ ファイルヘッダーを読む
+
+    Args:
+        data (bytes or mmap.mmap): ファイルの中身
+
+    Returns:
+        (int, int, str, int, struct.Struct, bool): (ヘッダーのサイズ, ポインタサイズ, エンディアン, バージョン, ブロックヘッダーの形式, 新形式のブロックヘッダーか？)
+    """
+    if data[:len(BLEND_MAGIC)] != BLEND_MAGIC:
+        raise ValueError("not a blend file")
+
+    pos = len(BLEND_MAGIC)
+    header_size_text = bytes(data[pos:pos + HEADER_SIZE_DIGITS])
+    if header_size_text.isdigit():
+        # 新形式 (例 : BLENDER17-01v0500)
+        header_size = int(header_size_text)
+        header = bytes(data[:header_size])
+        pointer_char = header[pos + 2:pos + 3]
+        format_version = int(header[pos + 3:pos + 5])
+        endian_char = header[pos + 5:pos + 6]
+        version = int(header[pos + 6:header_size])
+        if format_version != 1:
+            raise ValueError(f"unknown file format version {format_version}")
+    else:
+        # 旧形式 (例 : BLENDER-v300)
+        header_size = LEGACY_HEADER_SIZE
+        header = bytes(data[:header_size])
+        pointer_char = header[pos:pos + 1]
+        endian_char = header[pos + 1:pos + 2]
+        version = int(header[pos + 2:header_size])
+        format_version = 0
+
+    pointer_size = 8 if pointer_char == b"-" else 4
+    endian = "<" if endian_char == b"v" else ">"
+    is_large_bhead = format_version == 1
+    if is_large_bhead:
+        # code, SDNAnr, old, len, nr
+        bhead = struct.Struct(endian + "4siQqq")
+    else:
+        # code, len, old, SDNAnr, nr
+        bhead = struct.Struct(endian + "4si" + ("Q" if pointer_size == 8 else "I") + "ii")
+
+    return header_size, pointer_size, endian, version, bhead, is_large_bhead
+
+def _unpack_bhead(bhead, is_large_bhead, data, offset):
+    """ ブロックヘッダーを読む
+
+    Args:
+        bhead (struct.Struct): ブロックヘッダーの形式
+        is_large_bhead (bool): 新形式のブロックヘッダーか？
+        data (bytes or mmap.mmap): ファイルの中身
+        offset (int): ブロックヘッダーの位置
+
+    Returns:
+        (bytes, int, int, int): (コード, データのサイズ, 保存時のアドレス, 構造体のインデックス)
+    """
+    values = bhead.unpack_from(data, offset)
+    # 新形式は並び順が異なる (len, oldが64bit)
+    if is_large_bhead:
+        code, sdna_index, old, length, _ = values
+    else:
+        code, length, old, sdna_index, _ = values
+    if length < 0:
+        raise ValueError(f"invalid block length at {offset}")
+
+    return code, length, old, sdna_index
+
+def _get_id_code(code, endian):
+    """ ブロックのコードからIDのコードを取得
+        ※2文字のコードがIDのデータブロックで、intとして書き出すのでビッグエンディアンでは後ろの2バイトになる
+          (4文字のコードは文字の順番のまま)
+
+    Args:
+        code (bytes): ブロックのコード
+        endian (str): エンディアン
+
+    Returns:
+        str: IDのコード ("SC"など。IDのデータブロックでない場合はNone)
+    """
+    if endian == "<":
+        padding, id_code = code[2:], code[:2]
+    else:
+        padding, id_code = code[:2], code[2:]
+    if padding != b"\0\0" or not id_code.isalpha() or not id_code.isupper():
+        return None
+
+    return id_code.decode("ascii")
+
+def _read_sdna(data, offset, endian, pointer_size):
+    """ 構造体の定義(DNA1)を読む
+
+    Args:
+        data (bytes or mmap.mmap): ファイルの中身
+        offset (int): DNA1のデータの位置
+        endian (str): エンディアン
+        pointer_size (int): ポインタサイズ
+
+    Returns:
+        _SDNA: 構造体の定義
+    """
+    pos = offset
+    if data[pos:pos + 4] != b"SDNA":
+        raise ValueError("invalid SDNA block")
+    pos += 4
+
+    pos = _expect_chunk(data, pos, b"NAME")
+    names, pos = _read_strings(data, pos, endian)
+    pos = _expect_chunk(data, _align4(offset, pos), b"TYPE")
+    types, pos = _read_strings(data, pos, endian)
+    pos = _expect_chunk(data, _align4(offset, pos), b"TLEN")
+    type_lengths = struct.unpack_from(f"{endian}{len(types)}h", data, pos)
+    pos += 2 * len(types)
+    pos = _expect_chunk(data, _align4(offset, pos), b"STRC")
+    struct_count = struct.unpack_from(endian + "i", data, pos)[0]
+    pos += 4
+
+    structs = []
+    for _ in range(struct_count):
+        type_index, field_count = struct.unpack_from(endian + "hh", data, pos)
+        pos += 4
+        values = struct.unpack_from(f"{endian}{field_count * 2}h", data, pos)
+        pos += 4 * field_count
+        structs.append((type_index, list(zip(values[0::2], values[1::2]))))
+
+    return _SDNA(names, types, type_lengths, structs, pointer_size)
+
+def _expect_chunk(data, pos, chunk):
+    """ SDNAの見出しを確認
+
+    Args:
+        data (bytes or mmap.mmap): ファイルの中身
+        pos (int): 見出しの位置
+        chunk (bytes): 見出し
+
+    Returns:
+        int: 見出しの次の位置
+    """
+    if data[pos:pos + 4] != chunk:
+        raise ValueError(f"{chunk.decode('ascii')} is not found in SDNA")
+    return pos + 4
+
+def _read_strings(data, pos, endian):
+    """ 件数の後にNULL終端の文字列が並んだものを読む
+
+    Args:
+        data (bytes or mmap.mmap): ファイルの中身
+        pos (int): 件数の位置
+        endian (str): エンディアン
+
+    Returns:
+        (str[], int): (文字列のリスト, 次の位置)
+    """
+    count = struct.unpack_from(endian + "i", data, pos)[0]
+    pos += 4
+    strings = []
+    for _ in range(count):
+        end = data.find(b"\0", pos)
+        if end < 0:
+            raise ValueError("unterminated string in SDNA")
+        strings.append(bytes(data[pos:end]).decode("utf-8", "replace"))
+        pos = end + 1
+
+    return strings, pos
+
+def _align4(base, pos):
+    """ SDNAの先頭からの位置を4バイト境界に揃える
+
+    Args:
+        base (int): SDNAの先頭の位置
+        pos (int): 位置
+
+    Returns:
+        int: 揃えた位置
+    """
+    return base + ((pos - base + 3) & ~3)
+
+def _read_string(data, pos, size):
+    """ NULL終端の文字列を読む
+
+    Args:
+        data (bytes or mmap.mmap): ファイルの中身
+        pos (int): 位置
+        size (int): 最大サイズ
+
+    Returns:
+        str: 文字列
+    """
+    raw = bytes(data[pos:pos + size])
+    end = raw.find(b"\0")
+    if end >= 0:
+        raw = raw[:end]
+    return raw.decode("utf-8", "replace")
+
+def _has_scene_node_tree(sdna, data, offset, pointer_format):
+    """ SceneにCompositingのノードツリーがあるか？
+
+    Args:
+        sdna (_SDNA): 構造体の定義
+        data (bytes or mmap.mmap): ファイルの中身
+        offset (int): Sceneのデータの位置
+        pointer_format (str): ポインタの形式
+
+    Returns:
+        bool: True = Yes, False = No, None = 判定出来ない
+    """
+    # 5.0で「nodetree」から「compositing_node_group」に変わった
+    for field_name in ("nodetree", "compositing_node_group"):
+        field = sdna.get_field("Scene", field_name)
+        if field == None or not field[2]:
+            continue
+        if struct.unpack_from(pointer_format, data, offset + field[0])[0] != 0:
+            return True
+        return False
+
+    return None
+
+def _is_compositing_node_tree(sdna, data, offset, endian):
+    """ Compositing用のノードツリーか？
+
+    Args:
+        sdna (_SDNA): 構造体の定義
+        data (bytes or mmap.mmap): ファイルの中身
+        offset (int): bNodeTreeのデータの位置
+        endian (str): エンディアン
+
+    Returns:
+        bool: True = Yes, False = No
+    """
+    field = sdna.get_field("bNodeTree", "idname")
+    if field != None:
+        return _read_string(data, offset + field[0], field[1]) == COMPOSITING_NODE_TREE_IDNAME
+
+    # idnameがない古いファイル
+    field = sdna.get_field("bNodeTree", "type")
+    if field != None and field[1] == 4:
+        return struct.unpack_from(endian + "i", data, offset + field[0])[0] == NTREE_COMPOSIT
+
+    return False
@@ -0,0 +1,235 @@
+import bpy
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from . import compositing_io_util as comp_util
+from . import compositing_save
+
+# ----------------------------------------------------------------------------------------------------
+# 定数
+# ----------------------------------------------------------------------------------------------------
+
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "compositing_io_cache")
+# セクション毎に読み込める形式で保存するので.jsonではない
+CACHE_EXT = ".cio"
+DEFAULT_CACHE_SIZE_LIMIT = 256
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# ----------------------------------------------------------------------------------------------------
+# Public Functions
+# ----------------------------------------------------------------------------------------------------
+
+# -- Get --
+
+def get_cache_key(load_path, use_content_hash=False):
+    """ キャッシュのキーを取得
+        ※元ファイルのパス、サイズ、更新日時(または内容のハッシュ)、Blenderのバージョン、
+          出力データのバージョンから作成
+
+    Args:
+        load_path (str): 読み込みパス
+        use_content_hash (bool): 更新日時の代わりに内容のハッシュを使うか？
+
+    Returns:
+        str: キャッシュのキー (元ファイルがない場合はNone)
+    """
+    try:
+        stat = os.stat(load_path)
+        items = [
+            os.path.normcase(os.path.abspath(load_path)),
+            str(stat.st_size),
+            _get_file_hash(load_path) if use_content_hash else str(stat.st_mtime_ns),
+            bpy.app.version_string,
+            str(compositing_save.COMPOSITING_OPTION_VERSION),
+        ]
+    except OSError as e:
+        print(f"Can't get cache key of {load_path} : {e}")
+        return None
+
+    return hashlib.sha1("\n".join(items).encode("utf-8")).hexdigest()
+
+def load_cache(key, sections=None):
+    """ キャッシュからCompositing設定を取得
+
+    Args:
+        key (str): キャッシュのキー
+        sections (str[]): 読み込むセクション (Noneは全て)
+
+    Returns:
+        Dictionary: Compositing設定 (キャッシュがない場合はNone)
+    """
+    cache_path = _get_cache_path(key)
+    if not os.path.isfile(cache_path):
+        return None
+
+    try:
+        json_data = comp_util.read_compositing_option(cache_path, sections)
+        # 最近使ったものを残すので使用日時として更新日時を更新
+        os.utime(cache_path, None)
+    except (OSError, ValueError) as e:
+        print(f"Can't load cache {cache_path} : {e}")
+        _remove_file(cache_path)
+        return None
+
+    return json_data
+
+def has_cache(key):
+    """ キャッシュがあるか？ (中身は読み込まない)
+
+    Args:
+        key (str): キャッシュのキー
+
+    Returns:
+        bool: True = Yes, False = No
+    """
+    return os.path.isfile(_get_cache_path(key))
+
+# -- Set --
+
+def save_cache(key, json_data, size_limit=DEFAULT_CACHE_SIZE_LIMIT):
+    """ Compositing設定をキャッシュに保存
+        ※必要なセクションだけ読み込めるようにセクション毎に読み込める形式で保存
+
+    Args:
+        key (str): キャッシュのキー
+        json_data (Dictionary): Compositing設定
+        size_limit (int): キャッシュ全体の上限サイズ(MB)
+    """
+    cache_path = _get_cache_path(key)
+    temp_path = _get_temp_path(cache_path)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # 他のBlenderが読み込み中でも壊れないように一時ファイルから置き換える
+        comp_util.write_compositing_option(temp_path, json_data, is_indexed=True)
+        os.replace(temp_path, cache_path)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Can't save cache {cache_path} : {e}")
+        _remove_file(temp_path)
+        return
+
+    evict_cache(size_limit)
+
+def save_cache_file(key, path, size_limit=DEFAULT_CACHE_SIZE_LIMIT):
+    """ 出力したCompositing設定のファイルをそのままキャッシュに保存
+
+    Args:
+        key (str): キャッシュのキー
+        path (str): 出力したファイルのパス
+        size_limit (int): キャッシュ全体の上限サイズ(MB)
+    """
+    cache_path = _get_cache_path(key)
+    temp_path = _get_temp_path(cache_path)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        shutil.copyfile(path, temp_path)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        print(f"Can't save cache {cache_path} : {e}")
+        _remove_file(temp_path)
+        return
+
+    evict_cache(size_limit)
+
+def evict_cache(size_limit=DEFAULT_CACHE_SIZE_LIMIT):
+    """ 上限サイズを超えた分のキャッシュを使用日時の古い順に削除
+
+    Args:
+        size_limit (int): キャッシュ全体の上限サイズ(MB)
+    """
+    entries = []
+    for path in _get_cache_paths():
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total_size = sum(e[1] for e in entries)
+    limit_size = size_limit * 1024 * 1024
+    for _, size, path in sorted(entries):
+        if total_size <= limit_size:
+            break
+        if _remove_file(path):
+            total_size -= size
+
+def clear_cache():
+    """ キャッシュを全て削除
+    """
+    for path in _get_cache_paths():
+        _remove_file(path)
+
+# ----------------------------------------------------------------------------------------------------
+# Private Functions
+# ----------------------------------------------------------------------------------------------------
+
+# -- Get --
+
+def _get_cache_path(key):
+    """ キャッシュファイルのパスを取得
+
+    Args:
+        key (str): キャッシュのキー
+
+    Returns:
+        str: キャッシュファイルのパス
+    """
+    return os.path.join(CACHE_DIR, key + CACHE_EXT)
+
+def _get_temp_path(cache_path):
+    """ キャッシュの書き込み中の一時ファイルのパスを取得
+        ※並列で保存しても被らないようにプロセス、スレッド毎に分ける
+
+    Args:
+        cache_path (str): キャッシュファイルのパス
+
+    Returns:
+        str: 一時ファイルのパス
+    """
+    return f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def _get_cache_paths():
+    """ 全てのキャッシュファイルのパスを取得
+
+    Returns:
+        str[]: キャッシュファイルのパスのリスト
+    """
+    if not os.path.isdir(CACHE_DIR):
+        return []
+
+    return [os.path.join(CACHE_DIR, f) for f in os.listdir(CACHE_DIR) if f.endswith(CACHE_EXT)]
+
+def _get_file_hash(path):
+    """ ファイル内容のハッシュを取得
+
+    Args:
+        path (str): ファイルパス
+
+    Returns:
+        str: ハッシュ
+    """
+    file_hash = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+# -- Helper --
+
+def _remove_file(path):
+    """ ファイルを削除
+
+    Args:
+        path (str): ファイルパス
+
+    Returns:
+        bool: True = 削除成功, False = 失敗
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        return False
+
+    return True
@@ -0,0 +1,248 @@
+import hashlib
+import json
+
+# ----------------------------------------------------------------------------------------------------
+# 定数
+# ----------------------------------------------------------------------------------------------------
+
+FINGERPRINT_COMPOSITING = "compositing"
+FINGERPRINT_VIEW_LAYERS = "view_layers"
+# 構成に含めないノードのプロパティ (名前はキーで比較し、選択状態は構成ではない)
+NODE_IGNORE_PROPERTIES = ("name", "select")
+# 構成に含めないRenderLayerの設定 (アペンドするLineStyleの一覧はファイル毎に変わるので、LineSet毎のLineStyle名で比較する)
+RENDER_LAYER_IGNORE_KEYS = ("linestyle_names",)
+
+# ----------------------------------------------------------------------------------------------------
+# Public Functions
+# ----------------------------------------------------------------------------------------------------
+
+# -- Get --
+
+def get_fingerprint(json_data, names=None, datablocks=None, defaults=None):
+    """ Compositing設定の構成の指紋を取得
+        ※ノード、リンク、inputの値と、ViewLayer、AOV、LineSetの設定をそれぞれ正規化してハッシュにする
+          (ノードの並び順、リンクの順番、省略形式の違いでは変わらない。省略しない形式はデフォルト値を省略して揃える)
+          使っているNodeGroupsの中身はノードの指紋に、LineStyleの中身はViewLayerの指紋に含める
+
+    Args:
+        json_data (Dictionary): Compositing設定
+        names (dict): ノード名 -> 比較に使うノード名 (Noneはそのまま)
+        datablocks (dict): NodeGroups, LineStyleの中身 (node_groups, linestyles毎に名前 -> 中身)
+        defaults (function): bl_rnaのタイプ名 -> {プロパティ名: デフォルト値} (Noneはデフォルト値を省略した設定)
+
+    Returns:
+        dict: 指紋 (ViewLayerを読み込んでいない場合はViewLayerの指紋はNone)
+    """
+    if datablocks == None:
+        datablocks = {}
+
+    compositing = _normalize_tree(json_data.get("nodes", {}), json_data.get("links", {}), names, defaults)
+    compositing["node_groups"] = {
+        name: _normalize_tree(tree["nodes"], tree["links"]) if tree != None else None
+        for name, tree in datablocks.get("node_groups", {}).items()
+    }
+
+    render_layers = json_data.get("render_layers")
+    if render_layers != None:
+        render_layers = {key: value for key, value in render_layers.items() if key not in RENDER_LAYER_IGNORE_KEYS}
+        if defaults != None:
+            render_layers["render_layer_props"] = {
+                name: _normalize_render_layer(render_layer, defaults)
+                for name, render_layer in render_layers["render_layer_props"].items()
+            }
+        render_layers["linestyles"] = datablocks.get("linestyles", {})
+
+    return {
+        FINGERPRINT_COMPOSITING: _get_hash(compositing),
+        FINGERPRINT_VIEW_LAYERS: _get_hash(render_layers) if render_layers != None else None,
+    }
+
+def get_referenced_datablocks(json_data):
+    """ 指紋に中身を含めるNodeGroups, LineStyleの名前を取得
+        ※Sceneのノードが使っているNodeGroupsと、LineSetが使っているLineStyle
+          (NodeGroupsの中で使っているNodeGroupsは中身を取得する時に辿る)
+
+    Args:
+        json_data (Dictionary): Compositing設定
+
+    Returns:
+        (str[], str[]): (NodeGroupsの名前のリスト, LineStyleの名前のリスト)
+    """
+    node_group_names = get_group_names(json_data.get("nodes", {}))
+
+    linestyle_names = []
+    render_layers = json_data.get("render_layers")
+    if render_layers != None:
+        for render_layer in render_layers["render_layer_props"].values():
+            for lineset in render_layer.get("free_style", {}).get("linesets", {}).values():
+                name = lineset["manual_props"]["linestyle_name"]
+                if name not in linestyle_names:
+                    linestyle_names.append(name)
+
+    return node_group_names, linestyle_names
+
+def get_group_names(nodes):
+    """ ノードが使っているNodeGroupsの名前を取得
+
+    Args:
+        nodes (dict): ノード名 -> ノードのプロパティ
+
+    Returns:
+        str[]: NodeGroupsの名前のリスト
+    """
+    group_names = []
+    for node_prop in nodes.values():
+        name = node_prop["sp_prop"].get("group_name")
+        if name != None and name not in group_names:
+            group_names.append(name)
+
+    return group_names
+
+def is_same_fingerprint(fingerprint, other, is_load_view_layer=True):
+    """ 同じ構成の指紋か？
+
+    Args:
+        fingerprint (dict): 指紋
+        other (dict): 比較する指紋
+        is_load_view_layer (bool): ViewLayerも比較するか？
+
+    Returns:
+        bool: True = Yes, False = No (どちらかがない場合もNo)
+    """
+    if fingerprint == None or other == None:
+        return False
+    if fingerprint.get(FINGERPRINT_COMPOSITING) != other.get(FINGERPRINT_COMPOSITING):
+        return False
+    if not is_load_view_layer:
+        return True
+
+    return fingerprint.get(FINGERPRINT_VIEW_LAYERS) != None and fingerprint.get(FINGERPRINT_VIEW_LAYERS) == other.get(FINGERPRINT_VIEW_LAYERS)
+
+def get_plan_key(json_data):
+    """ 記録された指紋から反映手順を使い回すキーを取得
+        ※読み込んだセクションで反映手順が変わるので、ViewLayerを読み込んだかもキーに含める
+          ノードの選択状態は指紋には含めないが反映はするので、キーには含める
+
+    Args:
+        json_data (Dictionary): Compositing設定
+
+    Returns:
+        str: キー (指紋が記録されていない場合はNone)
+    """
+    fingerprint = json_data.get("fingerprint")
+    if fingerprint == None:
+        return None
+
+    view_layers = fingerprint.get(FINGERPRINT_VIEW_LAYERS) if "render_layers" in json_data else None
+    # 省略された値はそのまま区別する (省略形式が違うだけならキーが変わって使い回さないだけ)
+    selection = _get_hash({name: node_prop["auto_prop"].get("select") for name, node_prop in json_data.get("nodes", {}).items()})
+    return f"{fingerprint.get(FINGERPRINT_COMPOSITING)}|{view_layers}|{selection}"
+
+# ----------------------------------------------------------------------------------------------------
+# Private Functions
+# ----------------------------------------------------------------------------------------------------
+
+# -- Helper --
+
+def _normalize_tree(nodes_data, links_data, names=None, defaults=None):
+    """ ノードとリンクを比較出来る形に揃える
+
+    Args:
+        nodes_data (dict): ノード名 -> ノードのプロパティ
+        links_data (dict): リンク情報
+        names (dict): ノード名 -> 比較に使うノード名 (Noneはそのまま)
+        defaults (function): bl_rnaのタイプ名 -> {プロパティ名: デフォルト値} (Noneはデフォルト値を省略した設定)
+
+    Returns:
+        dict: 揃えたノードとリンク
+    """
+    if names == None:
+        names = {}
+
+    nodes = {}
+    for name, node_prop in nodes_data.items():
+        auto_prop = node_prop["auto_prop"]
+        auto_prop = _elide_defaults(auto_prop, auto_prop.get("bl_idname"), defaults, NODE_IGNORE_PROPERTIES)
+        sp_prop = dict(node_prop["sp_prop"])
+        if "format" in sp_prop:
+            sp_prop["format"] = _elide_defaults(sp_prop["format"], "ImageFormatSettings", defaults)
+        if "parent" in sp_prop:
+            sp_prop["parent"] = names.get(sp_prop["parent"], sp_prop["parent"])
+        nodes[names.get(name, name)] = {"auto_prop": auto_prop, "sp_prop": sp_prop}
+
+    links = sorted(
+        [
+            names.get(link_prop["from_node"], link_prop["from_node"]),
+            link_prop["from_socket"],
+            names.get(link_prop["to_node"], link_prop["to_node"]),
+            link_prop["to_socket"],
+        ]
+        for link_prop in links_data.values()
+    )
+
+    return {"nodes": nodes, "links": links}
+
+def _normalize_render_layer(render_layer, defaults):
+    """ ViewLayerの設定のデフォルト値を省略して揃える
+
+    Args:
+        render_layer (Dictionary): ViewLayerのレンダリングプロパティ
+        defaults (function): bl_rnaのタイプ名 -> {プロパティ名: デフォルト値}
+
+    Returns:
+        Dictionary: 揃えたViewLayerのレンダリングプロパティ
+    """
+    render_layer = dict(render_layer)
+    render_layer["vl_simple"] = _elide_defaults(render_layer["vl_simple"], "ViewLayer", defaults)
+    if "free_style" in render_layer:
+        fs = dict(render_layer["free_style"])
+        fs["fs_simple"] = _elide_defaults(fs["fs_simple"], "FreestyleSettings", defaults)
+        fs["linesets"] = {
+            name: dict(lineset, auto_props=_elide_defaults(lineset["auto_props"], "FreestyleLineSet", defaults))
+            for name, lineset in fs["linesets"].items()
+        }
+        render_layer["free_style"] = fs
+
+    return render_layer
+
+def _elide_defaults(values, struct_name, defaults, ignore_props=()):
+    """ デフォルト値と同じプロパティと、比較しないプロパティを除く
+        ※書き出し時のcompact形式と同じ判定にする
+
+    Args:
+        values (Dictionary): 自動取得したプロパティ
+        struct_name (str): bl_rnaのタイプ名
+        defaults (function): bl_rnaのタイプ名 -> {プロパティ名: デフォルト値} (Noneはデフォルト値を省略しない)
+        ignore_props (str[]): 比較しないプロパティ
+
+    Returns:
+        Dictionary: 残したプロパティ
+    """
+    struct_defaults = defaults(struct_name) if defaults != None and struct_name != None else None
+    if struct_defaults == None:
+        return {attr: val for attr, val in values.items() if attr not in ignore_props}
+
+    elided = {}
+    for attr, val in values.items():
+        if attr in ignore_props:
+            continue
+        # 配列のデフォルト値はtupleなので、JSONから読み込んだlistと揃える
+        default = struct_defaults.get(attr)
+        if default != None and (tuple(val) if isinstance(val, list) else val) == default:
+            continue
+        elided[attr] = val
+
+    return elided
+
+def _get_hash(data):
+    """ 正規化したJSONのハッシュを取得
+        ※キーは並べ替え、tupleとlistは同じものとして扱う
+
+    Args:
+        data (Object): JSONに出力出来るデータ
+
+    Returns:
+        str: ハッシュ
+    """
+    text = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
@@ -1,188 +1,704 @@
-import bpy
-import json
-from bpy_extras.io_utils import ImportHelper
-from bpy.props import BoolProperty, IntProperty, PointerProperty, StringProperty
-from . import compositing_load
-from . import compositing_save
-
-# ----------------------------------------------------------------------------------------------------
-# 定数
-# ----------------------------------------------------------------------------------------------------
-
-TOOL_NAME = "Compositing Loader"
-
-# ----------------------------------------------------------------------------------------------------
-# PropertyGroup
-# ----------------------------------------------------------------------------------------------------
-
-class QCOMMON_SAVE_compositing_io(bpy.types.PropertyGroup):
-    """ CompositorLoaderのプロパティ
-    """
-    load_path: StringProperty()
-    is_clear_node: BoolProperty(default=True)
-    is_clear_view_layer: BoolProperty(default=True)
-    is_clear_freestyle: BoolProperty(default=True)
-    is_clear_node_groups: BoolProperty(default=True)
-    add_view_layer_name: StringProperty()
-    import_count: IntProperty(default=0)
-
-# ----------------------------------------------------------------------------------------------------
-# Operator
-# ----------------------------------------------------------------------------------------------------
-
-class QCOMMON_OT_compositing_io_select_load_path(bpy.types.Operator, ImportHelper):
-    """ 読込パスを選択
-    """
-    bl_idname = "qcommon.compositing_io_select_load_path"
-    bl_label = "Select"
-
-    filter_glob: StringProperty(
-        default="*.blend",
-        options={'HIDDEN'},
-    )
-
-    def execute(self, context):
-        props = context.scene.compositing_io
-        props.load_path = self.filepath
-        bpy.ops.wm.redraw_timer(type='DRAW_WIN_SWAP', iterations=1)
-                    
-        return {'FINISHED'}
-
-class QCOMMON_OT_compositing_io_load(bpy.types.Operator):
-    """ Compositingの設定を読込
-    """
-    bl_idname = "qcommon.compositing_io_load"
-    bl_label = "Load"
-    bl_description = "Load the Compositing settings as blender text"
-    bl_options = {'REGISTER', 'UNDO'}
-
-    @classmethod
-    def poll(cls, context):
-        props = context.scene.compositing_io
-        if not props.load_path:
-            return False
-        else:
-            return True
-
-    def execute(self, context):
-        props = context.scene.compositing_io
-
-        def_layer = compositing_load.get_default_view_layer()
-        if def_layer == None:
-            self.report({'ERROR'}, (
-                "デフォルトのViewLayerの取得に失敗しました.\n" +
-                f"[{compositing_load.get_default_view_layer_name()}]の名前のViewLayerがありません."
-            ))
-            return {'CANCELLED'}        
-
-        json_data = compositing_load.load_compositing_option(props.load_path)
-        if json_data == None:
-            self.report({'ERROR'}, (
-                f'{props.load_path}\n' + 
-                'データの読み込みに失敗しました.\n' + 
-                'compositingOptionが保存されていない可能性があります.'
-            ))
-            return {'CANCELLED'}
-
-        # ViewLayerの設定
-        if props.is_clear_view_layer:
-            compositing_load.remove_view_layer(json_data)
-            
-        compositing_load.create_view_layer(json_data)
-        is_success = compositing_load.set_render_layer(json_data, props.load_path)
-        if not is_success:
-            self.report({'ERROR'}, "ViewLayerの設定に失敗しました.")
-            return {'CANCELLED'}
-
-        # NodeGroupsの設定
-        if props.is_clear_node_groups:
-            compositing_load.remove_node_groups()
-        compositing_load.append_node_groups(json_data)
-        
-        # Compositingの読み込み
-        compositing_load.import_compositing(json_data, props.is_clear_node)
-
-        return {'FINISHED'}
-
-class QCOMMON_OT_compositing_io_export(bpy.types.Operator):
-    """ Compositing設定をTempに書き出し
-        ※元ファイルからバッチモードでアドオン呼び出し
-    """
-    bl_idname = "qcommon.compositing_io_export"
-    bl_label = ""
-    
-    def execute(self, context):
-        data = compositing_save.get_compositing_option()
-        if data == None:
-            self.report({'ERROR'}, f"Compositing Data None : {compositing_load.COMPOSITING_OPTION_NAME_TEMP_FILE}")
-            return {'CANCELLED'}
-
-        try:
-            with open(compositing_load.COMPOSITING_OPTION_NAME_TEMP_FILE, "w") as f:
-                json.dump(data, f)
-        except:
-            self.report({'ERROR'}, f"Export Failed : {compositing_load.COMPOSITING_OPTION_NAME_TEMP_FILE}")
-            return {'CANCELLED'}
-            
-        self.report({'INFO'}, f"Export Success : {compositing_load.COMPOSITING_OPTION_NAME_TEMP_FILE}")
-        return {'FINISHED'}
-        
-# ----------------------------------------------------------------------------------------------------
-# UI
-# ----------------------------------------------------------------------------------------------------
-
-class QCOMMON_PT_compositing_io_base(bpy.types.Panel):
-    bl_label = "Compositing Loader"
-    bl_space_type = "NODE_EDITOR"
-    bl_region_type = "UI"
-    bl_options = {'DEFAULT_CLOSED'}
-
-    def draw(self, context):
-        layout = self.layout
-        props = context.scene.compositing_io
-
-        col = layout.box().column()
-        row = col.row(align=True)
-        row.prop(props, "load_path", text="Load Path")
-        row.operator(QCOMMON_OT_compositing_io_select_load_path.bl_idname, text="", icon="FILE_FOLDER")
-
-        col.prop(props, "is_clear_node", text="Delete current CompositingNodes")
-        col.prop(props, "is_clear_view_layer", text="Delete current ViewLayers")
-        col.prop(props, "is_clear_freestyle", text="Delete current LineSet, LineStyle")
-        col.prop(props, "is_clear_node_groups", text="Delete current NodeGroups")
-        col.prop(props, "add_view_layer_name", text="Add ViewLayer Text")
-
-        col = layout.column()
-        col.operator(QCOMMON_OT_compositing_io_load.bl_idname, icon="IMPORT")
-
-class QCOMMON_PT_compositing_io_mdl(QCOMMON_PT_compositing_io_base):
-    bl_idname = "QCOMMON_PT_compositing_io_mdl"
-    bl_category = "Q_COMMON"
-
-# ----------------------------------------------------------------------------------------------------
-# Register / Unregister
-# ----------------------------------------------------------------------------------------------------
-
-classes = (
-    QCOMMON_SAVE_compositing_io,
-    QCOMMON_OT_compositing_io_select_load_path,
-    QCOMMON_OT_compositing_io_load,
-    QCOMMON_OT_compositing_io_export,
-    QCOMMON_PT_compositing_io_mdl,
-)
-
-def register():
-    """ クラス登録
-    """
-    for i in classes:
-        bpy.utils.register_class(i)
-    
-    bpy.types.Scene.compositing_io = PointerProperty(type=QCOMMON_SAVE_compositing_io)
-
-def unregister():
-    """ クラス登録解除
-    """
-    del(bpy.types.Scene.compositing_io)
-    
-    for i in classes:
+import bpy
+import os
+from bpy_extras.io_utils import ImportHelper
+from bpy.props import BoolProperty, EnumProperty, IntProperty, PointerProperty, StringProperty
+from . import compositing_blend
+from . import compositing_cache
+from . import compositing_fingerprint
+from . import compositing_io_util as comp_util
+from . import compositing_load
+from . import compositing_plan
+from . import compositing_profile
+from . import compositing_save
+
+# ----------------------------------------------------------------------------------------------------
+# 定数
+# ----------------------------------------------------------------------------------------------------
+
+TOOL_NAME = "Compositing Loader"
+# 保存時のアクティブなSceneを読み込む場合のload_sceneの値
+LOAD_SCENE_ACTIVE = "__ACTIVE__"
+# バックグラウンドで読み込み中に完了を確認する間隔(秒)
+MODAL_TIMER_INTERVAL = 0.1
+# 先読みの完了を確認する間隔(秒)
+PREFETCH_TIMER_INTERVAL = 0.2
+
+# ----------------------------------------------------------------------------------------------------
+# Private Functions
+# ----------------------------------------------------------------------------------------------------
+
+# EnumPropertyの選択肢の文字列は参照を保持しておかないと表示が壊れる
+_scene_items = []
+
+def _get_scene_items(self, context):
+    """ 読み込み元ファイルのSceneの選択肢を取得
+        ※Blenderを起動せずにファイルから読み取る (ファイルが変わるまでは前回の結果を使う)
+
+    Args:
+        context (bpy.types.Context): コンテキスト
+
+    Returns:
+        (str, str, str)[]: EnumPropertyの選択肢
+    """
+    items = [(LOAD_SCENE_ACTIVE, "Active Scene", "Load the scene that was active when the file was saved")]
+    blend_info = compositing_blend.get_blend_info(bpy.path.abspath(self.load_path)) if self.load_path else None
+    if blend_info != None:
+        for name in blend_info.scenes:
+            # ノードがないSceneは選べない
+            if blend_info.has_compositing(name) == False:
+                continue
+            items.append((name, name, ""))
+
+    _scene_items[:] = items
+    return _scene_items
+
+def _update_prefetch(self, context):
+    """ 読込パスが変わったら元ファイルからの出力を始めておく (先読み)
+        ※前のパスの先読みは中止する
+
+    Args:
+        context (bpy.types.Context): コンテキスト
+    """
+    if not self.use_prefetch or not self.load_path:
+        compositing_load.cancel_prefetch()
+        return
+
+    # Blenderファイルでなければ出力しても失敗する
+    load_path = bpy.path.abspath(self.load_path)
+    if compositing_blend.get_blend_info(load_path) == None and not compositing_blend.is_blend_file(load_path):
+        compositing_load.cancel_prefetch()
+        return
+
+    job = compositing_load.start_prefetch(
+        self.load_path,
+        self.export_mode,
+        self.use_cache,
+        self.cache_size_limit,
+        self.use_cache_content_hash,
+    )
+    if job != None and not bpy.app.timers.is_registered(_poll_prefetch):
+        bpy.app.timers.register(_poll_prefetch, first_interval=PREFETCH_TIMER_INTERVAL)
+
+def _poll_prefetch():
+    """ 先読みの完了を確認 (bpy.app.timers用)
+        ※完了した結果はキャッシュと次の読み込み用に保持される
+
+    Returns:
+        float: 次に確認するまでの時間(秒) (完了した場合はNone)
+    """
+    if compositing_load.poll_prefetch():
+        return None
+
+    return PREFETCH_TIMER_INTERVAL
+
+@bpy.app.handlers.persistent
+def _on_load_pre(*args):
+    """ ファイルを開く前にバックグラウンドでの読み込みを中止 (bpy.app.handlers.load_pre用)
+        ※ファイルを開くとモーダルは終了処理を通らずに破棄されるので、ここで読み込み中の状態を戻す
+    """
+    QCOMMON_OT_compositing_io_load.cancel_running()
+
+def _apply_compositing_option(operator, context, json_data, load_path, blend_info=None, plan_key=None):
+    """ 読み込んだCompositingの設定を反映
+        ※反映の方法はSceneのプロパティに従う
+
+    Args:
+        operator (bpy.types.Operator): エラー表示用オペレーター
+        context (bpy.types.Context): コンテキスト
+        json_data (Dictionary): Compositing設定 (読み込みに失敗した場合はNone)
+        load_path (str): NodeGroups, LineStyleのアペンド元ファイルのパス
+        blend_info (compositing_blend.BlendInfo): 元ファイルの情報 (Noneはアペンド時に開いて確認する)
+        plan_key (str): コンパイル済みの反映手順を使い回すキー (指紋が記録されている場合は指紋を使う。Noneは毎回コンパイル)
+
+    Returns:
+        set: オペレーターの実行結果 (既に同じ構成の場合は何もせずにCANCELLED)
+    """
+    props = context.scene.compositing_io
+
+    if json_data == None:
+        operator.report({'ERROR'}, (
+            f'{load_path}\n' + 
+            'データの読み込みに失敗しました.\n' + 
+            'compositingOptionが保存されていない可能性があります.'
+        ))
+        return {'CANCELLED'}
+
+    # 指紋が記録されていれば、同じ構成の設定はコンパイル済みの反映手順を使い回す
+    fingerprint_key = compositing_fingerprint.get_plan_key(json_data)
+    if fingerprint_key != None:
+        plan_key = fingerprint_key
+
+    # 指定したノードと上流のノードだけ読み込む
+    # 差分反映は読み込まなかったノードを削除してしまうので対象外
+    node_names = compositing_load.parse_node_names(props.import_node_names)
+    is_select_nodes = len(node_names) > 0 and not props.is_reconcile_node
+
+    # 現在のSceneが既に同じ構成なら何もしない
+    # (一部のノードだけ読み込む、既存のノードの下に追加する、ViewLayer名を変える場合は同じ構成にならないので比較しない)
+    if (props.use_fingerprint and
+        not is_select_nodes and
+        (props.is_reconcile_node or props.is_clear_node) and
+        not (props.is_load_view_layer and props.add_view_layer_name != "")):
+        with compositing_profile.phase("fingerprint"):
+            is_up_to_date = compositing_load.is_up_to_date(json_data, context.scene, props.is_load_view_layer)
+        if is_up_to_date:
+            operator.report({'INFO'}, f"Already up to date : {load_path}")
+            return {'CANCELLED'}
+
+    # ViewLayerの削除は一部のノードだけ読み込む場合も元の設定の全てのViewLayerを残す
+    all_json_data = json_data
+    if is_select_nodes:
+        with compositing_profile.phase("select_nodes"):
+            json_data, missing_nodes = compositing_load.select_nodes(json_data, node_names)
+        # 一部のノードだけの設定はキーの設定と中身が異なる
+        plan_key = None
+        if missing_nodes:
+            operator.report({'WARNING'}, f"ノードが見つかりません : {', '.join(missing_nodes)}")
+
+    # ViewLayerの設定
+    # 読み込まない場合はViewLayerのセクション自体を読み込んでいない
+    if props.is_load_view_layer:
+        if props.is_clear_view_layer:
+            with compositing_profile.phase("remove_view_layer"):
+                compositing_load.remove_view_layer(all_json_data)
+            
+        with compositing_profile.phase("create_view_layer"):
+            compositing_load.create_view_layer(json_data)
+
+    # NodeGroups, LineStyleの読み込み
+    # 元ファイルは1度だけ開いてまとめてアペンドする
+    with compositing_profile.phase("append"):
+        if props.is_clear_node_groups:
+            compositing_load.remove_node_groups()
+        # ViewLayerを読み込まない場合はLineStyleもアペンドしないので、残るLineSetのために削除しない
+        if props.is_load_view_layer and props.is_clear_freestyle:
+            compositing_load.remove_linestyles()
+        missing = compositing_load.append_datablocks(json_data, load_path, blend_info)
+    if missing["node_groups"]:
+        operator.report({'WARNING'}, f"NodeGroupsが見つかりません : {', '.join(missing['node_groups'])}")
+    if missing["linestyles"]:
+        operator.report({'WARNING'}, f"LineStyleが見つかりません : {', '.join(missing['linestyles'])}")
+
+    # ViewLayer, ノードの設定は1度だけ解釈して使い回す
+    plan = compositing_plan.get_plan(json_data, plan_key)
+
+    if props.is_load_view_layer:
+        with compositing_profile.phase("set_render_layer"):
+            is_success = compositing_load.set_render_layer(json_data, plan=plan)
+        if not is_success:
+            operator.report({'ERROR'}, "ViewLayerの設定に失敗しました.")
+            return {'CANCELLED'}
+    
+    # Compositingの読み込み
+    if props.is_reconcile_node:
+        with compositing_profile.phase("reconcile"):
+            result = compositing_load.reconcile_compositing(json_data, plan=plan)
+        operator.report({'INFO'}, (
+            f'Nodes Created : {result["created"]}, Updated : {result["updated"]}, Removed : {result["removed"]} / ' +
+            f'Links Added : {result["links_added"]}, Removed : {result["links_removed"]}'
+        ))
+    else:
+        with compositing_profile.phase("import"):
+            compositing_load.import_compositing(json_data, props.is_clear_node, plan=plan)
+
+    return {'FINISHED'}
+
+def _get_preset_plan_key(path, scene_name, is_load_view_layer):
+    """ 書き出した設定ファイルの反映手順を使い回すキーを取得
+        ※ファイルが書き換わったら別のキーになる
+
+    Args:
+        path (str): 設定ファイルのパス
+        scene_name (str): Scene名 (Noneは出力時のアクティブなScene)
+        is_load_view_layer (bool): ViewLayerを読み込むか？
+
+    Returns:
+        str: キー (ファイルがない場合はNone)
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{scene_name}|{is_load_view_layer}"
+
+# ----------------------------------------------------------------------------------------------------
+# PropertyGroup
+# ----------------------------------------------------------------------------------------------------
+
+class QCOMMON_SAVE_compositing_io(bpy.types.PropertyGroup):
+    """ CompositorLoaderのプロパティ
+    """
+    load_path: StringProperty(update=_update_prefetch)
+    load_scene: EnumProperty(items=_get_scene_items)
+    is_clear_node: BoolProperty(default=True)
+    is_reconcile_node: BoolProperty(default=False)
+    is_clear_view_layer: BoolProperty(default=True)
+    is_clear_freestyle: BoolProperty(default=True)
+    is_clear_node_groups: BoolProperty(default=True)
+    is_load_view_layer: BoolProperty(default=True)
+    import_node_names: StringProperty()
+    add_view_layer_name: StringProperty()
+    import_count: IntProperty(default=0)
+    export_mode: EnumProperty(
+        items=[
+            (compositing_load.EXPORT_MODE_SUBPROCESS, "Subprocess", "Launch a new background Blender for every load"),
+            (compositing_load.EXPORT_MODE_WORKER, "Worker", "Reuse a background Blender kept running during the session"),
+            (compositing_load.EXPORT_MODE_LIBRARY, "Library", "Link the source scene temporarily and read it in this Blender"),
+        ],
+        default=compositing_load.EXPORT_MODE_SUBPROCESS,
+    )
+    use_cache: BoolProperty(default=True)
+    cache_size_limit: IntProperty(default=compositing_cache.DEFAULT_CACHE_SIZE_LIMIT, min=0)
+    use_cache_content_hash: BoolProperty(default=False)
+    profile_log_path: StringProperty(subtype="FILE_PATH")
+    use_background_load: BoolProperty(default=True)
+    use_prefetch: BoolProperty(default=True, update=_update_prefetch)
+    use_fingerprint: BoolProperty(default=True)
+
+# ----------------------------------------------------------------------------------------------------
+# Operator
+# ----------------------------------------------------------------------------------------------------
+
+class QCOMMON_OT_compositing_io_select_load_path(bpy.types.Operator, ImportHelper):
+    """ 読込パスを選択
+    """
+    bl_idname = "qcommon.compositing_io_select_load_path"
+    bl_label = "Select"
+
+    filter_glob: StringProperty(
+        default="*.blend",
+        options={'HIDDEN'},
+    )
+
+    def execute(self, context):
+        props = context.scene.compositing_io
+        props.load_path = self.filepath
+        bpy.ops.wm.redraw_timer(type='DRAW_WIN_SWAP', iterations=1)
+                    
+        return {'FINISHED'}
+
+class QCOMMON_OT_compositing_io_load(bpy.types.Operator):
+    """ Compositingの設定を読込
+        ※UIから実行した場合は元ファイルからの出力をバックグラウンドで行い、その間もBlenderを操作出来る (Escで中止)
+    """
+    bl_idname = "qcommon.compositing_io_load"
+    bl_label = "Load"
+    bl_description = "Load the Compositing settings as blender text"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # バックグラウンドで読み込み中のジョブ (同時に読み込めるのは1つだけ)
+    _running_job = None
+
+    @classmethod
+    def poll(cls, context):
+        props = context.scene.compositing_io
+        if not props.load_path or cls.is_running():
+            return False
+        else:
+            return True
+
+    @classmethod
+    def is_running(cls):
+        """ バックグラウンドで読み込み中か？
+            ※モーダルが終了処理を通らずに破棄された場合も、ジョブが終わっていれば読み込み中としない
+
+        Returns:
+            bool: True = Yes, False = No
+        """
+        return cls._running_job != None and not cls._running_job.is_done()
+
+    @classmethod
+    def cancel_running(cls):
+        """ バックグラウンドでの読み込みを中止
+        """
+        if cls._running_job != None:
+            cls._running_job.cancel()
+            cls._running_job = None
+
+    def execute(self, context):
+        return self._run_with_profile(context, self._load)
+
+    def invoke(self, context, event):
+        props = context.scene.compositing_io
+        if not props.use_background_load:
+            return self.execute(context)
+
+        load_args = self._prepare(context)
+        if load_args == None:
+            return {'CANCELLED'}
+        self._blend_info, scene_name = load_args
+        self._scene = context.scene
+
+        self._job = compositing_load.LoadJob(
+            props.load_path,
+            props.export_mode,
+            props.use_cache,
+            props.cache_size_limit,
+            props.use_cache_content_hash,
+            compositing_load.get_load_sections(props.is_load_view_layer, scene_name),
+            scene_name,
+        )
+        self._job.start()
+        # キャッシュがあればそのまま反映
+        if self._job.is_done():
+            return self._run_with_profile(context, self._apply_job)
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(MODAL_TIMER_INTERVAL, window=context.window)
+        wm.modal_handler_add(self)
+        wm.progress_begin(0, 100)
+        QCOMMON_OT_compositing_io_load._running_job = self._job
+
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC' and event.value == 'PRESS':
+            self._job.cancel()
+            self._end_modal(context)
+            self.report({'WARNING'}, f"Load Cancelled : {self._job.load_path}")
+            return {'CANCELLED'}
+
+        # 出力中も他の操作は通す
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        if not self._job.poll():
+            context.window_manager.progress_update(int(self._job.get_progress() * 100))
+            context.workspace.status_text_set(
+                f"{TOOL_NAME} : Exporting {os.path.basename(self._job.load_path)} ... " +
+                f"{self._job.get_elapsed():.1f} sec (Esc : Cancel)"
+            )
+            return {'PASS_THROUGH'}
+
+        self._end_modal(context)
+
+        # 出力中にSceneを切り替えた場合は別のSceneに読み込まないように中止
+        if context.scene != self._scene:
+            self.report({'WARNING'}, "出力中にSceneが切り替わったため読み込みを中止しました.")
+            return {'CANCELLED'}
+
+        return self._run_with_profile(context, self._apply_job)
+
+    def _end_modal(self, context):
+        """ バックグラウンドでの読み込みの表示を終了
+
+        Args:
+            context (bpy.types.Context): コンテキスト
+        """
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+        QCOMMON_OT_compositing_io_load._running_job = None
+
+    def _run_with_profile(self, context, func):
+        """ 処理毎の時間、件数を記録しながら実行
+
+        Args:
+            context (bpy.types.Context): コンテキスト
+            func (function): 実行する処理 (引数はコンテキスト、戻り値はオペレーターの実行結果)
+
+        Returns:
+            set: オペレーターの実行結果
+        """
+        props = context.scene.compositing_io
+
+        profile = compositing_profile.start_profile()
+        profile.info["load_path"] = props.load_path
+        try:
+            result = func(context)
+        finally:
+            compositing_profile.stop_profile()
+
+        self.report({'INFO'}, profile.get_summary())
+        if props.profile_log_path:
+            log_path = bpy.path.abspath(props.profile_log_path)
+            try:
+                profile.write(log_path)
+            except OSError as e:
+                self.report({'WARNING'}, f"Profile Log Failed : {log_path} ({e})")
+
+        return result
+
+    def _load(self, context):
+        """ Compositingの設定を読込
+
+        Args:
+            context (bpy.types.Context): コンテキスト
+
+        Returns:
+            set: オペレーターの実行結果
+        """
+        props = context.scene.compositing_io
+
+        load_args = self._prepare(context)
+        if load_args == None:
+            return {'CANCELLED'}
+        blend_info, scene_name = load_args
+
+        json_data = compositing_load.load_compositing_option(
+            props.load_path,
+            props.export_mode,
+            props.use_cache,
+            props.cache_size_limit,
+            props.use_cache_content_hash,
+            compositing_load.get_load_sections(props.is_load_view_layer, scene_name),
+            scene_name,
+        )
+
+        return _apply_compositing_option(self, context, json_data, props.load_path, blend_info)
+
+    def _apply_job(self, context):
+        """ バックグラウンドで読み込んだ設定を反映
+
+        Args:
+            context (bpy.types.Context): コンテキスト
+
+        Returns:
+            set: オペレーターの実行結果
+        """
+        # 出力は別プロセスで行ったので、待っていた時間を記録
+        compositing_profile.set_info("source", self._job.source)
+        compositing_profile.add_time("cache" if self._job.source == "cache" else "export", self._job.get_elapsed())
+
+        return _apply_compositing_option(self, context, self._job.result, self._job.load_path, self._blend_info)
+
+    def _prepare(self, context):
+        """ 読み込む前にBlenderを起動せずに確認出来ることを確認
+
+        Args:
+            context (bpy.types.Context): コンテキスト
+
+        Returns:
+            (compositing_blend.BlendInfo, str): (元ファイルの情報, 読み込むScene名) (読み込めない場合はNone)
+        """
+        props = context.scene.compositing_io
+
+        def_layer = compositing_load.get_default_view_layer()
+        if def_layer == None:
+            self.report({'ERROR'}, (
+                "デフォルトのViewLayerの取得に失敗しました.\n" +
+                f"[{compositing_load.get_default_view_layer_name()}]の名前のViewLayerがありません."
+            ))
+            return None
+
+        # Blenderを起動する前に元ファイルの中身を確認
+        # (zstdで展開出来ないなど判定出来ない場合はそのまま読み込む)
+        load_path = bpy.path.abspath(props.load_path)
+        blend_info = compositing_blend.get_blend_info(load_path)
+        if blend_info == None and not compositing_blend.is_blend_file(load_path):
+            self.report({'ERROR'}, f"{props.load_path}\nBlenderファイルではありません.")
+            return None
+
+        # 保存時のアクティブなSceneは最上位に入っているのでScene名を指定しない
+        scene_name = props.load_scene if props.load_scene not in ("", LOAD_SCENE_ACTIVE) else None
+        if blend_info != None and scene_name == blend_info.active_scene:
+            scene_name = None
+        if blend_info != None and blend_info.has_compositing(scene_name) == False:
+            self.report({'ERROR'}, f"{props.load_path}\n[{scene_name or blend_info.active_scene}]にCompositingのノードがありません.")
+            return None
+
+        return blend_info, scene_name
+
+class QCOMMON_OT_compositing_io_clear_cache(bpy.types.Operator):
+    """ 出力結果のキャッシュを削除
+    """
+    bl_idname = "qcommon.compositing_io_clear_cache"
+    bl_label = "Clear Cache"
+    bl_description = "Delete the cached Compositing settings of all loaded files"
+
+    def execute(self, context):
+        compositing_cache.clear_cache()
+        self.report({'INFO'}, f"Cache Cleared : {compositing_cache.CACHE_DIR}")
+        return {'FINISHED'}
+
+class QCOMMON_OT_compositing_io_export(bpy.types.Operator):
+    """ Compositing設定をTempに書き出し
+        ※元ファイルからバッチモードでアドオン呼び出し
+    """
+    bl_idname = "qcommon.compositing_io_export"
+    bl_label = ""
+
+    filepath: StringProperty(default="")
+    is_compact: BoolProperty(default=False)
+    compression: EnumProperty(
+        items=[
+            (comp_util.COMPRESSION_NONE, "None", "Write plain JSON"),
+            (comp_util.COMPRESSION_GZIP, "gzip", "Compress with gzip"),
+            (comp_util.COMPRESSION_LZMA, "LZMA", "Compress with LZMA (xz)"),
+        ],
+        default=comp_util.COMPRESSION_NONE,
+    )
+    is_indexed: BoolProperty(default=False)
+    is_all_scenes: BoolProperty(default=False)
+    scene_names: StringProperty(default="")
+    
+    def execute(self, context):
+        # 指定がなければ共通のTempファイルに出力
+        filepath = self.filepath if self.filepath else compositing_load.COMPOSITING_OPTION_NAME_TEMP_FILE
+
+        # 複数Sceneは1度にまとめて出力する
+        scene_names = [name.strip() for name in self.scene_names.split(",") if name.strip() != ""]
+        if len(scene_names) > 0:
+            scenes = [bpy.data.scenes[name] for name in scene_names if name in bpy.data.scenes]
+            data = compositing_save.get_compositing_options(scenes, is_compact=self.is_compact)
+        elif self.is_all_scenes:
+            data = compositing_save.get_compositing_options(is_compact=self.is_compact)
+        else:
+            data = compositing_save.get_compositing_option(is_compact=self.is_compact)
+        if data == None:
+            self.report({'ERROR'}, f"Compositing Data None : {filepath}")
+            return {'CANCELLED'}
+
+        try:
+            comp_util.write_compositing_option(filepath, data, self.compression, self.is_indexed)
+        except:
+            self.report({'ERROR'}, f"Export Failed : {filepath}")
+            return {'CANCELLED'}
+            
+        self.report({'INFO'}, f"Export Success : {filepath}")
+        return {'FINISHED'}
+
+class QCOMMON_OT_compositing_io_apply(bpy.types.Operator):
+    """ 書き出したCompositing設定を現在のSceneに反映
+        ※バッチモードで複数ファイルに反映する用 (反映の方法はSceneのプロパティに従う)
+    """
+    bl_idname = "qcommon.compositing_io_apply"
+    bl_label = ""
+
+    filepath: StringProperty(default="")
+    # NodeGroups, LineStyleのアペンド元 (空の場合は設定に記録された元ファイル)
+    source_path: StringProperty(default="")
+    # 空の場合は出力時のアクティブなScene
+    scene_name: StringProperty(default="")
+
+    def execute(self, context):
+        props = context.scene.compositing_io
+        scene_name = self.scene_name if self.scene_name else None
+
+        try:
+            json_data = comp_util.read_compositing_option(
+                self.filepath,
+                compositing_load.get_load_sections(props.is_load_view_layer, scene_name),
+            )
+        except (OSError, ValueError) as e:
+            self.report({'ERROR'}, f"Read Failed : {self.filepath} ({e})")
+            return {'CANCELLED'}
+
+        json_data = comp_util.select_scene(json_data, scene_name)
+        if json_data == None:
+            self.report({'ERROR'}, f"{self.filepath}\n[{scene_name}]の設定がありません.")
+            return {'CANCELLED'}
+
+        source_path = self.source_path if self.source_path else json_data.get("source_path", "")
+        blend_info = compositing_blend.get_blend_info(source_path) if source_path else None
+
+        # 同じ設定を続けて複数のファイルに反映する場合はコンパイル済みの反映手順を使い回す
+        # (指紋が記録されていない設定はファイルが変わっていないかで判定)
+        plan_key = _get_preset_plan_key(self.filepath, scene_name, props.is_load_view_layer)
+        return _apply_compositing_option(self, context, json_data, source_path, blend_info, plan_key)
+        
+# ----------------------------------------------------------------------------------------------------
+# UI
+# ----------------------------------------------------------------------------------------------------
+
+class QCOMMON_PT_compositing_io_base(bpy.types.Panel):
+    bl_label = "Compositing Loader"
+    bl_space_type = "NODE_EDITOR"
+    bl_region_type = "UI"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        props = context.scene.compositing_io
+
+        col = layout.box().column()
+        row = col.row(align=True)
+        row.prop(props, "load_path", text="Load Path")
+        row.operator(QCOMMON_OT_compositing_io_select_load_path.bl_idname, text="", icon="FILE_FOLDER")
+        col.prop(props, "load_scene", text="Scene")
+        # 元ファイルの中身 (ファイルが変わるまでは前回の結果を使うので描画毎に読まない)
+        blend_info = compositing_blend.get_blend_info(bpy.path.abspath(props.load_path)) if props.load_path else None
+        if blend_info != None:
+            col.label(
+                text=(
+                    f"Scene : {blend_info.active_scene} / " +
+                    f"Scenes {len(blend_info.scenes)}, NodeGroups {len(blend_info.node_groups)}, LineStyles {len(blend_info.linestyles)}"
+                ),
+                icon="INFO",
+            )
+
+        col.prop(props, "is_reconcile_node", text="Update current CompositingNodes")
+        col.prop(props, "use_fingerprint", text="Skip if Unchanged")
+        sub = col.column()
+        sub.enabled = not props.is_reconcile_node
+        sub.prop(props, "is_clear_node", text="Delete current CompositingNodes")
+        sub.prop(props, "import_node_names", text="Node Names")
+        col.prop(props, "is_load_view_layer", text="Load ViewLayers")
+        sub = col.column()
+        sub.enabled = props.is_load_view_layer
+        sub.prop(props, "is_clear_view_layer", text="Delete current ViewLayers")
+        sub.prop(props, "is_clear_freestyle", text="Delete current LineSet, LineStyle")
+        col.prop(props, "is_clear_node_groups", text="Delete current NodeGroups")
+        col.prop(props, "add_view_layer_name", text="Add ViewLayer Text")
+        col.prop(props, "export_mode", text="Export Mode")
+        col.prop(props, "use_prefetch", text="Prefetch on Path Change")
+
+        col = layout.box().column()
+        row = col.row(align=True)
+        row.prop(props, "use_cache", text="Use Cache")
+        row.operator(QCOMMON_OT_compositing_io_clear_cache.bl_idname, text="", icon="TRASH")
+        sub = col.column()
+        sub.enabled = props.use_cache
+        sub.prop(props, "cache_size_limit", text="Cache Size Limit (MB)")
+        sub.prop(props, "use_cache_content_hash", text="Check File Contents")
+
+        col = layout.column()
+        col.prop(props, "profile_log_path", text="Profile Log")
+
+        col = layout.column()
+        col.prop(props, "use_background_load", text="Load in Background")
+        col.operator(QCOMMON_OT_compositing_io_load.bl_idname, icon="IMPORT")
+
+class QCOMMON_PT_compositing_io_mdl(QCOMMON_PT_compositing_io_base):
+    bl_idname = "QCOMMON_PT_compositing_io_mdl"
+    bl_category = "Q_COMMON"
+
+# ----------------------------------------------------------------------------------------------------
+# Register / Unregister
+# ----------------------------------------------------------------------------------------------------
+
+classes = (
+    QCOMMON_SAVE_compositing_io,
+    QCOMMON_OT_compositing_io_select_load_path,
+    QCOMMON_OT_compositing_io_load,
+    QCOMMON_OT_compositing_io_clear_cache,
+    QCOMMON_OT_compositing_io_export,
+    QCOMMON_OT_compositing_io_apply,
+    QCOMMON_PT_compositing_io_mdl,
+)
+
+def register():
+    """ クラス登録
+    """
+    for i in classes:
+        bpy.utils.register_class(i)
+    
+    bpy.types.Scene.compositing_io = PointerProperty(type=QCOMMON_SAVE_compositing_io)
+    bpy.app.handlers.load_pre.append(_on_load_pre)
+
+def unregister():
+    """ クラス登録解除
+    """
+    if _on_load_pre in bpy.app.handlers.load_pre:
+        bpy.app.handlers.load_pre.remove(_on_load_pre)
+    QCOMMON_OT_compositing_io_load.cancel_running()
+    compositing_load.cancel_prefetch()
+    if bpy.app.timers.is_registered(_poll_prefetch):
+        bpy.app.timers.unregister(_poll_prefetch)
+
+    del(bpy.types.Scene.compositing_io)
+    
+    for i in classes:
         bpy.utils.unregister_class(i)
\ No newline at end of file
@@ -1,19 +1,559 @@
-# ----------------------------------------------------------------------------------------------------
-# Public Functions
-# ----------------------------------------------------------------------------------------------------
-
-# -- Check --
-
-def can_substitute_type(val):
-    """ そのまま代入出来る型か？
-
-    Args:
-        val (Object): 任意の値
-
-    Returns:
-        bool: True = Yes, False = No
-    """
-    if type(val) is str or type(val) is int or type(val) is float or type(val) is bool:
-        return True
-    else:
-        return False
\ No newline at end of file
+import gzip
+import json
+import lzma
+import os
+import subprocess
+import tempfile
+
+# ----------------------------------------------------------------------------------------------------
+# 定数
+# ----------------------------------------------------------------------------------------------------
+
+EXPORT_SCRIPT_PATH = os.path.join(os.path.dirname(__file__), "export_compositing.py")
+APPLY_SCRIPT_PATH = os.path.join(os.path.dirname(__file__), "apply_compositing.py")
+TEMP_FILE_PREFIX = "compositing_option_"
+
+# そのまま代入出来るRNAプロパティのタイプ
+SUBSTITUTE_PROPERTY_TYPES = {"BOOLEAN", "INT", "FLOAT", "STRING", "ENUM"}
+# mathutils.Vectorとして取得されるサブタイプ
+VECTOR_PROPERTY_SUBTYPES = {"TRANSLATION", "DIRECTION", "VELOCITY", "ACCELERATION", "XYZ", "XYZ_LENGTH", "COORDINATES"}
+# mathutils.Colorとして取得されるサブタイプ
+COLOR_PROPERTY_SUBTYPES = {"COLOR", "COLOR_GAMMA"}
+# 読み込み時のノード生成に必要なので必ず取得するプロパティ
+FORCE_AUTO_PROPERTIES = ("bl_idname",)
+# 読み込み時に参照するのでデフォルト値でも省略しないプロパティ
+KEEP_AUTO_PROPERTIES = ("bl_idname", "name", "layer")
+
+COMPRESSION_NONE = "NONE"
+COMPRESSION_GZIP = "GZIP"
+COMPRESSION_LZMA = "LZMA"
+GZIP_MAGIC = b"\x1f\x8b"
+LZMA_MAGIC = b"\xfd7zXZ\x00"
+
+# セクション毎に読み込める形式
+# 1行目がINDEXED_MAGIC、2行目がセクションの索引(JSON)、以降がセクション毎のJSON(圧縮する場合はセクション毎)
+INDEXED_MAGIC = b"COMPOSITING_IO_INDEXED\n"
+SECTION_HEADER = "header"
+SECTION_NODE_GROUPS = "node_groups"
+SECTION_NODES = "nodes"
+SECTION_LINKS = "links"
+SECTION_RENDER_LAYERS = "render_layers"
+# ViewLayer毎のセクション名のプレフィックス (「render_layers/ViewLayer名」)
+SECTION_RENDER_LAYER_PREFIX = "render_layers/"
+# header以外で1つのセクションにするキー
+SECTION_KEYS = (SECTION_NODE_GROUPS, SECTION_NODES, SECTION_LINKS, SECTION_RENDER_LAYERS)
+# アクティブなScene以外の設定 (Scene毎に1つのセクション「scenes/Scene名」)
+SECTION_SCENES = "scenes"
+SECTION_SCENE_PREFIX = "scenes/"
+
+# ----------------------------------------------------------------------------------------------------
+# Public Functions
+# ----------------------------------------------------------------------------------------------------
+
+# -- Check --
+
+def can_substitute_type(val):
+    """ そのまま代入出来る型か？
+
+    Args:
+        val (Object): 任意の値
+
+    Returns:
+        bool: True = Yes, False = No
+    """
+    if type(val) is str or type(val) is int or type(val) is float or type(val) is bool:
+        return True
+    else:
+        return False
+
+# -- Get --
+
+_property_descriptors = {}
+_property_defaults = {}
+
+def get_property_descriptors(obj):
+    """ 自動取得出来るプロパティの定義を取得
+        ※bl_rnaのタイプ毎に1度だけ作成してキャッシュする
+
+    Args:
+        obj (bpy.types.bpy_struct): 対象オブジェクト
+
+    Returns:
+        tuple[(str, bool, Object)]: (プロパティ名, 配列か？, デフォルト値)のリスト
+            ※デフォルト値がNoneのものは省略しない
+    """
+    rna = obj.bl_rna
+    descriptors = _property_descriptors.get(rna.identifier)
+    if descriptors == None:
+        descriptors = _create_property_descriptors(rna)
+        _property_descriptors[rna.identifier] = descriptors
+
+    return descriptors
+
+def get_property_defaults(identifier):
+    """ 取得済みのプロパティの定義からデフォルト値を取得
+        ※get_property_descriptorsで1度取得したタイプのみ (取得済みの設定をデフォルト値を省略した形に揃える用)
+
+    Args:
+        identifier (str): bl_rnaのタイプ名
+
+    Returns:
+        dict: プロパティ名 -> デフォルト値 (デフォルト値がNoneのものは含まない。未取得のタイプはNone)
+    """
+    defaults = _property_defaults.get(identifier)
+    if defaults == None:
+        descriptors = _property_descriptors.get(identifier)
+        if descriptors == None:
+            return None
+        defaults = {attr: default for attr, _, default in descriptors if default != None}
+        _property_defaults[identifier] = defaults
+
+    return defaults
+
+# -- Export --
+
+def create_temp_file_path(suffix=".json"):
+    """ 重複しない一時ファイルのパスを作成
+        ※同時に複数の出力を行っても上書きされないようにリクエスト毎に作成する
+
+    Args:
+        suffix (str): 拡張子
+
+    Returns:
+        str: 一時ファイルのパス
+    """
+    fd, path = tempfile.mkstemp(prefix=TEMP_FILE_PREFIX, suffix=suffix)
+    os.close(fd)
+    return path
+
+def run_export_process(binary_path, load_path, output_path, timeout=None, is_compact=False, compression=COMPRESSION_NONE, is_indexed=False, is_all_scenes=False):
+    """ Blenderをバッチモードで起動してCompositing設定を出力
+
+    Args:
+        binary_path (str): Blenderの実行ファイルのパス
+        load_path (str): 読み込みパス
+        output_path (str): 出力先のパス
+        timeout (float): タイムアウト(秒) (Noneは無制限)
+        is_compact (bool): デフォルト値を省略した形式で出力するか？
+        compression (str): 圧縮形式
+        is_indexed (bool): セクション毎に読み込める形式で出力するか？
+        is_all_scenes (bool): 全てのSceneの設定を出力するか？
+
+    Returns:
+        bool: True = 出力成功, False = 失敗
+    """
+    process = start_export_process(binary_path, load_path, output_path, is_compact, compression, is_indexed, is_all_scenes)
+    if process == None:
+        return False
+
+    try:
+        returncode = process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        print(f"Timed out when save Compositing of {load_path}.")
+        return False
+
+    if returncode != 0:
+        print(f"Crash Blender when save Compositing of {load_path}.")
+        return False
+
+    return True
+
+def start_export_process(binary_path, load_path, output_path, is_compact=False, compression=COMPRESSION_NONE, is_indexed=False, is_all_scenes=False):
+    """ Blenderをバッチモードで起動してCompositing設定の出力を開始
+        ※終了は待たないので、呼び出し側でpoll()などで確認する
+
+    Args:
+        binary_path (str): Blenderの実行ファイルのパス
+        load_path (str): 読み込みパス
+        output_path (str): 出力先のパス
+        is_compact (bool): デフォルト値を省略した形式で出力するか？
+        compression (str): 圧縮形式
+        is_indexed (bool): セクション毎に読み込める形式で出力するか？
+        is_all_scenes (bool): 全てのSceneの設定を出力するか？
+
+    Returns:
+        subprocess.Popen: 起動したプロセス (起動出来ない場合はNone)
+    """
+    args = [
+        binary_path,
+        "-b",
+        load_path,
+        "-P",
+        EXPORT_SCRIPT_PATH,
+        "--",
+        output_path,
+        "--compression",
+        compression,
+    ]
+    if is_compact:
+        args.append("--compact")
+    if is_indexed:
+        args.append("--indexed")
+    if is_all_scenes:
+        args.append("--all-scenes")
+
+    try:
+        return subprocess.Popen(args)
+    except OSError as e:
+        print(f"Can't start Blender : {e}")
+        return None
+
+def run_apply_process(binary_path, job_path, timeout=None):
+    """ Blenderをバッチモードで起動してジョブファイルの.blendにCompositing設定を反映
+
+    Args:
+        binary_path (str): Blenderの実行ファイルのパス
+        job_path (str): ジョブファイルのパス
+        timeout (float): タイムアウト(秒) (Noneは無制限)
+
+    Returns:
+        bool: True = 最後まで実行, False = 起動失敗、タイムアウト、クラッシュ
+    """
+    args = [
+        binary_path,
+        "-b",
+        "-P",
+        APPLY_SCRIPT_PATH,
+        "--",
+        job_path,
+    ]
+
+    try:
+        process = subprocess.Popen(args)
+    except OSError as e:
+        print(f"Can't start Blender : {e}")
+        return False
+
+    try:
+        returncode = process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        print(f"Timed out when apply Compositing of {job_path}.")
+        return False
+
+    if returncode != 0:
+        print(f"Crash Blender when apply Compositing of {job_path}.")
+        return False
+
+    return True
+
+# -- File --
+
+def write_compositing_option(path, data, compression=COMPRESSION_NONE, is_indexed=False):
+    """ Compositing設定をファイルに書き出し
+
+    Args:
+        path (str): 出力先のパス
+        data (Dictionary): Compositing設定
+        compression (str): 圧縮形式
+        is_indexed (bool): セクション毎に読み込める形式で書き出すか？
+    """
+    if is_indexed:
+        _write_indexed_compositing_option(path, data, compression)
+        return
+
+    text = json.dumps(data, separators=(",", ":"))
+    if compression == COMPRESSION_GZIP:
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(text)
+    elif compression == COMPRESSION_LZMA:
+        with lzma.open(path, "wt", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+def read_compositing_option(path, sections=None):
+    """ Compositing設定をファイルから読み込み
+        ※形式、圧縮形式はファイルの先頭から判定する
+          セクション毎に読み込める形式以外は全て読み込む
+
+    Args:
+        path (str): 読み込むパス
+        sections (str[]): 読み込むセクション (Noneは全て)
+
+    Returns:
+        Dictionary: Compositing設定
+    """
+    with open(path, "rb") as f:
+        magic = f.read(len(INDEXED_MAGIC))
+        if magic == INDEXED_MAGIC:
+            return _read_indexed_compositing_option(f, sections)
+
+    if magic.startswith(GZIP_MAGIC):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+    elif magic.startswith(LZMA_MAGIC):
+        with lzma.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+def select_sections(data, sections=None):
+    """ 読み込み済みのCompositing設定から指定したセクションだけ取得
+
+    Args:
+        data (Dictionary): Compositing設定
+        sections (str[]): 取得するセクション (Noneは全て)
+
+    Returns:
+        Dictionary: 指定したセクションだけのCompositing設定
+    """
+    if sections == None:
+        return data
+
+    section_data = _split_sections(data)
+    names = _select_section_names(section_data.keys(), sections)
+
+    return _join_sections({name: section_data[name] for name in names})
+
+def select_scene(data, scene_name=None):
+    """ 複数Sceneの設定から1つのSceneの設定を取得
+        ※アクティブなSceneの設定は最上位に、それ以外はscenesに入っている
+
+    Args:
+        data (Dictionary): Compositing設定
+        scene_name (str): Scene名 (Noneは出力時のアクティブなScene)
+
+    Returns:
+        Dictionary: Sceneの設定 (含まれていない場合はNone)
+    """
+    if scene_name == None or scene_name == data.get("active_scene"):
+        return {key: value for key, value in data.items() if key != SECTION_SCENES}
+
+    scene_data = data.get(SECTION_SCENES, {}).get(scene_name)
+    if scene_data == None:
+        return None
+
+    # ファイル全体の情報(名前、バージョンなど)は最上位から引き継ぐ
+    selected = {key: value for key, value in data.items() if key not in SECTION_KEYS and key != SECTION_SCENES}
+    selected.update(scene_data)
+    selected["active_scene"] = scene_name
+
+    return selected
+
+# ----------------------------------------------------------------------------------------------------
+# Private Functions
+# ----------------------------------------------------------------------------------------------------
+
+# -- Create --
+
+def _create_property_descriptors(rna):
+    """ bl_rnaのプロパティ定義から書き込み可能なプロパティを抽出
+
+    Args:
+        rna (bpy.types.Struct): 対象のRNA定義
+
+    Returns:
+        tuple[(str, bool, Object)]: (プロパティ名, 配列か？, デフォルト値)のリスト
+    """
+    descriptors = []
+    for prop in rna.properties:
+        if prop.identifier in FORCE_AUTO_PROPERTIES:
+            descriptors.append((prop.identifier, False, None))
+            continue
+        if prop.is_readonly:
+            continue
+        if prop.type not in SUBSTITUTE_PROPERTY_TYPES:
+            continue
+
+        array_length = getattr(prop, "array_length", 0)
+        if array_length == 0:
+            # 複数選択のEnumはsetで取得されるので除外
+            if prop.type == "ENUM" and prop.is_enum_flag:
+                continue
+            descriptors.append((prop.identifier, False, _get_property_default(prop, False)))
+        # 配列はVector,Colorのみ
+        elif prop.type == "FLOAT":
+            if (prop.subtype in VECTOR_PROPERTY_SUBTYPES or
+                (prop.subtype in COLOR_PROPERTY_SUBTYPES and array_length == 3)):
+                descriptors.append((prop.identifier, True, _get_property_default(prop, True)))
+
+    return tuple(descriptors)
+
+# -- File --
+
+def _write_indexed_compositing_option(path, data, compression):
+    """ Compositing設定をセクション毎に読み込める形式で書き出し
+
+    Args:
+        path (str): 出力先のパス
+        data (Dictionary): Compositing設定
+        compression (str): 圧縮形式 (セクション毎に圧縮する)
+    """
+    blocks = []
+    index = {}
+    offset = 0
+    for name, value in _split_sections(data).items():
+        block = _compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), compression)
+        index[name] = [offset, len(block)]
+        offset += len(block)
+        blocks.append(block)
+
+    with open(path, "wb") as f:
+        f.write(INDEXED_MAGIC)
+        f.write(json.dumps({"compression": compression, "sections": index}).encode("utf-8") + b"\n")
+        for block in blocks:
+            f.write(block)
+
+def _read_indexed_compositing_option(f, sections):
+    """ セクション毎に読み込める形式から指定したセクションだけ読み込み
+
+    Args:
+        f (file): 1行目を読み込み済みのファイル
+        sections (str[]): 読み込むセクション (Noneは全て)
+
+    Returns:
+        Dictionary: Compositing設定
+    """
+    index = json.loads(f.readline().decode("utf-8"))
+    data_offset = f.tell()
+    compression = index["compression"]
+    section_index = index["sections"]
+
+    # 読まないセクションも含めて、途中までしか書き出せていないファイルはエラーにする
+    data_size = max((offset + length for offset, length in section_index.values()), default=0)
+    if os.fstat(f.fileno()).st_size < data_offset + data_size:
+        raise ValueError("The file is truncated.")
+
+    section_data = {}
+    for name in _select_section_names(section_index.keys(), sections):
+        offset, length = section_index[name]
+        f.seek(data_offset + offset)
+        section_data[name] = json.loads(_decompress(f.read(length), compression).decode("utf-8"))
+
+    return _join_sections(section_data)
+
+def _split_sections(data):
+    """ Compositing設定をセクションに分割
+
+    Args:
+        data (Dictionary): Compositing設定
+
+    Returns:
+        dict: セクション名 -> セクションの内容
+    """
+    sections = {}
+    sections[SECTION_HEADER] = {key: value for key, value in data.items() if key not in SECTION_KEYS and key != SECTION_SCENES}
+    for key in (SECTION_NODE_GROUPS, SECTION_NODES, SECTION_LINKS):
+        if key in data:
+            sections[key] = data[key]
+
+    # ViewLayerはそれぞれ別のセクションにする
+    if SECTION_RENDER_LAYERS in data:
+        render_layers = dict(data[SECTION_RENDER_LAYERS])
+        render_layer_props = render_layers.pop("render_layer_props", {})
+        sections[SECTION_RENDER_LAYERS] = render_layers
+        for name, props in render_layer_props.items():
+            sections[SECTION_RENDER_LAYER_PREFIX + name] = props
+
+    # アクティブなScene以外はそれぞれ別のセクションにする
+    for name, scene_data in data.get(SECTION_SCENES, {}).items():
+        sections[SECTION_SCENE_PREFIX + name] = scene_data
+
+    return sections
+
+def _join_sections(sections):
+    """ セクションからCompositing設定を復元
+
+    Args:
+        sections (dict): セクション名 -> セクションの内容
+
+    Returns:
+        Dictionary: Compositing設定
+    """
+    data = dict(sections.get(SECTION_HEADER, {}))
+    for key in (SECTION_NODE_GROUPS, SECTION_NODES, SECTION_LINKS):
+        if key in sections:
+            data[key] = sections[key]
+
+    if SECTION_RENDER_LAYERS in sections:
+        render_layers = dict(sections[SECTION_RENDER_LAYERS])
+        render_layers["render_layer_props"] = {
+            name[len(SECTION_RENDER_LAYER_PREFIX):]: props
+            for name, props in sections.items()
+            if name.startswith(SECTION_RENDER_LAYER_PREFIX)
+        }
+        data[SECTION_RENDER_LAYERS] = render_layers
+
+    scenes = {
+        name[len(SECTION_SCENE_PREFIX):]: scene_data
+        for name, scene_data in sections.items()
+        if name.startswith(SECTION_SCENE_PREFIX)
+    }
+    if len(scenes) > 0:
+        data[SECTION_SCENES] = scenes
+
+    return data
+
+def _select_section_names(names, sections):
+    """ 読み込むセクション名を取得
+        ※headerは常に読み込む
+          render_layersは全てのViewLayer、「render_layers/ViewLayer名」はそのViewLayerだけ読み込む
+          scenesは全てのScene、「scenes/Scene名」はそのSceneだけ読み込む
+
+    Args:
+        names (str[]): ファイル内のセクション名
+        sections (str[]): 読み込むセクション (Noneは全て)
+
+    Returns:
+        str[]: 読み込むセクション名 (ファイル内の順番)
+    """
+    if sections == None:
+        return list(names)
+
+    sections = set(sections)
+    is_all_render_layers = SECTION_RENDER_LAYERS in sections
+    is_render_layers = is_all_render_layers or any(s.startswith(SECTION_RENDER_LAYER_PREFIX) for s in sections)
+    is_all_scenes = SECTION_SCENES in sections
+
+    selected = []
+    for name in names:
+        if name == SECTION_HEADER or name in sections:
+            selected.append(name)
+        elif name == SECTION_RENDER_LAYERS and is_render_layers:
+            selected.append(name)
+        elif name.startswith(SECTION_RENDER_LAYER_PREFIX) and is_all_render_layers:
+            selected.append(name)
+        elif name.startswith(SECTION_SCENE_PREFIX) and is_all_scenes:
+            selected.append(name)
+
+    return selected
+
+# -- Helper --
+
+def _compress(data, compression):
+    if compression == COMPRESSION_GZIP:
+        return gzip.compress(data)
+    elif compression == COMPRESSION_LZMA:
+        return lzma.compress(data)
+    return data
+
+def _decompress(data, compression):
+    if compression == COMPRESSION_GZIP:
+        return gzip.decompress(data)
+    elif compression == COMPRESSION_LZMA:
+        return lzma.decompress(data)
+    return data
+
+# -- Get --
+
+def _get_property_default(prop, is_array):
+    """ プロパティのデフォルト値を取得
+
+    Args:
+        prop (bpy.types.Property): プロパティ定義
+        is_array (bool): 配列か？
+
+    Returns:
+        Object: デフォルト値 (省略しないプロパティはNone)
+    """
+    if prop.identifier in KEEP_AUTO_PROPERTIES:
+        return None
+    if is_array:
+        return tuple(prop.default_array)
+    return prop.default
\ No newline at end of file
@@ -0,0 +1,151 @@
+import numpy as np
+
+# ----------------------------------------------------------------------------------------------------
+# 定数
+# ----------------------------------------------------------------------------------------------------
+
+# 親がないノードの親のインデックス
+NO_PARENT = -1
+
+# ----------------------------------------------------------------------------------------------------
+# Public Functions
+# ----------------------------------------------------------------------------------------------------
+
+# -- Get --
+
+def get_locations(nodes):
+    """ 全てのノードの位置をまとめて取得
+        ※Frameの中のノードはFrameからの相対位置
+
+    Args:
+        nodes (bpy.types.Nodes): ノードリスト
+
+    Returns:
+        numpy.ndarray: 位置 (ノード数 x 2)
+    """
+    locations = np.empty(len(nodes) * 2, dtype=np.float32)
+    nodes.foreach_get("location", locations)
+
+    return locations.reshape(-1, 2)
+
+def get_dimensions(nodes):
+    """ 全てのノードの大きさをまとめて取得
+
+    Args:
+        nodes (bpy.types.Nodes): ノードリスト
+
+    Returns:
+        numpy.ndarray: 大きさ (ノード数 x 2)
+    """
+    dimensions = np.empty(len(nodes) * 2, dtype=np.float32)
+    nodes.foreach_get("dimensions", dimensions)
+
+    return dimensions.reshape(-1, 2)
+
+def get_parent_indices(nodes):
+    """ 全てのノードの親のインデックスを取得
+        ※ポインタはforeach_getで取得出来ないのでノード毎に取得する
+
+    Args:
+        nodes (bpy.types.Nodes): ノードリスト
+
+    Returns:
+        numpy.ndarray: 親のインデックス (親がない場合はNO_PARENT)
+    """
+    indices = {node: i for i, node in enumerate(nodes)}
+
+    return np.fromiter(
+        (indices.get(node.parent, NO_PARENT) for node in nodes),
+        dtype=np.int64,
+        count=len(nodes),
+    )
+
+def get_absolute_locations(locations, parent_indices):
+    """ 親を辿って絶対位置を取得
+        ※全てのノードの親を1段ずつまとめて辿るので、繰り返しは階層の深さ分だけ
+
+    Args:
+        locations (numpy.ndarray): 親からの相対位置 (ノード数 x 2)
+        parent_indices (numpy.ndarray): 親のインデックス
+
+    Returns:
+        numpy.ndarray: 絶対位置 (ノード数 x 2)
+    """
+    absolute_locations = locations.astype(np.float64)
+    parents = parent_indices.copy()
+    # 親が循環していても止まるようにノード数までで打ち切る
+    for _ in range(len(parents)):
+        has_parent = parents != NO_PARENT
+        if not has_parent.any():
+            break
+        absolute_locations[has_parent] += locations[parents[has_parent]]
+        parents[has_parent] = parent_indices[parents[has_parent]]
+
+    return absolute_locations
+
+def get_top_position(absolute_locations):
+    """ ノードの上端位置を取得
+
+    Args:
+        absolute_locations (numpy.ndarray): 絶対位置 (ノード数 x 2)
+
+    Returns:
+        float: 上端の位置 (ノードがない場合は0)
+    """
+    if len(absolute_locations) <= 0:
+        return 0.0
+
+    return float(absolute_locations[:, 1].max())
+
+def get_bottom_position(absolute_locations, dimensions):
+    """ ノードの下端位置を取得
+
+    Args:
+        absolute_locations (numpy.ndarray): 絶対位置 (ノード数 x 2)
+        dimensions (numpy.ndarray): 大きさ (ノード数 x 2)
+
+    Returns:
+        float: 下端の位置 (ノードがない場合は0)
+    """
+    if len(absolute_locations) <= 0:
+        return 0.0
+
+    # 高さの分下げる
+    return float((absolute_locations[:, 1] - dimensions[:, 1]).min())
+
+# -- Set --
+
+def stack_nodes(tree, new_nodes, margin):
+    """ 追加したノードを既存のノードの下に移動
+        ※位置、大きさはまとめて取得し、移動後の位置もまとめて設定する
+
+    Args:
+        tree (bpy.types.NodeTree): ノードツリー
+        new_nodes (bpy.types.Node[]): 追加したノード
+        margin (float): 既存のノードとの間隔
+
+    Returns:
+        float: 下に移動した距離
+    """
+    nodes = tree.nodes
+    new_nodes = set(new_nodes)
+    is_new = np.fromiter((node in new_nodes for node in nodes), dtype=bool, count=len(nodes))
+    if not is_new.any():
+        return 0.0
+
+    locations = get_locations(nodes)
+    parent_indices = get_parent_indices(nodes)
+    absolute_locations = get_absolute_locations(locations, parent_indices)
+
+    bottom_pos = get_bottom_position(absolute_locations[~is_new], get_dimensions(nodes)[~is_new])
+    top_pos = get_top_position(absolute_locations[is_new])
+    offset = abs(top_pos - bottom_pos) + margin
+
+    # Frameの中のノードはFrameと一緒に動くので、追加したFrameの中にないノードだけ動かす
+    has_new_parent = np.zeros(len(nodes), dtype=bool)
+    has_parent = parent_indices != NO_PARENT
+    has_new_parent[has_parent] = is_new[parent_indices[has_parent]]
+    locations[is_new & ~has_new_parent, 1] -= offset
+    nodes.foreach_set("location", locations.ravel())
+
+    return offset
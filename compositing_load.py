@@ -1,610 +1,1740 @@
-import bpy
-import os
-import subprocess
-import json
-import uuid
-import tempfile
-from . import compositing_io_util as comp_util
-
-# ----------------------------------------------------------------------------------------------------
-# 定数
-# ----------------------------------------------------------------------------------------------------
-
-COMPOSITING_OPTION_NAME_TEMP_FILE = os.path.join(tempfile.gettempdir(), "compositing_option.json")
-DATA_NODE_GROUPS = "/NodeTree/"
-NODE_MARGIN = 300
-DEFAULT_VIEW_LAYER = "View Layer"
-DEFAULT_VIEW_LAYER_VER3 = "ViewLayer"
-DATA_FREESTYLE_LINESTYLE = "/FreestyleLineStyle/"
-
-# ----------------------------------------------------------------------------------------------------
-# Public Functions
-# ----------------------------------------------------------------------------------------------------
-
-# -- Set --
-
-def set_render_layer(json_data, load_path):
-    """ RenderLayerの設定
-
-    Args:
-        json_data (Dictionary): RenderLayerの設定データ
-
-    Returns:
-        bool: True = 設定成功, False = 失敗
-    """
-    if not "render_layers" in json_data:
-        return False
-
-    render_layer_settings = json_data["render_layers"]
-
-    if "render_layer_props" not in render_layer_settings:
-        return False
-
-    bpy.context.scene.render.use_freestyle = render_layer_settings["scene_use_freestyle"]    
-    _set_linestyles(render_layer_settings, load_path)
-    _set_view_layer_props(render_layer_settings)
-                
-    return True
-
-def load_compositing_option(load_path):
-    """ Compositing設定を読み込んでDictionaryで取得
-
-    Args:
-        load_path (str): 読み込みパス
-
-    Returns:
-        Dictionary: Compositing設定
-    """
-    # 前のファイルを読み込まないように念のため削除
-    if os.path.isfile(COMPOSITING_OPTION_NAME_TEMP_FILE):
-        os.remove(COMPOSITING_OPTION_NAME_TEMP_FILE)
-    
-    # 元ファイルから設定を%temp%に出力
-    script_path = os.path.join(os.path.dirname(__file__), "export_compositing.py")
-    result = subprocess.run([
-        bpy.app.binary_path,
-        "-b",
-        load_path,
-        "-P",
-        script_path
-    ])
-    if result.returncode != 0:
-        print("Crash Blender when save Compositing to temporary directory.")
-        return None
-
-    try:
-        with open(COMPOSITING_OPTION_NAME_TEMP_FILE, 'r') as f:
-            json_data = json.load(f)
-    except Exception as e:
-        print("Can't load Compositing from {load_path}")
-        return None
-
-    return json_data
-
-def import_compositing(json_data, is_clear):
-    """ Compositing設定を読み込み
-
-    Args:
-        is_clear (bool): 既存のデータをクリアするか？
-    """
-    bpy.context.scene.use_nodes = True
-
-    tree = bpy.context.scene.node_tree
-    old_nodes = [n for n in tree.nodes]
-    nodes = _create_nodes(json_data, tree, is_clear)
-    _create_links(json_data, tree, is_clear)
-
-    props = bpy.context.scene.compositing_io
-    if is_clear:
-        props.import_count = 0
-
-    # 名前が被ると接続先が前のノードになるので、
-    # 生成時にユニークな名前に変える
-    for node in nodes:
-        guid = uuid.uuid4()
-        node.name = f"{node.name}[{guid}]"
-        node.update()
-    props.import_count += 1
-
-    # 連続生成する際は位置を調整
-    # TODO Frameノードの位置の取得がバグっているのでFrameノードがあるとズレる
-    # 以下でBlender側自体の対応が行われているが対応が止まっている
-    # https://developer.blender.org/T72904
-    if not is_clear and props.import_count > 0:
-        bottomPos = _calc_nodes_bottom_position(old_nodes)
-        topPos = _calc_nodes_top_position(nodes)
-        diffPos = abs(topPos - bottomPos) + NODE_MARGIN
-        for node in nodes:
-            node.location[1] -= diffPos
-
-    return nodes
-
-def create_view_layer(json_data):
-    """ View Layerを生成
-
-    Args:
-        json_data (Dictionary): Compositingオプション
-    """
-    render_layers = json_data["render_layers"]
-    render_layer_props = render_layers["render_layer_props"]
-    for rl_prop in render_layer_props:
-        vl_name = _calc_view_layer_name(rl_prop)
-        # 既に作成されていたら作らない
-        if vl_name in bpy.context.scene.view_layers:
-            continue
-        bpy.context.scene.view_layers.new(vl_name)
-
-def remove_view_layer(json_data):
-    """ JsonDataに含まれないViewLayerを削除
-
-    Args:
-        json_data (Dictionary): Compositingオプション
-    """
-    render_layers = json_data["render_layers"]
-    render_layer_props = render_layers["render_layer_props"]
-    for vl in bpy.context.scene.view_layers:
-        if vl.name in render_layer_props:
-            continue
-        bpy.context.scene.view_layers.remove(vl)
-
-def remove_view_layers_ignore_default():
-    """ デフォルトのViewLayer以外を削除
-    """
-    def_layer = get_default_view_layer()
-    if def_layer == None:
-        return
-
-    bpy.context.window.view_layer = def_layer
-    for layer in bpy.context.scene.view_layers:
-        if layer == def_layer:
-            continue
-        bpy.context.scene.view_layers.remove(layer)
-
-def append_node_groups(json_data):
-    """ NodeGroupsを一括アペンド
-
-    Args:
-        json_data (Dictionary): Compositingオプション
-    """
-    props = bpy.context.scene.compositing_io
-    
-    for ng in json_data["node_groups"]:
-        directory = props.load_path + DATA_NODE_GROUPS
-        bpy.ops.wm.append(directory=directory, filename=ng, use_recursive=False)
-
-def remove_node_groups():
-    """ ノードグループを一括削除
-    """
-    for ng in bpy.data.node_groups:
-        if ng.type != "COMPOSITING":
-            continue
-        if ng.library != None:
-            continue
-
-        bpy.data.node_groups.remove(ng)
-        
-# -- Get --
-
-def get_render_engine(option):
-    """ RenderEngineを取得
-
-    Args:
-        option (Dictionary): Compositing設定
-
-    Returns:
-        str: RenderEngineのタイプ
-    """
-    return option["render_engine"]
-        
-def get_default_view_layer_name():
-    """Verに応じてデフォルトのViewLayerの名前を取得
-
-    Returns:
-        str: デフォルトのViewLayerの名前
-    """
-    # 3.0以下は「View Layer」
-    if bpy.app.version < (3, 0, 0):
-        return DEFAULT_VIEW_LAYER
-    # 3.0で「ViewLayer」に
-    else:
-        return DEFAULT_VIEW_LAYER_VER3        
-        
-def get_default_view_layer(operator=None):
-    """シーン生成時のデフォルトのViewLayerを取得
-
-    Args:
-        operator (bpy.types.Operator): エラー表示用オペレーター
-
-    Returns:
-        bpy.types.ViewLayer: デフォルトのViewLayer
-    """
-    vls = bpy.context.scene.view_layers
-
-    def_layer_name = get_default_view_layer_name()
-    if def_layer_name not in vls:
-        _show_log(operator, "デフォルトのViewLayerが見つかりません.")
-        return None
-
-    return vls[def_layer_name]
-        
-# ----------------------------------------------------------------------------------------------------
-# Private Functions
-# ----------------------------------------------------------------------------------------------------
-        
-# -- Get --
-
-def _calc_nodes_bottom_position(nodes):
-    """ ノードリストの下端位置を取得
-
-    Args:
-        nodes (bpy.types.Nodes): ノードリスト
-
-    Returns:
-        float: 下端の位置
-    """
-    bottomPos = None
-    # ノードがなかったら初期位置に
-    if len(nodes) <= 0:
-        return 0
-
-    for node in nodes:
-        # 高さの分下げる
-        posY = node.location[1] - node.dimensions[1]
-        if bottomPos == None or bottomPos > posY:
-            bottomPos = posY
-
-    return bottomPos
-
-def _calc_nodes_top_position(nodes):
-    """ ノードリストの上端位置を取得
-
-    Args:
-        nodes (bpy.types.Nodes): ノードリスト
-
-    Returns:
-        float: 上端の位置
-    """
-    topPos = None
-    for node in nodes:
-        posY = node.location[1]
-        if topPos == None or topPos < posY:
-            topPos = posY
-    return topPos
-
-def _calc_view_layer_name(view_layer_name):
-    """ プロパティを元にViewLayer名を取得
-
-    Args:
-        view_layer_name (str): 元ViewLayer名
-
-    Returns:
-        str: ViewLayer名
-    """
-    props = bpy.context.scene.compositing_io
-    def_layer = get_default_view_layer()
-    if def_layer == None:
-        return view_layer_name
-
-    if view_layer_name == def_layer.name or props.add_view_layer_name == "":
-        return view_layer_name
-    else:
-        return props.add_view_layer_name + view_layer_name
-        
-# -- Set --
-        
-def _set_auto_property(auto_prop, obj):
-    """ そのまま代入できるプロパティを設定
-
-    Args:
-        auto_prop (Dictionary): そのまま代入出来るプロパティのディクショナリー
-        obj (Object): 代入するクラス
-    """
-    for attr in auto_prop.keys():
-        if not hasattr(obj, attr):
-            continue
-
-        val = auto_prop[attr]
-        if comp_util.can_substitute_type(val):
-            try:
-                setattr(obj, attr, val)
-            except Exception as e:
-                # 存在しないViewLayerの場合に弾かれるがリネームの影響なので除外
-                print(e)
-                pass
-        elif len(val) == 2:
-            setattr(obj, attr, (val[0], val[1]))
-        elif len(val) == 3:
-            setattr(obj, attr, (val[0], val[1], val[2]))
-        
-def _create_nodes(json_data, tree, is_clear):
-    """ オプションからノードを生成
-
-    Args:
-        json_data (Dictionary): オプションデータ
-        tree (bpy.types.NodeTree): ノードツリー
-        is_clear (bool): 既存のノードをクリアするか？
-
-    Returns:
-        bpy.types.BlendDataNodeTrees: 生成したノード
-    """
-    nodes = []
-    nodes_data = json_data["nodes"]
-    if is_clear:
-        tree.nodes.clear()
-    for key in nodes_data.keys():
-        node_prop = nodes_data[key]
-
-        # 自動取得したプロパティの設定
-        auto_prop = node_prop["auto_prop"]
-        try:
-            node = tree.nodes.new(type=auto_prop["bl_idname"])
-        except:
-            print(auto_prop)
-            continue
-        _set_auto_property(auto_prop, node)
-          
-        sp_prop = node_prop["sp_prop"]
-        # Parentの設定
-        if "parent" in sp_prop:
-            node.parent = tree.nodes[sp_prop["parent"]]
-        
-        # Groupの場合
-        if node.bl_idname == "CompositorNodeGroup":
-            if sp_prop["group_name"] in bpy.data.node_groups:
-                node.node_tree = bpy.data.node_groups[sp_prop["group_name"]]
-        # FileOutputの場合
-        elif node.bl_idname == "CompositorNodeOutputFile":
-            _set_auto_property(sp_prop["format"], node.format)
-            if node.format.file_format == "OPEN_EXR_MULTILAYER":
-                node.layer_slots.clear()
-                for name in sp_prop["layer_slots"]:
-                    node.layer_slots.new(name)
-            else:
-                node.file_slots.clear()
-                for name in sp_prop["file_slots"]:
-                    node.file_slots.new(name)
-        # RenderLayersの場合
-        elif node.bl_idname == "CompositorNodeRLayers":
-            node.layer = _calc_view_layer_name(auto_prop["layer"])
-
-        _set_inputs(node, sp_prop)
-
-        nodes.append(node)
-
-    return nodes
-
-def _set_inputs(node, sp_prop):
-    """ inputの設定
-
-    Args:
-        node (bpy.types.Node): 対象ノード
-        sp_prop (dict): 設定プロパティ
-    """
-    if not hasattr(node, "inputs"):
-        return
-    
-    for i in node.inputs:
-        try:
-            if (i.bl_idname == "NodeSocketFloat" or 
-                i.bl_idname == "NodeSocketFloatFactor"):
-                i.default_value = sp_prop[i.identifier]
-            elif i.bl_idname == "NodeSocketColor":
-                color_val = sp_prop[i.identifier]
-                i.default_value = (color_val[0], color_val[1], color_val[2], color_val[3])
-        except Exception as e:
-            # FileOutputなどカラーで文字列が入ったりノードに応じて特殊パターンがあるため除外
-            # 特殊パターンは別途ノードを判定して個別対応
-            print(f"[{node.name}] {i.name} <- {i.identifier} : {e}")
-
-
-def _create_links(json_data, tree, is_clear):
-    """ リンク情報を生成
-
-    Args:
-        json_data (Dictionary): オプションデータ
-        tree (bpy.types.NodeTree): ノードツリー
-        is_clear (bool): 既存のリンクをクリアするか？
-
-    Returns:
-        bpy.types.NodeLinks: 生成したリンク
-    """
-    if is_clear:
-        tree.links.clear()
-    links = []
-    links_data = json_data["links"]
-    for key in links_data.keys():
-        link_prop = links_data[key]
-
-        to_node = _get_node(tree, link_prop["to_node"])
-        input_socket = _get_socket(to_node, link_prop["to_socket"], "inputs")
-        from_node = _get_node(tree, link_prop["from_node"])
-        output_socket = _get_socket(from_node, link_prop["from_socket"], "outputs")
-        if input_socket == None or output_socket == None:
-            print(f'[{link_prop["from_node"]}]{link_prop["from_socket"]} -> [{link_prop["to_node"]}]{link_prop["to_socket"]} is link failed!')
-            continue
-        link = tree.links.new(input_socket, output_socket)
-        links.append(link)
-
-    return links
-
-def _set_linestyles(render_layer_settings, load_path):
-    """ FreeStyleのLineStyleの設定
-        ※ViewLayerのLineSetの読み込みより先に行う
-        (LineSetでLineStyleを使うので)
-
-    Args:
-        render_layer_settings (Dictionary): RenderLayerの設定
-        load_path (str): 読み込むパス
-    """
-    if "linestyle_names" not in render_layer_settings:
-        return
-
-    props = bpy.context.scene.compositing_io
-    
-    # 既存のLineStyleをクリア
-    if props.is_clear_freestyle:
-        for ls in bpy.data.linestyles:
-            bpy.data.linestyles.remove(ls)
-
-    # LineStyleの読み込み
-    # LineStyleは元データからAppend出来るので読み込み
-    linestyle_names = render_layer_settings["linestyle_names"]
-    for ls_name in linestyle_names:
-        directory = load_path + DATA_FREESTYLE_LINESTYLE
-        bpy.ops.wm.append(directory=directory, filename=ls_name, use_recursive=False)
-
-def _set_view_layer_props(render_layer_settings):
-    """ 各ViewLayer毎のプロパティを設定
-
-    Args:
-        render_layer_settings (Dictionary): RenderLayerの設定
-    """
-    props = bpy.context.scene.compositing_io
-
-    render_layer_props = render_layer_settings["render_layer_props"]
-    for name in render_layer_props.keys():
-        vl_name = _calc_view_layer_name(name)
-        vl = bpy.context.scene.view_layers[vl_name]
-        rl_prop = render_layer_props[name]
-
-        # Passes, Filter 設定
-        vl_simple = rl_prop["vl_simple"]
-        for prop in vl_simple:
-            if not hasattr(vl, prop) or prop in ["cycles", "aovs"]:
-                continue
-            # 名前は書き換えない
-            if prop == "name":
-                continue
-            setattr( vl, prop, vl_simple[prop] )
-
-        # AOV 設定
-        if hasattr(vl, "aovs"):
-            # 2.93以降用
-            for aov in [aov for aov in vl.aovs]:
-                # print( "  --> ", len( vl.aovs ), aov )
-                vl.active_aov_index = 0
-            prop_aovs = rl_prop["aovs"]
-            for prop in prop_aovs:
-                # 追加済みは追加しない
-                if prop["name"] in vl.aovs:
-                    continue
-                aov = vl.aovs.add()
-                aov.name = prop["name"]
-                aov.type = prop["type"]
-        else:
-            # 2.91以前用
-            vl.cycles.aovs.clear()
-            prop_aovs = rl_prop["aovs"]
-            for prop in prop_aovs:
-                # 追加済みは追加しない
-                if prop["name"] in vl.cycles.aovs:
-                    continue
-                aov = vl.cycles.aovs.add()
-                aov.name = prop["name"]
-                aov.type = prop["type"]
-
-        # FreeStyle 設定
-        if not bpy.context.scene.render.use_freestyle:
-            continue
-        if not "free_style" in rl_prop:
-            continue
-        fs = rl_prop["free_style"]
-        fs_simple = fs["fs_simple"]
-        for fs_prop in fs_simple:
-            if not hasattr(vl.freestyle_settings, fs_prop):
-                continue
-            setattr(vl.freestyle_settings, fs_prop, fs_simple[fs_prop])
-
-        if not "linesets" in fs:
-            continue
-
-        # LineSetを生成するとLineStyleが自動で生成されるので生成前の一覧をキャッシュ
-        cache_linestyles = [ls.name for ls in bpy.data.linestyles]
-
-        # FreeStyleのLineSet設定
-        linesets = fs["linesets"]
-        if props.is_clear_freestyle and vl.freestyle_settings.linesets != None:
-            for l in vl.freestyle_settings.linesets:
-                vl.freestyle_settings.linesets.remove(l)
-        for key in linesets.keys():
-            ls = linesets[key]
-            auto_props = ls["auto_props"]
-            new_ls = vl.freestyle_settings.linesets.new(auto_props["name"])
-            for p in auto_props:
-                if not hasattr(new_ls, p):
-                    continue
-                setattr(new_ls, p, auto_props[p])
-
-            # LineStyleの設定
-            manual_props = ls["manual_props"]
-            if manual_props["linestyle_name"] not in bpy.data.linestyles:
-                continue
-            new_ls.linestyle = bpy.data.linestyles[manual_props["linestyle_name"]]
-            
-        # 自動で生成されたLineStyleを削除
-        for ls in bpy.data.linestyles:
-            if ls.name in cache_linestyles:
-                continue
-            
-            bpy.data.linestyles.remove(ls)
-
-# -- Get --
-
-def _get_node(tree, name):
-    """ ノードを取得
-
-    Args:
-        tree (bpy.types.NodeTree): ノードツリー
-        name (str): ノード名
-
-    Returns:
-        bpy.types.Node: ノード
-    """
-    nodes = [n for n in tree.nodes if n.name == name]
-    if len(nodes) != 1:
-        print(f"[{name}]のノード数が[{len(nodes)}]")
-        return None
-
-    return nodes[0]
-
-def _get_socket(node, socket_name, io_prop_name):
-    """ ソケットを取得
-
-    Args:
-        node (bpy.types.Node): ノード
-        socket_name (str): ソケット名
-        io_prop_name (str): 入出力のプロパティ名
-
-    Returns:
-        NodeSocket: ソケット
-    """
-    if not hasattr(node, io_prop_name):
-        print(f"[{node}]に[{io_prop_name}]のプロパティがありません.")
-        return None
-    
-    target_sockets = getattr(node, io_prop_name)
-    
-    # Rerouteの場合
-    if node.bl_idname == "NodeReroute":
-        for s in target_sockets:
-            # 生成直後はidentifierがoutputだが、入力が入ると「output.001」に変わる
-            # Rerouteのoutputは必ず1つなので、「.001」を除外して比較
-            # identifier, socket_nameの大文字、小文字が生成時に変わっていることがあるので全て小文字に
-            if str.lower(s.identifier.split(".")[0]) == str.lower(socket_name.split(".")[0]):
-                return s
-    else:
-        sockets = [s for s in target_sockets if s.identifier == socket_name]
-        if len(sockets) != 1:
-            print(f"[{node.name}]の{io_prop_name}に[{socket_name}]が[{len(sockets)}]個")
-            return None
-        return sockets[0]
-
-
-# -- Helper --
-
-
-def _show_log(operator, log, log_type="ERROR"):
-    if operator != None:
-        operator.report({log_type}, log)
-    else:
-        print(log)
+import bpy
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from . import compositing_blend
+from . import compositing_cache
+from . import compositing_fingerprint
+from . import compositing_io_util as comp_util
+from . import compositing_layout
+from . import compositing_plan
+from . import compositing_profile
+from . import compositing_save
+from . import compositing_socket
+from . import compositing_worker
+
+# ----------------------------------------------------------------------------------------------------
+# 定数
+# ----------------------------------------------------------------------------------------------------
+
+COMPOSITING_OPTION_NAME_TEMP_FILE = os.path.join(tempfile.gettempdir(), "compositing_option.json")
+NODE_MARGIN = 300
+DEFAULT_VIEW_LAYER = "View Layer"
+DEFAULT_VIEW_LAYER_VER3 = "ViewLayer"
+EXPORT_MODE_SUBPROCESS = "SUBPROCESS"
+EXPORT_MODE_WORKER = "WORKER"
+EXPORT_MODE_LIBRARY = "LIBRARY"
+# 読み込んだノードに元のノード名を記録するカスタムプロパティ
+NODE_SOURCE_NAME_PROP = "compositing_io_source"
+# 名前が被った場合の連番 (Blenderと同じ「.001」形式)
+NODE_NAME_NUMBER_PATTERN = re.compile(r"^(.*)\.(\d{3,})$")
+# 差分反映時に書き換えないプロパティ
+RECONCILE_IGNORE_PROPERTIES = ("name", "select")
+# バックグラウンドでの出力時間の目安(秒) (同じファイルを出力したことがない場合の進捗表示用)
+DEFAULT_EXPORT_SECONDS = 10.0
+# 中止時にワーカーのスレッドの終了を待つ時間(秒)
+CANCEL_JOIN_TIMEOUT = 5
+# バックグラウンドでない読み込みで先読みの完了を確認する間隔(秒)
+PREFETCH_WAIT_INTERVAL = 0.05
+
+# ----------------------------------------------------------------------------------------------------
+# Class
+# ----------------------------------------------------------------------------------------------------
+
+class LoadJob:
+    """ Compositing設定をバックグラウンドで読み込む
+        ※元ファイルからの出力は別プロセスで行うので、その間もBlenderを操作出来る
+          完了はpoll()で確認し、bpyを扱う処理は全てpoll()を呼んだメインスレッドで行う
+    """
+    def __init__(
+        self,
+        load_path,
+        export_mode=EXPORT_MODE_SUBPROCESS,
+        use_cache=False,
+        cache_size_limit=compositing_cache.DEFAULT_CACHE_SIZE_LIMIT,
+        use_content_hash=False,
+        sections=None,
+        scene_name=None,
+        is_prefetch=False,
+    ):
+        self.load_path = load_path
+        self.export_mode = export_mode
+        self.use_cache = use_cache
+        self.cache_size_limit = cache_size_limit
+        self.use_content_hash = use_content_hash
+        self.sections = sections
+        self.scene_name = scene_name
+        self.result = None
+        self.source = None
+        self.is_cancelled = False
+        # 開始時の元ファイルのサイズ、更新日時 (先読みの結果が使えるかの判定用)
+        self.file_signature = None
+        self._is_done = False
+        self._cache_key = None
+        self._output_path = None
+        self._process = None
+        self._thread = None
+        self._cancel_event = threading.Event()
+        # 常駐ワーカーでは、先読みの間は読み込みのリクエストを先に出力する
+        self._prefetch_event = threading.Event()
+        if is_prefetch:
+            self._prefetch_event.set()
+        self._prefetch_job = None
+        self._is_worker_success = False
+        self._start_time = None
+        self._end_time = None
+
+    def start(self):
+        """ 読み込みを開始
+            ※キャッシュがある場合、Libraryで取得出来た場合はその場で完了する
+              同じファイルを先読み中の場合は出力し直さずに先読みの完了を待つ
+        """
+        self._start_time = time.monotonic()
+        self.file_signature = _get_file_signature(self.load_path)
+
+        # 元ファイルが変わっていなければキャッシュを使う
+        if self.use_cache:
+            self._cache_key = compositing_cache.get_cache_key(self.load_path, self.use_content_hash)
+            if self._cache_key != None:
+                json_data = compositing_cache.load_cache(self._cache_key, self.sections)
+                if json_data != None:
+                    json_data = comp_util.select_scene(json_data, self.scene_name)
+                if json_data != None:
+                    self._finish(json_data, "cache")
+                    return
+
+        # 読込パスを選んだ時点で出力を始めていればその結果を使う
+        self._prefetch_job = _take_prefetch(self.load_path)
+        if self._prefetch_job != None:
+            self.poll()
+            return
+
+        self._start_export()
+
+    def _start_export(self):
+        """ 元ファイルからの出力を開始
+        """
+        # Libraryは起動中のBlenderで取得するのでその場で完了
+        if self.export_mode == EXPORT_MODE_LIBRARY:
+            json_data = _export_with_library(self.load_path)
+            if json_data != None:
+                if self._cache_key != None:
+                    compositing_cache.save_cache(self._cache_key, json_data, self.cache_size_limit)
+                json_data = comp_util.select_sections(json_data, self.sections)
+                self._finish(comp_util.select_scene(json_data, self.scene_name), EXPORT_MODE_LIBRARY)
+                return
+
+        # 同時に読み込んでも上書きされないようにリクエスト毎に別のファイルに出力
+        self._output_path = comp_util.create_temp_file_path()
+        if self.export_mode == EXPORT_MODE_WORKER:
+            self._thread = threading.Thread(target=self._export_with_worker, daemon=True)
+            self._thread.start()
+        else:
+            self._process = comp_util.start_export_process(
+                bpy.app.binary_path,
+                self.load_path,
+                self._output_path,
+                is_compact=True,
+                is_indexed=True,
+                is_all_scenes=True,
+            )
+            if self._process == None:
+                _remove_temp_file(self._output_path)
+                self._finish(None, self.export_mode)
+
+    def poll(self):
+        """ 完了したか確認し、完了していれば結果を読み込む
+
+        Returns:
+            bool: True = 完了 (中止、失敗を含む), False = 出力中
+        """
+        if self._is_done:
+            return True
+
+        if self._prefetch_job != None:
+            if not self._prefetch_job.poll():
+                return False
+            json_data = self._prefetch_job.result
+            # 先読みに失敗した場合は出力し直す
+            if json_data == None:
+                self._prefetch_job = None
+                self._start_export()
+                return self._is_done
+            json_data = comp_util.select_sections(json_data, self.sections)
+            self._finish(comp_util.select_scene(json_data, self.scene_name), "prefetch")
+            return True
+
+        if self._process != None:
+            if self._process.poll() == None:
+                return False
+            is_success = self._process.returncode == 0
+            if not is_success:
+                print(f"Crash Blender when save Compositing of {self.load_path}.")
+        elif self._thread != None:
+            if self._thread.is_alive():
+                return False
+            is_success = self._is_worker_success
+        else:
+            return self._is_done
+
+        json_data = None
+        try:
+            if is_success:
+                json_data = _read_exported_file(
+                    self._output_path,
+                    self.load_path,
+                    self.sections,
+                    self._cache_key,
+                    self.cache_size_limit,
+                )
+        finally:
+            _remove_temp_file(self._output_path)
+
+        if json_data != None:
+            _export_seconds[os.path.normcase(os.path.abspath(self.load_path))] = self.get_elapsed()
+            json_data = comp_util.select_scene(json_data, self.scene_name)
+        self._finish(json_data, self.export_mode)
+
+        return True
+
+    def cancel(self):
+        """ 読み込みを中止
+            ※出力中のBlenderは終了させる (常駐ワーカーは他の読み込みでも使うので、このリクエストだけ待つのをやめる)
+        """
+        if self._is_done:
+            return
+
+        self.is_cancelled = True
+        if self._prefetch_job != None:
+            self._prefetch_job.cancel()
+        elif self._process != None:
+            if self._process.poll() == None:
+                self._process.kill()
+            self._process.wait()
+        elif self._thread != None:
+            self._cancel_event.set()
+            self._thread.join(CANCEL_JOIN_TIMEOUT)
+
+        # 先読みを引き継いだ場合は出力先は先読みのジョブが持つ
+        if self._output_path != None:
+            _remove_temp_file(self._output_path)
+        self._finish(None, self.export_mode)
+
+    def take_over(self):
+        """ 先読みを読み込みとして引き継ぐ
+            ※常駐ワーカーで他の先読みより後回しにされないようにする
+        """
+        self._prefetch_event.clear()
+
+    def is_done(self):
+        """ 完了したか？ (結果の読み込みは行わない)
+
+        Returns:
+            bool: True = Yes, False = No
+        """
+        return self._is_done
+
+    def get_elapsed(self):
+        """ 開始からの経過時間を取得
+
+        Returns:
+            float: 経過時間(秒)
+        """
+        if self._start_time == None:
+            return 0.0
+        end_time = self._end_time if self._end_time != None else time.monotonic()
+        return end_time - self._start_time
+
+    def get_progress(self):
+        """ 進捗の目安を取得
+            ※出力中のBlenderからは進捗が分からないので、前回同じファイルを出力した時間から推定する
+
+        Returns:
+            float: 進捗 (0.0 - 1.0)
+        """
+        if self._is_done:
+            return 1.0
+        if self._prefetch_job != None:
+            return self._prefetch_job.get_progress()
+        expected = _export_seconds.get(os.path.normcase(os.path.abspath(self.load_path)), DEFAULT_EXPORT_SECONDS)
+        return min(self.get_elapsed() / max(expected, 0.001), 0.99)
+
+    def _export_with_worker(self):
+        """ 常駐ワーカーでCompositing設定を出力(スレッド用)
+        """
+        self._is_worker_success = compositing_worker.export_compositing_option(
+            self.load_path,
+            self._output_path,
+            is_compact=True,
+            is_indexed=True,
+            is_all_scenes=True,
+            cancel_event=self._cancel_event,
+            prefetch_event=self._prefetch_event,
+        )
+
+    def _finish(self, json_data, source):
+        """ 完了にする
+
+        Args:
+            json_data (Dictionary): 読み込んだCompositing設定 (失敗した場合はNone)
+            source (str): 読み込み元 (cache, 出力方法)
+        """
+        self.result = json_data
+        self.source = source
+        self._end_time = time.monotonic()
+        self._is_done = True
+
+# ----------------------------------------------------------------------------------------------------
+# Public Functions
+# ----------------------------------------------------------------------------------------------------
+
+# 読み込み元ファイル毎の前回の出力時間(秒) (進捗表示用)
+_export_seconds = {}
+
+# -- Set --
+
+def set_render_layer(json_data, scene=None, plan=None):
+    """ RenderLayerの設定
+        ※LineSetでLineStyleを使うので、先にappend_datablocksでLineStyleを読み込んでおく
+
+    Args:
+        json_data (Dictionary): RenderLayerの設定データ
+        scene (bpy.types.Scene): 対象シーン (Noneは現在のシーン)
+        plan (compositing_plan.ApplyPlan): コンパイル済みの反映手順 (Noneはjson_dataからコンパイル)
+
+    Returns:
+        bool: True = 設定成功, False = 失敗
+    """
+    if scene == None:
+        scene = bpy.context.scene
+
+    if plan == None:
+        plan = compositing_plan.get_plan(json_data)
+    if plan.view_layers == None:
+        return False
+
+    scene.render.use_freestyle = plan.use_freestyle
+    _set_view_layer_props(plan, scene)
+                
+    return True
+
+def load_compositing_option(
+    load_path,
+    export_mode=EXPORT_MODE_SUBPROCESS,
+    use_cache=False,
+    cache_size_limit=compositing_cache.DEFAULT_CACHE_SIZE_LIMIT,
+    use_content_hash=False,
+    sections=None,
+    scene_name=None,
+):
+    """ Compositing設定を読み込んでDictionaryで取得
+        ※元ファイルからは全てのSceneをまとめて出力し、指定したSceneの設定を返す
+
+    Args:
+        load_path (str): 読み込みパス
+        export_mode (str): 元ファイルからの出力方法
+        use_cache (bool): 出力結果のキャッシュを使うか？
+        cache_size_limit (int): キャッシュ全体の上限サイズ(MB)
+        use_content_hash (bool): キャッシュのキーに更新日時の代わりに内容のハッシュを使うか？
+        sections (str[]): 読み込むセクション (Noneは全て、get_load_sectionsで取得)
+        scene_name (str): 読み込むScene名 (Noneは保存時のアクティブなScene)
+
+    Returns:
+        Dictionary: Compositing設定 (Sceneがない場合はNone)
+    """
+    # 元ファイルが変わっていなければキャッシュを使う
+    cache_key = None
+    if use_cache:
+        with compositing_profile.phase("cache"):
+            cache_key = compositing_cache.get_cache_key(load_path, use_content_hash)
+            if cache_key != None:
+                json_data = compositing_cache.load_cache(cache_key, sections)
+                if json_data != None:
+                    json_data = comp_util.select_scene(json_data, scene_name)
+                if json_data != None:
+                    compositing_profile.set_info("source", "cache")
+                    return json_data
+
+    # 読込パスを選んだ時点で出力を始めていればその完了を待つ
+    prefetch_job = _take_prefetch(load_path)
+    if prefetch_job != None:
+        with compositing_profile.phase("export"):
+            while not prefetch_job.poll():
+                time.sleep(PREFETCH_WAIT_INTERVAL)
+        if prefetch_job.result != None:
+            compositing_profile.set_info("source", "prefetch")
+            json_data = comp_util.select_sections(prefetch_job.result, sections)
+            return comp_util.select_scene(json_data, scene_name)
+
+    # キャッシュには全てのセクションを保存する
+    compositing_profile.set_info("source", export_mode)
+    with compositing_profile.phase("export"):
+        json_data = _export_compositing_option(load_path, export_mode, sections, cache_key, cache_size_limit)
+    if json_data == None:
+        return None
+
+    return comp_util.select_scene(json_data, scene_name)
+
+def load_compositing_options(
+    load_paths,
+    max_workers=None,
+    use_cache=False,
+    cache_size_limit=compositing_cache.DEFAULT_CACHE_SIZE_LIMIT,
+    use_content_hash=False,
+):
+    """ 複数のファイルからCompositing設定を並列で読み込み
+        ※バックグラウンドのBlenderを最大max_workers個まで同時に起動する
+
+    Args:
+        load_paths (str[]): 読み込みパスのリスト
+        max_workers (int): 同時に起動するBlenderの最大数 (NoneはCPU数)
+        use_cache (bool): 出力結果のキャッシュを使うか？
+        cache_size_limit (int): キャッシュ全体の上限サイズ(MB)
+        use_content_hash (bool): キャッシュのキーに更新日時の代わりに内容のハッシュを使うか？
+
+    Returns:
+        Dictionary[]: 読み込みパス毎のCompositing設定 (失敗したものはNone)
+    """
+    results = [None] * len(load_paths)
+
+    # 同じファイルは1度だけ出力する
+    requests = {}
+    for i, load_path in enumerate(load_paths):
+        requests.setdefault(os.path.normcase(os.path.abspath(load_path)), []).append(i)
+
+    cache_keys = {}
+    for path, indices in list(requests.items()):
+        if not use_cache:
+            continue
+        cache_key = compositing_cache.get_cache_key(load_paths[indices[0]], use_content_hash)
+        json_data = compositing_cache.load_cache(cache_key) if cache_key != None else None
+        if json_data != None:
+            for i in indices:
+                results[i] = json_data
+            del requests[path]
+            continue
+        cache_keys[path] = cache_key
+
+    if len(requests) == 0:
+        return results
+
+    # bpyはメインスレッドでのみ扱う
+    binary_path = bpy.app.binary_path
+    if max_workers == None:
+        max_workers = os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                _export_with_subprocess,
+                binary_path,
+                load_paths[indices[0]],
+                cache_key=cache_keys.get(path),
+                cache_size_limit=cache_size_limit,
+            ): path
+            for path, indices in requests.items()
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            json_data = future.result()
+            for i in requests[path]:
+                results[i] = json_data
+
+    return results
+
+def import_compositing(json_data, is_clear, scene=None, plan=None):
+    """ Compositing設定を読み込み
+        ※同じ設定を複数のシーンに読み込む場合は、コンパイル済みの反映手順を渡すとJSONの解釈は1度だけで済む
+
+    Args:
+        json_data (Dictionary): Compositing設定
+        is_clear (bool): 既存のデータをクリアするか？
+        scene (bpy.types.Scene): 対象シーン (Noneは現在のシーン)
+        plan (compositing_plan.ApplyPlan): コンパイル済みの反映手順 (Noneはjson_dataからコンパイル)
+
+    Returns:
+        bpy.types.Node[]: 生成したノード
+    """
+    if scene == None:
+        scene = bpy.context.scene
+    scene.use_nodes = True
+
+    if plan == None:
+        plan = compositing_plan.get_plan(json_data)
+    tree = scene.node_tree
+    # 既存のノードと名前が被っても接続先を間違えないように、
+    # リンクは元のノード名 -> 生成したノードの対応で接続する
+    with compositing_profile.phase("create_nodes"):
+        source_nodes = _create_nodes(plan, tree, is_clear, scene)
+    with compositing_profile.phase("create_links"):
+        links = _create_links(plan, tree, is_clear, source_nodes)
+    nodes = list(source_nodes.values())
+    compositing_profile.add_count("nodes", len(nodes))
+    compositing_profile.add_count("links", len(links))
+
+    props = scene.compositing_io
+    if is_clear:
+        props.import_count = 0
+    props.import_count += 1
+
+    # 連続生成する際は既存のノードの下に並べる
+    # (Frameの中のノードは親を辿った絶対位置で計算する)
+    if not is_clear and props.import_count > 0:
+        with compositing_profile.phase("layout"):
+            compositing_layout.stack_nodes(tree, nodes, NODE_MARGIN)
+
+    # ノード毎に更新せず、全て設定し終わってから1度だけツリーを更新
+    tree.update_tag()
+
+    return nodes
+
+def reconcile_compositing(json_data, scene=None, plan=None):
+    """ 既存のノードと比較して差分だけCompositing設定を反映
+        ※元のノード名で既存のノードと対応付け、追加、削除、変更のあったノードだけ書き換える
+          (書き換えないノードは選択状態なども保持される)
+
+    Args:
+        json_data (Dictionary): Compositing設定
+        scene (bpy.types.Scene): 対象シーン (Noneは現在のシーン)
+        plan (compositing_plan.ApplyPlan): コンパイル済みの反映手順 (Noneはjson_dataからコンパイル)
+
+    Returns:
+        dict: 反映結果の件数
+    """
+    if scene == None:
+        scene = bpy.context.scene
+    scene.use_nodes = True
+
+    if plan == None:
+        plan = compositing_plan.get_plan(json_data)
+    tree = scene.node_tree
+    result = {
+        "created": 0,
+        "updated": 0,
+        "removed": 0,
+        "links_added": 0,
+        "links_removed": 0,
+    }
+
+    # 既存のノードを元のノード名で対応付け
+    # 対応するノードがない、種類が変わったノードは削除
+    source_nodes = {}
+    for node in list(tree.nodes):
+        source_name = _get_source_name(node)
+        spec = plan.node_specs.get(source_name)
+        if (spec == None or
+            source_name in source_nodes or
+            node.bl_idname != spec.bl_idname):
+            tree.nodes.remove(node)
+            result["removed"] += 1
+            continue
+        source_nodes[source_name] = node
+
+    # 追加、変更
+    used_names = {n.name for n in tree.nodes}
+    name_counters = {}
+    for spec in plan.nodes:
+        node = source_nodes.get(spec.source_name)
+        if node == None:
+            node = _new_node(tree, spec.source_name, spec.auto_prop, used_names, name_counters)
+            if node == None:
+                continue
+            spec.setters.apply(node)
+            _set_sp_property(node, spec, scene)
+            source_nodes[spec.source_name] = node
+            result["created"] += 1
+            continue
+
+        change_count = spec.setters.apply(node, RECONCILE_IGNORE_PROPERTIES)
+        change_count += _set_sp_property(node, spec, scene, is_diff=True)
+        if change_count > 0:
+            result["updated"] += 1
+
+    # Parentは全てのノードが揃ってから設定
+    for spec in plan.nodes:
+        node = source_nodes.get(spec.source_name)
+        if node == None:
+            continue
+        parent = source_nodes.get(spec.parent_name) if spec.parent_name != None else None
+        if node.parent != parent:
+            node.parent = parent
+
+    # リンク
+    added, removed = _reconcile_links(plan, tree, source_nodes)
+    result["links_added"] = added
+    result["links_removed"] = removed
+
+    # 変更があった場合だけ最後に1度ツリーを更新
+    if any(count > 0 for count in result.values()):
+        tree.update_tag()
+
+    return result
+
+def create_view_layer(json_data, scene=None):
+    """ View Layerを生成
+
+    Args:
+        json_data (Dictionary): Compositingオプション
+        scene (bpy.types.Scene): 対象シーン (Noneは現在のシーン)
+    """
+    if scene == None:
+        scene = bpy.context.scene
+
+    render_layers = json_data["render_layers"]
+    render_layer_props = render_layers["render_layer_props"]
+    for rl_prop in render_layer_props:
+        vl_name = _calc_view_layer_name(rl_prop, scene)
+        # 既に作成されていたら作らない
+        if vl_name in scene.view_layers:
+            continue
+        scene.view_layers.new(vl_name)
+
+def remove_view_layer(json_data, scene=None):
+    """ JsonDataに含まれないViewLayerを削除
+
+    Args:
+        json_data (Dictionary): Compositingオプション
+        scene (bpy.types.Scene): 対象シーン (Noneは現在のシーン)
+    """
+    if scene == None:
+        scene = bpy.context.scene
+
+    render_layers = json_data["render_layers"]
+    render_layer_props = render_layers["render_layer_props"]
+    for vl in scene.view_layers:
+        if vl.name in render_layer_props:
+            continue
+        scene.view_layers.remove(vl)
+
+def remove_view_layers_ignore_default():
+    """ デフォルトのViewLayer以外を削除
+    """
+    def_layer = get_default_view_layer()
+    if def_layer == None:
+        return
+
+    bpy.context.window.view_layer = def_layer
+    for layer in bpy.context.scene.view_layers:
+        if layer == def_layer:
+            continue
+        bpy.context.scene.view_layers.remove(layer)
+
+def append_datablocks(json_data, load_path, blend_info=None):
+    """ NodeGroups, LineStyleを元ファイルから一括アペンド
+        ※元ファイルは1度だけ開き、オペレーターも使わないのでバックグラウンドでも動く
+
+    Args:
+        json_data (Dictionary): Compositingオプション
+        load_path (str): 読み込みパス
+        blend_info (compositing_blend.BlendInfo): 元ファイルの情報 (Noneは開いて確認する)
+
+    Returns:
+        dict: 元ファイルに見つからなかった名前 (データの種類 -> 名前のリスト)
+    """
+    requests = {
+        "node_groups": json_data["node_groups"],
+        "linestyles": json_data.get("render_layers", {}).get("linestyle_names", []),
+    }
+
+    # アペンドするものがなければ元ファイルを開かない
+    if blend_info != None:
+        available = {
+            "node_groups": set(blend_info.node_groups),
+            "linestyles": set(blend_info.linestyles),
+        }
+        missing = {attr: [name for name in names if name not in available[attr]] for attr, names in requests.items()}
+        if all(len(missing[attr]) == len(names) for attr, names in requests.items()):
+            return missing
+    elif all(len(names) == 0 for names in requests.values()):
+        return {attr: [] for attr in requests.keys()}
+
+    missing = {}
+    try:
+        with bpy.data.libraries.load(load_path, link=False) as (data_from, data_to):
+            for attr, names in requests.items():
+                available = set(getattr(data_from, attr))
+                setattr(data_to, attr, [name for name in names if name in available])
+                missing[attr] = [name for name in names if name not in available]
+    except Exception as e:
+        print(f"Can't append from {load_path} : {e}")
+        compositing_profile.add_error("append_datablocks")
+        return requests
+
+    return missing
+
+def remove_node_groups():
+    """ ノードグループを一括削除
+    """
+    for ng in bpy.data.node_groups:
+        if ng.type != "COMPOSITING":
+            continue
+        if ng.library != None:
+            continue
+
+        bpy.data.node_groups.remove(ng)
+
+def remove_linestyles():
+    """ LineStyleを一括削除
+    """
+    for ls in bpy.data.linestyles:
+        bpy.data.linestyles.remove(ls)
+        
+# -- Prefetch --
+
+_prefetch_job = None
+
+def start_prefetch(
+    load_path,
+    export_mode=EXPORT_MODE_SUBPROCESS,
+    use_cache=False,
+    cache_size_limit=compositing_cache.DEFAULT_CACHE_SIZE_LIMIT,
+    use_content_hash=False,
+):
+    """ 読み込む前に元ファイルからの出力をバックグラウンドで開始 (先読み)
+        ※結果は次の読み込みで使う。別のファイルを先読み中の場合は中止する
+
+    Args:
+        load_path (str): 読み込みパス
+        export_mode (str): 元ファイルからの出力方法
+        use_cache (bool): 出力結果のキャッシュを使うか？
+        cache_size_limit (int): キャッシュ全体の上限サイズ(MB)
+        use_content_hash (bool): キャッシュのキーに更新日時の代わりに内容のハッシュを使うか？
+
+    Returns:
+        LoadJob: 先読み (先読みしない場合はNone)
+    """
+    global _prefetch_job
+
+    if _prefetch_job != None and _is_same_prefetch(_prefetch_job, load_path):
+        return _prefetch_job
+    cancel_prefetch()
+
+    # Libraryは起動中のBlenderで取得するので先読みしても待ち時間は減らない
+    if export_mode == EXPORT_MODE_LIBRARY:
+        return None
+    # キャッシュがあれば読み込み時に出力しない
+    if use_cache:
+        cache_key = compositing_cache.get_cache_key(load_path, use_content_hash)
+        if cache_key != None and compositing_cache.has_cache(cache_key):
+            return None
+
+    # 読み込み時にどのSceneのどのセクションを使うか分からないので全て読み込む
+    job = LoadJob(load_path, export_mode, use_cache, cache_size_limit, use_content_hash, is_prefetch=True)
+    job.start()
+    _prefetch_job = job
+
+    return job
+
+def poll_prefetch():
+    """ 先読みが完了したか確認し、完了していれば結果を読み込む
+
+    Returns:
+        bool: True = 完了 (先読みしていない場合を含む), False = 出力中
+    """
+    if _prefetch_job == None:
+        return True
+
+    return _prefetch_job.poll()
+
+def cancel_prefetch():
+    """ 先読みを中止
+    """
+    global _prefetch_job
+
+    if _prefetch_job != None:
+        _prefetch_job.cancel()
+        _prefetch_job = None
+
+# -- Get --
+
+def get_load_sections(is_load_view_layer=True, scene_name=None):
+    """ 読み込みの設定に必要なセクションを取得
+
+    Args:
+        is_load_view_layer (bool): ViewLayerの設定も読み込むか？
+        scene_name (str): 読み込むScene名 (Noneは保存時のアクティブなScene)
+
+    Returns:
+        str[]: 読み込むセクション
+    """
+    sections = [
+        comp_util.SECTION_HEADER,
+        comp_util.SECTION_NODE_GROUPS,
+        comp_util.SECTION_NODES,
+        comp_util.SECTION_LINKS,
+    ]
+    if is_load_view_layer:
+        sections.append(comp_util.SECTION_RENDER_LAYERS)
+    # アクティブなSceneにノードがない場合は別のSceneが最上位に入っているので、
+    # 最上位のセクションも合わせて読み込む
+    if scene_name != None:
+        sections.append(comp_util.SECTION_SCENE_PREFIX + scene_name)
+
+    return sections
+
+def parse_node_names(text):
+    """ カンマ区切りのノード名を分割
+
+    Args:
+        text (str): カンマ区切りのノード名
+
+    Returns:
+        str[]: ノード名 (空の場合は全てのノードを読み込む)
+    """
+    return [name.strip() for name in text.split(",") if name.strip() != ""]
+
+def select_nodes(json_data, node_names):
+    """ 指定したノードと、その上流のノードだけに絞ったCompositing設定を取得
+        ※リンクの接続元とParentを辿る。Frameを指定した場合は中のノードも含める
+          NodeGroups, ViewLayer, LineStyleも含まれるノードが使うものだけにする
+
+    Args:
+        json_data (Dictionary): Compositing設定
+        node_names (str[]): 読み込むノード名 (読み込み元でのノード名)
+
+    Returns:
+        (Dictionary, str[]): (絞り込んだCompositing設定, 見つからなかったノード名)
+    """
+    nodes_data = json_data["nodes"]
+    missing = [name for name in node_names if name not in nodes_data]
+    selected = _collect_upstream_nodes(json_data, [name for name in node_names if name in nodes_data])
+
+    data = dict(json_data)
+    # 一部のノードだけになるので元の構成の指紋は使えない
+    data.pop("fingerprint", None)
+    # 生成順は元の順番のまま
+    data["nodes"] = {key: node_prop for key, node_prop in nodes_data.items() if key in selected}
+    # 上流は全て含まれているので、接続先が含まれていれば接続元も含まれている
+    data["links"] = {
+        key: link_prop
+        for key, link_prop in json_data["links"].items()
+        if link_prop["to_node"] in selected and link_prop["from_node"] in selected
+    }
+
+    group_names = set()
+    layer_names = set()
+    for node_prop in data["nodes"].values():
+        auto_prop = node_prop["auto_prop"]
+        if auto_prop["bl_idname"] == "CompositorNodeGroup" and "group_name" in node_prop["sp_prop"]:
+            group_names.add(node_prop["sp_prop"]["group_name"])
+        elif auto_prop["bl_idname"] == "CompositorNodeRLayers" and "layer" in auto_prop:
+            layer_names.add(auto_prop["layer"])
+    # 入れ子のNodeGroupsはアペンド時に一緒に読み込まれる
+    data["node_groups"] = [name for name in json_data["node_groups"] if name in group_names]
+    if "render_layers" in json_data:
+        data["render_layers"] = _select_render_layers(json_data["render_layers"], layer_names)
+
+    return data, missing
+
+def get_scene_fingerprint(scene=None):
+    """ Sceneの現在の構成の指紋を取得
+        ※読み込んだノードは読み込み元でのノード名で比較する
+
+    Args:
+        scene (bpy.types.Scene): 対象シーン (Noneは現在のシーン)
+
+    Returns:
+        dict: 指紋 (ノードがない場合はNone)
+    """
+    if scene == None:
+        scene = bpy.context.scene
+
+    if scene.node_tree == None:
+        return None
+
+    # 指紋は設定の取得と一緒に1度だけ計算する
+    names = {node.name: _get_source_name(node) for node in scene.node_tree.nodes}
+    if all(name == source_name for name, source_name in names.items()):
+        names = None
+    data = compositing_save.get_compositing_option(scene, is_compact=True, fingerprint_names=names)
+
+    return data["fingerprint"] if data != None else None
+
+def is_up_to_date(json_data, scene=None, is_load_view_layer=True):
+    """ Sceneが既にCompositing設定と同じ構成か？
+
+    Args:
+        json_data (Dictionary): Compositing設定
+        scene (bpy.types.Scene): 対象シーン (Noneは現在のシーン)
+        is_load_view_layer (bool): ViewLayerも比較するか？
+
+    Returns:
+        bool: True = Yes, False = No (設定に指紋が記録されていない場合もNo)
+    """
+    fingerprint = json_data.get("fingerprint")
+    if fingerprint == None:
+        return False
+    if scene == None:
+        scene = bpy.context.scene
+
+    # ノード、リンクの数が違えば設定を取得するまでもない
+    tree = scene.node_tree
+    if (tree == None or
+        len(tree.nodes) != len(json_data.get("nodes", {})) or
+        len(tree.links) != len(json_data.get("links", {}))):
+        return False
+
+    return compositing_fingerprint.is_same_fingerprint(fingerprint, get_scene_fingerprint(scene), is_load_view_layer)
+
+def get_render_engine(option):
+    """ RenderEngineを取得
+
+    Args:
+        option (Dictionary): Compositing設定
+
+    Returns:
+        str: RenderEngineのタイプ
+    """
+    return option["render_engine"]
+        
+def get_default_view_layer_name():
+    """Verに応じてデフォルトのViewLayerの名前を取得
+
+    Returns:
+        str: デフォルトのViewLayerの名前
+    """
+    # 3.0以下は「View Layer」
+    if bpy.app.version < (3, 0, 0):
+        return DEFAULT_VIEW_LAYER
+    # 3.0で「ViewLayer」に
+    else:
+        return DEFAULT_VIEW_LAYER_VER3        
+        
+def get_default_view_layer(operator=None, scene=None):
+    """シーン生成時のデフォルトのViewLayerを取得
+
+    Args:
+        operator (bpy.types.Operator): エラー表示用オペレーター
+        scene (bpy.types.Scene): 対象シーン (Noneは現在のシーン)
+
+    Returns:
+        bpy.types.ViewLayer: デフォルトのViewLayer
+    """
+    if scene == None:
+        scene = bpy.context.scene
+    vls = scene.view_layers
+
+    def_layer_name = get_default_view_layer_name()
+    if def_layer_name not in vls:
+        _show_log(operator, "デフォルトのViewLayerが見つかりません.")
+        return None
+
+    return vls[def_layer_name]
+        
+# ----------------------------------------------------------------------------------------------------
+# Private Functions
+# ----------------------------------------------------------------------------------------------------
+
+# -- Export --
+
+def _export_compositing_option(
+    load_path,
+    export_mode,
+    sections=None,
+    cache_key=None,
+    cache_size_limit=compositing_cache.DEFAULT_CACHE_SIZE_LIMIT,
+):
+    """ 元ファイルからCompositing設定を出力して取得
+
+    Args:
+        load_path (str): 読み込みパス
+        export_mode (str): 元ファイルからの出力方法
+        sections (str[]): 読み込むセクション (Noneは全て)
+        cache_key (str): 出力結果を保存するキャッシュのキー (Noneは保存しない)
+        cache_size_limit (int): キャッシュ全体の上限サイズ(MB)
+
+    Returns:
+        Dictionary: Compositing設定
+    """
+    # 元ファイルのSceneをリンクしてプロセス内で取得
+    # リンク出来なかった場合はsubprocessで取得する
+    if export_mode == EXPORT_MODE_LIBRARY:
+        json_data = _export_with_library(load_path)
+        if json_data != None:
+            if cache_key != None:
+                with compositing_profile.phase("cache"):
+                    compositing_cache.save_cache(cache_key, json_data, cache_size_limit)
+            return comp_util.select_sections(json_data, sections)
+        export_mode = EXPORT_MODE_SUBPROCESS
+
+    # 元ファイルから設定を%temp%に出力
+    if export_mode == EXPORT_MODE_WORKER:
+        return _export_with_worker(load_path, sections, cache_key, cache_size_limit)
+    else:
+        return _export_with_subprocess(bpy.app.binary_path, load_path, sections, cache_key, cache_size_limit)
+
+def _export_with_worker(
+    load_path,
+    sections=None,
+    cache_key=None,
+    cache_size_limit=compositing_cache.DEFAULT_CACHE_SIZE_LIMIT,
+):
+    """ 常駐ワーカーでCompositing設定を出力して取得
+
+    Args:
+        load_path (str): 読み込みパス
+        sections (str[]): 読み込むセクション (Noneは全て)
+        cache_key (str): 出力結果を保存するキャッシュのキー (Noneは保存しない)
+        cache_size_limit (int): キャッシュ全体の上限サイズ(MB)
+
+    Returns:
+        Dictionary: Compositing設定
+    """
+    # 同時に読み込んでも上書きされないようにリクエスト毎に別のファイルに出力
+    output_path = comp_util.create_temp_file_path()
+    try:
+        if not compositing_worker.export_compositing_option(load_path, output_path, is_compact=True, is_indexed=True, is_all_scenes=True):
+            return None
+        return _read_exported_file(output_path, load_path, sections, cache_key, cache_size_limit)
+    finally:
+        _remove_temp_file(output_path)
+
+def _export_with_subprocess(
+    binary_path,
+    load_path,
+    sections=None,
+    cache_key=None,
+    cache_size_limit=compositing_cache.DEFAULT_CACHE_SIZE_LIMIT,
+):
+    """ Blenderをバッチモードで起動してCompositing設定を出力して取得
+        ※bpyを使わないので別スレッドからも呼び出せる
+
+    Args:
+        binary_path (str): Blenderの実行ファイルのパス
+        load_path (str): 読み込みパス
+        sections (str[]): 読み込むセクション (Noneは全て)
+        cache_key (str): 出力結果を保存するキャッシュのキー (Noneは保存しない)
+        cache_size_limit (int): キャッシュ全体の上限サイズ(MB)
+
+    Returns:
+        Dictionary: Compositing設定
+    """
+    # 同時に読み込んでも上書きされないようにリクエスト毎に別のファイルに出力
+    output_path = comp_util.create_temp_file_path()
+    try:
+        if not comp_util.run_export_process(binary_path, load_path, output_path, is_compact=True, is_indexed=True, is_all_scenes=True):
+            return None
+        return _read_exported_file(output_path, load_path, sections, cache_key, cache_size_limit)
+    finally:
+        _remove_temp_file(output_path)
+
+def _read_exported_file(output_path, load_path, sections, cache_key, cache_size_limit):
+    """ 出力したファイルの必要なセクションを読み込んでキャッシュに保存
+        ※出力したファイルをそのままキャッシュにするので全体の読み込み、書き出しは行わない
+          (読み込めなかったファイルは空や途中までの出力なのでキャッシュしない)
+
+    Args:
+        output_path (str): 出力したファイルのパス
+        load_path (str): 読み込み元ファイルのパス(ログ用)
+        sections (str[]): 読み込むセクション (Noneは全て)
+        cache_key (str): キャッシュのキー (Noneは保存しない)
+        cache_size_limit (int): キャッシュ全体の上限サイズ(MB)
+
+    Returns:
+        Dictionary: Compositing設定
+    """
+    json_data = _read_compositing_option(output_path, load_path, sections)
+    if json_data == None:
+        return None
+
+    if cache_key != None and os.path.isfile(output_path):
+        with compositing_profile.phase("cache"):
+            compositing_cache.save_cache_file(cache_key, output_path, cache_size_limit)
+
+    return json_data
+
+def _export_with_library(load_path):
+    """ 元ファイルの全てのSceneを一時的にリンクしてCompositing設定を取得
+
+    Args:
+        load_path (str): 読み込みパス
+
+    Returns:
+        Dictionary: Compositing設定 (リンク出来なかった場合はNone)
+    """
+    # 既にリンクしているファイルは後で削除すると元のデータも消えるので使わない
+    abs_load_path = os.path.normcase(os.path.abspath(load_path))
+    for lib in bpy.data.libraries:
+        if os.path.normcase(os.path.abspath(bpy.path.abspath(lib.filepath))) == abs_load_path:
+            print(f"{load_path} is already linked.")
+            return None
+
+    # subprocessで開いた場合と同じく保存時のアクティブなSceneを最上位にする
+    # ファイルから読み取れない場合はSceneが1つの場合のみ
+    blend_info = compositing_blend.get_blend_info(bpy.path.abspath(load_path))
+    scene_name = blend_info.active_scene if blend_info != None else None
+
+    old_libraries = set(bpy.data.libraries)
+    scene_count = 0
+    try:
+        with bpy.data.libraries.load(load_path, link=True) as (data_from, data_to):
+            scene_count = len(data_from.scenes)
+            if scene_name == None and scene_count == 1:
+                scene_name = data_from.scenes[0]
+            if scene_name in data_from.scenes:
+                data_to.scenes = list(data_from.scenes)
+                data_to.node_groups = list(data_from.node_groups)
+                data_to.linestyles = list(data_from.linestyles)
+    except Exception as e:
+        print(f"Can't link {load_path} : {e}")
+        return None
+
+    new_libraries = [lib for lib in bpy.data.libraries if lib not in old_libraries]
+    try:
+        scenes = [scene for scene in data_to.scenes if scene != None and scene.library != None]
+        active_scenes = [scene for scene in scenes if scene.name == scene_name]
+        if len(active_scenes) != 1:
+            print(f"Can't find the active scene in {load_path} ({scene_count} scenes).")
+            return None
+
+        return compositing_save.get_compositing_options(scenes, active_scenes[0], active_scenes[0].library, is_compact=True)
+    except Exception as e:
+        print(f"Can't get Compositing from {load_path} : {e}")
+        return None
+    finally:
+        # リンクしたデータはライブラリごと削除
+        for lib in new_libraries:
+            bpy.data.libraries.remove(lib)
+        
+# -- Get --
+
+def _calc_view_layer_name(view_layer_name, scene=None):
+    """ プロパティを元にViewLayer名を取得
+
+    Args:
+        view_layer_name (str): 元ViewLayer名
+        scene (bpy.types.Scene): 対象シーン (Noneは現在のシーン)
+
+    Returns:
+        str: ViewLayer名
+    """
+    if scene == None:
+        scene = bpy.context.scene
+    props = scene.compositing_io
+    def_layer = get_default_view_layer(scene=scene)
+    if def_layer == None:
+        return view_layer_name
+
+    if view_layer_name == def_layer.name or props.add_view_layer_name == "":
+        return view_layer_name
+    else:
+        return props.add_view_layer_name + view_layer_name
+        
+# -- Set --
+        
+def _create_nodes(plan, tree, is_clear, scene):
+    """ 反映手順からノードを生成
+
+    Args:
+        plan (compositing_plan.ApplyPlan): 反映手順
+        tree (bpy.types.NodeTree): ノードツリー
+        is_clear (bool): 既存のノードをクリアするか？
+        scene (bpy.types.Scene): 対象シーン
+
+    Returns:
+        dict: 元のノード名 -> 生成したノード
+    """
+    source_nodes = {}
+    if is_clear:
+        tree.nodes.clear()
+
+    # 名前が被るかはノード毎にツリーを探さず、最初に集めた名前で判定
+    used_names = {n.name for n in tree.nodes}
+    name_counters = {}
+    for spec in plan.nodes:
+        # 自動取得したプロパティの設定 (名前は生成時に設定済み)
+        node = _new_node(tree, spec.source_name, spec.auto_prop, used_names, name_counters)
+        if node == None:
+            continue
+        spec.setters.apply(node)
+        _set_sp_property(node, spec, scene)
+
+        source_nodes[spec.source_name] = node
+
+    # Parentは後から生成されるノードもあるので全てのノードが揃ってから設定
+    for spec in plan.nodes:
+        node = source_nodes.get(spec.source_name)
+        if node == None or spec.parent_name == None:
+            continue
+        parent = _get_node(source_nodes, spec.parent_name)
+        if parent != None:
+            node.parent = parent
+
+    return source_nodes
+
+def _new_node(tree, source_name, auto_prop, used_names, name_counters):
+    """ ノードを生成して元のノード名を記録
+        ※名前は元のノード名で、既存のノードと被った場合だけ連番を付ける
+
+    Args:
+        tree (bpy.types.NodeTree): ノードツリー
+        source_name (str): 元のノード名
+        auto_prop (Dictionary): 自動取得したプロパティ
+        used_names (set): 使用済みのノード名 (生成したノードの名前を追加する)
+        name_counters (dict): 連番を除いたノード名 -> 最後に付けた連番
+
+    Returns:
+        bpy.types.Node: 生成したノード (生成出来ない場合はNone)
+    """
+    try:
+        node = tree.nodes.new(type=auto_prop["bl_idname"])
+    except:
+        print(auto_prop)
+        compositing_profile.add_error("new_node")
+        return None
+
+    name = _create_unique_name(source_name, used_names, name_counters)
+    if node.name != name:
+        node.name = name
+
+    # 名前は変わることがあるので、差分反映時の対応付け用に元の名前を記録
+    node[NODE_SOURCE_NAME_PROP] = source_name
+    return node
+
+def _set_sp_property(node, spec, scene, is_diff=False):
+    """ ノードの種類毎に手動で設定が必要なプロパティを設定
+
+    Args:
+        node (bpy.types.Node): 対象ノード
+        spec (compositing_plan.NodeSpec): ノードの設定
+        scene (bpy.types.Scene): 対象シーン
+        is_diff (bool): 差分反映か？ (名前、選択状態は書き換えない)
+
+    Returns:
+        int: 設定したプロパティの数
+    """
+    sp_prop = spec.sp_prop
+    change_count = 0
+
+    # Groupの場合
+    if node.bl_idname == "CompositorNodeGroup":
+        if sp_prop["group_name"] in bpy.data.node_groups:
+            node_tree = bpy.data.node_groups[sp_prop["group_name"]]
+            if node.node_tree != node_tree:
+                node.node_tree = node_tree
+                change_count += 1
+    # FileOutputの場合
+    elif node.bl_idname == "CompositorNodeOutputFile":
+        change_count += spec.format_setters.apply(node.format, RECONCILE_IGNORE_PROPERTIES if is_diff else ())
+        if node.format.file_format == "OPEN_EXR_MULTILAYER":
+            slots = node.layer_slots
+            names = sp_prop["layer_slots"]
+            current_names = [slot.name for slot in slots]
+        else:
+            slots = node.file_slots
+            names = sp_prop["file_slots"]
+            current_names = [slot.path for slot in slots]
+        if current_names != names:
+            slots.clear()
+            for name in names:
+                slots.new(name)
+            change_count += 1
+    # RenderLayersの場合
+    elif node.bl_idname == "CompositorNodeRLayers":
+        layer = _calc_view_layer_name(spec.auto_prop["layer"], scene)
+        if node.layer != layer:
+            node.layer = layer
+            change_count += 1
+
+    change_count += _set_inputs(node, sp_prop)
+
+    return change_count
+
+def _set_inputs(node, sp_prop):
+    """ inputの設定
+        ※値が異なるものだけ設定する
+
+    Args:
+        node (bpy.types.Node): 対象ノード
+        sp_prop (dict): 設定プロパティ
+
+    Returns:
+        int: 設定したinputの数
+    """
+    return compositing_socket.set_input_values(node, sp_prop)
+
+def _create_links(plan, tree, is_clear, source_nodes):
+    """ リンク情報を生成
+
+    Args:
+        plan (compositing_plan.ApplyPlan): 反映手順
+        tree (bpy.types.NodeTree): ノードツリー
+        is_clear (bool): 既存のリンクをクリアするか？
+        source_nodes (dict): 元のノード名 -> 生成したノード
+
+    Returns:
+        bpy.types.NodeLinks: 生成したリンク
+    """
+    if is_clear:
+        tree.links.clear()
+    links = []
+
+    # リンク毎にソケットを探すと遅いので索引を作成
+    socket_indexes = {}
+
+    for link_spec in plan.links:
+        sockets = _get_link_sockets(socket_indexes, source_nodes, link_spec)
+        if sockets == None:
+            continue
+        link = tree.links.new(sockets[1], sockets[0])
+        links.append(link)
+
+    return links
+
+def _reconcile_links(plan, tree, source_nodes):
+    """ 既存のリンクと比較して差分だけリンクを追加、削除
+
+    Args:
+        plan (compositing_plan.ApplyPlan): 反映手順
+        tree (bpy.types.NodeTree): ノードツリー
+        source_nodes (dict): 元のノード名 -> ノード
+
+    Returns:
+        (int, int): (追加したリンク数, 削除したリンク数)
+    """
+    socket_indexes = {}
+    required_links = []
+    for link_spec in plan.links:
+        sockets = _get_link_sockets(socket_indexes, source_nodes, link_spec)
+        if sockets == None:
+            continue
+        required_links.append(sockets)
+
+    # 不要なリンクを削除
+    required_set = set(required_links)
+    existing_set = set()
+    removed = 0
+    for link in list(tree.links):
+        key = (link.from_socket, link.to_socket)
+        if key in required_set:
+            existing_set.add(key)
+            continue
+        tree.links.remove(link)
+        removed += 1
+
+    # 足りないリンクを追加
+    added = 0
+    for output_socket, input_socket in required_links:
+        if (output_socket, input_socket) in existing_set:
+            continue
+        tree.links.new(input_socket, output_socket)
+        added += 1
+
+    return added, removed
+
+def _set_view_layer_props(plan, scene):
+    """ 各ViewLayer毎のプロパティを設定
+
+    Args:
+        plan (compositing_plan.ApplyPlan): 反映手順
+        scene (bpy.types.Scene): 対象シーン
+    """
+    props = scene.compositing_io
+
+    for vl_spec in plan.view_layers:
+        vl_name = _calc_view_layer_name(vl_spec.name, scene)
+        vl = scene.view_layers[vl_name]
+
+        # Passes, Filter 設定
+        # 名前は書き換えない
+        vl_spec.setters.apply(vl)
+
+        # AOV 設定
+        if hasattr(vl, "aovs"):
+            # 2.93以降用
+            for aov in [aov for aov in vl.aovs]:
+                # print( "  --> ", len( vl.aovs ), aov )
+                vl.active_aov_index = 0
+            for name, aov_type in vl_spec.aovs:
+                # 追加済みは追加しない
+                if name in vl.aovs:
+                    continue
+                aov = vl.aovs.add()
+                aov.name = name
+                aov.type = aov_type
+        else:
+            # 2.91以前用
+            vl.cycles.aovs.clear()
+            for name, aov_type in vl_spec.aovs:
+                # 追加済みは追加しない
+                if name in vl.cycles.aovs:
+                    continue
+                aov = vl.cycles.aovs.add()
+                aov.name = name
+                aov.type = aov_type
+
+        # FreeStyle 設定
+        if not scene.render.use_freestyle:
+            continue
+        if vl_spec.freestyle_setters == None:
+            continue
+        vl_spec.freestyle_setters.apply(vl.freestyle_settings)
+
+        if vl_spec.linesets == None:
+            continue
+
+        # LineSetを生成するとLineStyleが自動で生成されるので生成前の一覧をキャッシュ
+        cache_linestyles = [ls.name for ls in bpy.data.linestyles]
+
+        # FreeStyleのLineSet設定
+        if props.is_clear_freestyle and vl.freestyle_settings.linesets != None:
+            for l in vl.freestyle_settings.linesets:
+                vl.freestyle_settings.linesets.remove(l)
+        for name, setters, linestyle_name in vl_spec.linesets:
+            new_ls = vl.freestyle_settings.linesets.new(name)
+            setters.apply(new_ls)
+
+            # LineStyleの設定
+            if linestyle_name not in bpy.data.linestyles:
+                continue
+            new_ls.linestyle = bpy.data.linestyles[linestyle_name]
+            
+        # 自動で生成されたLineStyleを削除
+        for ls in bpy.data.linestyles:
+            if ls.name in cache_linestyles:
+                continue
+            
+            bpy.data.linestyles.remove(ls)
+
+# -- Get --
+
+def _collect_upstream_nodes(json_data, node_names):
+    """ 指定したノードから上流を辿って必要なノード名を集める
+
+    Args:
+        json_data (Dictionary): Compositing設定
+        node_names (str[]): 起点のノード名
+
+    Returns:
+        set: 必要なノード名
+    """
+    nodes_data = json_data["nodes"]
+
+    # 接続先 -> 接続元, Parent -> 子の索引を1度だけ作成
+    from_nodes = {}
+    for link_prop in json_data["links"].values():
+        from_nodes.setdefault(link_prop["to_node"], []).append(link_prop["from_node"])
+    children = {}
+    for key, node_prop in nodes_data.items():
+        parent_name = node_prop["sp_prop"].get("parent")
+        if parent_name != None:
+            children.setdefault(parent_name, []).append(key)
+
+    # 指定したFrameの中のノードは起点に含める
+    # (上流を辿って含まれたFrameの中は含めない)
+    start_names = set()
+    stack = list(node_names)
+    while len(stack) > 0:
+        name = stack.pop()
+        if name in start_names:
+            continue
+        start_names.add(name)
+        stack.extend(children.get(name, []))
+
+    # リンクの接続元を辿る
+    selected = set()
+    stack = list(start_names)
+    while len(stack) > 0:
+        name = stack.pop()
+        if name in selected or name not in nodes_data:
+            continue
+        selected.add(name)
+        stack.extend(from_nodes.get(name, []))
+
+    # 含まれたノードのParentを辿る
+    for name in list(selected):
+        parent_name = nodes_data[name]["sp_prop"].get("parent")
+        while parent_name != None and parent_name in nodes_data and parent_name not in selected:
+            selected.add(parent_name)
+            parent_name = nodes_data[parent_name]["sp_prop"].get("parent")
+
+    return selected
+
+def _select_render_layers(render_layer_settings, layer_names):
+    """ 指定したViewLayerだけに絞ったRenderLayerの設定を取得
+        ※LineStyleも残したViewLayerのLineSetが使うものだけにする
+
+    Args:
+        render_layer_settings (Dictionary): RenderLayerの設定
+        layer_names (set): 残すViewLayer名
+
+    Returns:
+        Dictionary: 絞り込んだRenderLayerの設定
+    """
+    settings = dict(render_layer_settings)
+    if "render_layer_props" not in settings:
+        return settings
+
+    render_layer_props = {
+        name: rl_prop
+        for name, rl_prop in settings["render_layer_props"].items()
+        if name in layer_names
+    }
+    settings["render_layer_props"] = render_layer_props
+
+    linestyle_names = set()
+    for rl_prop in render_layer_props.values():
+        for ls in rl_prop.get("free_style", {}).get("linesets", {}).values():
+            linestyle_names.add(ls["manual_props"]["linestyle_name"])
+    settings["linestyle_names"] = [name for name in settings.get("linestyle_names", []) if name in linestyle_names]
+
+    return settings
+
+def _get_source_name(node):
+    """ ノードの読み込み元でのノード名を取得
+
+    Args:
+        node (bpy.types.Node): ノード
+
+    Returns:
+        str: 読み込み元でのノード名
+    """
+    source_name = node.get(NODE_SOURCE_NAME_PROP)
+    if source_name != None:
+        return source_name
+
+    # 記録がない場合は、以前のバージョンで読み込み時に付けた「[uuid]」を除いた名前
+    name = node.name
+    if name.endswith("]") and "[" in name:
+        return name[:name.rindex("[")]
+    return name
+
+def _create_unique_name(name, used_names, name_counters):
+    """ 使用済みの名前と被らないノード名を作成
+        ※被った場合だけBlenderと同じ「.001」形式の連番を付ける
+          (連番は名前毎に覚えておき、続きから探すので同じ名前を繰り返し読み込んでも遅くならない)
+
+    Args:
+        name (str): 元のノード名
+        used_names (set): 使用済みのノード名 (作成した名前を追加する)
+        name_counters (dict): 連番を除いたノード名 -> 最後に付けた連番
+
+    Returns:
+        str: ノード名
+    """
+    if name not in used_names:
+        used_names.add(name)
+        return name
+
+    # 「Blur.001」が被った場合は「Blur.001.001」ではなく「Blur.002」以降にする
+    match = NODE_NAME_NUMBER_PATTERN.match(name)
+    base_name = match.group(1) if match != None else name
+    number = name_counters.get(base_name, 0)
+    while True:
+        number += 1
+        unique_name = f"{base_name}.{number:03d}"
+        if unique_name not in used_names:
+            break
+    name_counters[base_name] = number
+    used_names.add(unique_name)
+
+    return unique_name
+
+def _create_socket_index(node, io_prop_name):
+    """ identifierからソケットを引く索引を作成
+        ※同じidentifierが複数ある場合は特定出来ないのでNone
+
+    Args:
+        node (bpy.types.Node): ノード
+        io_prop_name (str): 入出力のプロパティ名
+
+    Returns:
+        dict: identifier -> ソケット
+    """
+    socket_index = {}
+    for s in getattr(node, io_prop_name):
+        if s.identifier in socket_index:
+            socket_index[s.identifier] = None
+        else:
+            socket_index[s.identifier] = s
+
+    return socket_index
+
+def _get_node(source_nodes, name):
+    """ ノードを取得
+
+    Args:
+        source_nodes (dict): 元のノード名 -> ノード
+        name (str): 元のノード名
+
+    Returns:
+        bpy.types.Node: ノード
+    """
+    node = source_nodes.get(name)
+    if node == None:
+        print(f"[{name}]のノードがありません")
+        return None
+
+    return node
+
+def _get_socket(socket_indexes, node, socket_name, io_prop_name):
+    """ ソケットを取得
+
+    Args:
+        socket_indexes (dict): (ノード名, 入出力のプロパティ名) -> ソケットの索引
+        node (bpy.types.Node): ノード
+        socket_name (str): ソケット名
+        io_prop_name (str): 入出力のプロパティ名
+
+    Returns:
+        NodeSocket: ソケット
+    """
+    if node == None:
+        return None
+
+    if not hasattr(node, io_prop_name):
+        print(f"[{node}]に[{io_prop_name}]のプロパティがありません.")
+        return None
+    
+    # Rerouteの場合
+    # リンクするとソケットが変わるので索引は使わない(ソケットは入出力1つずつ)
+    if node.bl_idname == "NodeReroute":
+        for s in getattr(node, io_prop_name):
+            # 生成直後はidentifierがoutputだが、入力が入ると「output.001」に変わる
+            # Rerouteのoutputは必ず1つなので、「.001」を除外して比較
+            # identifier, socket_nameの大文字、小文字が生成時に変わっていることがあるので全て小文字に
+            if str.lower(s.identifier.split(".")[0]) == str.lower(socket_name.split(".")[0]):
+                return s
+        return None
+
+    # FileOutputの入力はlayer_slots, file_slotsの名前がidentifierになっている
+    key = (node.name, io_prop_name)
+    socket_index = socket_indexes.get(key)
+    if socket_index == None:
+        socket_index = _create_socket_index(node, io_prop_name)
+        socket_indexes[key] = socket_index
+
+    socket = socket_index.get(socket_name)
+    if socket == None:
+        print(f"[{node.name}]の{io_prop_name}に[{socket_name}]が1個ではありません")
+        return None
+
+    return socket
+
+def _get_link_sockets(socket_indexes, source_nodes, link_spec):
+    """ リンクの接続元、接続先のソケットを取得
+
+    Args:
+        socket_indexes (dict): ノード -> ソケットの索引
+        source_nodes (dict): 元のノード名 -> ノード
+        link_spec (tuple): (接続元ノード名, 接続元ソケット, 接続先ノード名, 接続先ソケット)
+
+    Returns:
+        (bpy.types.NodeSocket, bpy.types.NodeSocket): (接続元ソケット, 接続先ソケット) (見つからない場合はNone)
+    """
+    from_name, from_socket, to_name, to_socket = link_spec
+    to_node = _get_node(source_nodes, to_name)
+    input_socket = _get_socket(socket_indexes, to_node, to_socket, "inputs")
+    from_node = _get_node(source_nodes, from_name)
+    output_socket = _get_socket(socket_indexes, from_node, from_socket, "outputs")
+    if input_socket == None or output_socket == None:
+        print(f'[{from_name}]{from_socket} -> [{to_name}]{to_socket} is link failed!')
+        compositing_profile.add_error("create_links")
+        return None
+
+    return output_socket, input_socket
+
+
+# -- Prefetch --
+
+def _take_prefetch(load_path):
+    """ 同じファイルの先読みを読み込みに引き継ぐ
+        ※読み込み時に結果が書き換わっても影響しないように先読みの結果は1度だけ使う
+
+    Args:
+        load_path (str): 読み込みパス
+
+    Returns:
+        LoadJob: 先読み (使える先読みがない場合はNone)
+    """
+    global _prefetch_job
+
+    job = _prefetch_job
+    if job == None or not _is_same_prefetch(job, load_path):
+        return None
+    _prefetch_job = None
+    job.take_over()
+
+    return job
+
+def _is_same_prefetch(job, load_path):
+    """ 先読みの結果がそのまま使えるか？
+
+    Args:
+        job (LoadJob): 先読み
+        load_path (str): 読み込みパス
+
+    Returns:
+        bool: True = Yes, False = No
+    """
+    if job.is_cancelled:
+        return False
+    if os.path.normcase(os.path.abspath(job.load_path)) != os.path.normcase(os.path.abspath(load_path)):
+        return False
+    # 先読みを始めた後に元ファイルが保存し直された
+    if _get_file_signature(load_path) != job.file_signature:
+        return False
+    # 失敗した場合は読み込み時に出力し直す
+    if job.is_done() and job.result == None:
+        return False
+
+    return True
+
+def _get_file_signature(path):
+    """ ファイルが変わったかの判定用にサイズ、更新日時を取得
+
+    Args:
+        path (str): ファイルパス
+
+    Returns:
+        (int, int): (サイズ, 更新日時(ns)) (ファイルがない場合はNone)
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return stat.st_size, stat.st_mtime_ns
+
+# -- Helper --
+
+def _read_compositing_option(path, load_path, sections=None):
+    """ 出力したCompositing設定を読み込み
+
+    Args:
+        path (str): 出力したファイルのパス
+        load_path (str): 読み込み元ファイルのパス(ログ用)
+        sections (str[]): 読み込むセクション (Noneは全て)
+
+    Returns:
+        Dictionary: Compositing設定
+    """
+    try:
+        with compositing_profile.phase("parse"):
+            json_data = comp_util.read_compositing_option(path, sections)
+    except Exception as e:
+        print(f"Can't load Compositing from {load_path} : {e}")
+        compositing_profile.add_error("parse")
+        return None
+
+    return json_data
+
+def _remove_temp_file(path):
+    """ 一時ファイルを削除
+
+    Args:
+        path (str): 一時ファイルのパス
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _show_log(operator, log, log_type="ERROR"):
+    if operator != None:
+        operator.report({log_type}, log)
+    else:
+        print(log)
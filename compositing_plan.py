@@ -0,0 +1,267 @@
+import bpy
+from collections import OrderedDict
+from . import compositing_io_util as comp_util
+from . import compositing_profile
+
+# ----------------------------------------------------------------------------------------------------
+# 定数
+# ----------------------------------------------------------------------------------------------------
+
+# メモリに保持するコンパイル済みの設定の数
+PLAN_CACHE_SIZE = 8
+# ノードの生成時に設定済み、または代入出来ないプロパティ
+NODE_IGNORE_PROPERTIES = ("name", "bl_idname")
+# ノードの種類毎に手動で設定するので自動では設定しないプロパティ
+NODE_MANUAL_PROPERTIES = {
+    # ViewLayer名は読み込み時に変わる
+    "CompositorNodeRLayers": ("layer",),
+}
+# ViewLayerで自動では設定しないプロパティ
+VIEW_LAYER_IGNORE_PROPERTIES = ("name", "cycles", "aovs")
+
+# ----------------------------------------------------------------------------------------------------
+# Class
+# ----------------------------------------------------------------------------------------------------
+
+class PropertySetters:
+    """ そのまま代入出来るプロパティの設定
+        ※代入出来るかはbl_rnaで1度だけ検証し、値も代入出来る型に変換しておく
+          (型の定義が取得出来ない場合は最初に設定する対象で検証する)
+    """
+    def __init__(self, values, struct_name=None, is_compact=False, ignore_props=()):
+        self.items = None
+        self._values = values
+        self._is_compact = is_compact
+        self._ignore_props = ignore_props
+
+        rna_owner = getattr(bpy.types, struct_name, None) if struct_name != None else None
+        if rna_owner != None:
+            self.compile(rna_owner)
+
+    def compile(self, rna_owner):
+        """ 代入出来るプロパティだけに絞り込み
+
+        Args:
+            rna_owner (bpy.types.bpy_struct): bl_rnaを持つ型、またはオブジェクト
+        """
+        descriptors = {attr: default for attr, _, default in comp_util.get_property_descriptors(rna_owner)}
+
+        values = dict(self._values)
+        if self._is_compact:
+            # 省略されたプロパティはデフォルト値で補完する
+            for attr, default in descriptors.items():
+                if default != None and attr not in values:
+                    values[attr] = default
+
+        items = []
+        for attr, val in values.items():
+            if attr in self._ignore_props or attr not in descriptors:
+                continue
+            # Vector, Colorはリストで保存されている
+            if not comp_util.can_substitute_type(val):
+                val = tuple(val)
+            items.append((attr, val))
+
+        self.items = tuple(items)
+        self._values = None
+
+    def apply(self, obj, ignore_props=()):
+        """ プロパティを設定
+            ※値が異なるものだけ設定する
+
+        Args:
+            obj (bpy.types.bpy_struct): 設定するオブジェクト
+            ignore_props (str[]): 設定しないプロパティ
+
+        Returns:
+            int: 設定したプロパティの数
+        """
+        if self.items == None:
+            self.compile(obj)
+
+        change_count = 0
+        for attr, val in self.items:
+            if attr in ignore_props:
+                continue
+            # 代入する度にツリーの更新が走るので、同じ値は代入しない
+            # (補完したデフォルト値は生成直後なら同じ値になる)
+            if _is_same_value(getattr(obj, attr), val):
+                continue
+            try:
+                setattr(obj, attr, val)
+            except (AttributeError, TypeError, ValueError) as e:
+                # Enumの項目がBlenderのバージョンで変わった場合など
+                print(f"{attr} : {e}")
+                compositing_profile.add_error("set_auto_property")
+                continue
+            change_count += 1
+
+        compositing_profile.add_count("properties", change_count)
+        return change_count
+
+class NodeSpec:
+    """ 生成するノードの設定
+    """
+    def __init__(self, source_name, node_prop, is_compact=False):
+        auto_prop = node_prop["auto_prop"]
+        sp_prop = node_prop["sp_prop"]
+
+        self.source_name = source_name
+        self.bl_idname = auto_prop["bl_idname"]
+        self.auto_prop = auto_prop
+        self.sp_prop = sp_prop
+        self.parent_name = sp_prop.get("parent")
+        self.setters = PropertySetters(
+            auto_prop,
+            self.bl_idname,
+            is_compact,
+            NODE_IGNORE_PROPERTIES + NODE_MANUAL_PROPERTIES.get(self.bl_idname, ()),
+        )
+        # FileOutputの出力形式
+        self.format_setters = PropertySetters(sp_prop["format"], "ImageFormatSettings", is_compact) if "format" in sp_prop else None
+
+class ViewLayerSpec:
+    """ 設定するViewLayerの設定
+    """
+    def __init__(self, name, rl_prop, is_compact=False):
+        self.name = name
+        self.setters = PropertySetters(rl_prop["vl_simple"], "ViewLayer", is_compact, VIEW_LAYER_IGNORE_PROPERTIES)
+        self.aovs = tuple((aov["name"], aov["type"]) for aov in rl_prop["aovs"])
+
+        self.freestyle_setters = None
+        # (LineSet名, プロパティの設定, LineStyle名)[] (Noneは設定しない)
+        self.linesets = None
+        fs = rl_prop.get("free_style")
+        if fs == None:
+            return
+        self.freestyle_setters = PropertySetters(fs["fs_simple"], "FreestyleSettings", is_compact)
+        if "linesets" in fs:
+            self.linesets = tuple(
+                (
+                    ls["auto_props"]["name"],
+                    PropertySetters(ls["auto_props"], "FreestyleLineSet", is_compact),
+                    ls["manual_props"]["linestyle_name"],
+                )
+                for ls in fs["linesets"].values()
+            )
+
+class ApplyPlan:
+    """ 読み込んだCompositing設定をコンパイルした反映手順
+        ※JSONの解釈、プロパティの検証は作成時に1度だけ行い、何度でも別のScene、ファイルに反映出来る
+    """
+    def __init__(self):
+        self.is_compact = False
+        # 生成順のノードの設定
+        self.nodes = []
+        # 元のノード名 -> ノードの設定
+        self.node_specs = {}
+        # (接続元ノード名, 接続元ソケット, 接続先ノード名, 接続先ソケット)[]
+        self.links = ()
+        # ViewLayerの設定 (読み込んでいない場合はNone)
+        self.view_layers = None
+        self.use_freestyle = None
+
+# ----------------------------------------------------------------------------------------------------
+# Public Functions
+# ----------------------------------------------------------------------------------------------------
+
+# キー -> コンパイルした反映手順 (最近使った順)
+_plans = OrderedDict()
+
+# -- Get --
+
+def compile_plan(json_data):
+    """ Compositing設定を反映手順にコンパイル
+        ※Blenderにないノードは除外する
+
+    Args:
+        json_data (Dictionary): Compositing設定
+
+    Returns:
+        ApplyPlan: 反映手順
+    """
+    plan = ApplyPlan()
+    plan.is_compact = json_data.get("compact", False)
+
+    for source_name, node_prop in json_data.get("nodes", {}).items():
+        bl_idname = node_prop["auto_prop"]["bl_idname"]
+        if not hasattr(bpy.types, bl_idname):
+            print(f"[{source_name}] {bl_idname} is not found.")
+            compositing_profile.add_error("compile_plan")
+            continue
+        spec = NodeSpec(source_name, node_prop, plan.is_compact)
+        plan.nodes.append(spec)
+        plan.node_specs[source_name] = spec
+
+    plan.links = tuple(
+        (link_prop["from_node"], link_prop["from_socket"], link_prop["to_node"], link_prop["to_socket"])
+        for link_prop in json_data.get("links", {}).values()
+    )
+
+    render_layers = json_data.get("render_layers")
+    if render_layers != None and "render_layer_props" in render_layers:
+        plan.view_layers = tuple(
+            ViewLayerSpec(name, rl_prop, plan.is_compact)
+            for name, rl_prop in render_layers["render_layer_props"].items()
+        )
+        plan.use_freestyle = render_layers.get("scene_use_freestyle")
+
+    return plan
+
+def get_plan(json_data, key=None):
+    """ コンパイル済みの反映手順を取得
+        ※同じキーの設定はコンパイルし直さない
+
+    Args:
+        json_data (Dictionary): Compositing設定
+        key (str): 設定を識別するキー
+            (Noneは保持しない。Dictionaryは書き換えられることがあるので中身が同じとは限らない)
+
+    Returns:
+        ApplyPlan: 反映手順
+    """
+    plan = _plans.get(key) if key != None else None
+    if plan != None:
+        _plans.move_to_end(key)
+        return plan
+
+    with compositing_profile.phase("compile_plan"):
+        plan = compile_plan(json_data)
+    if key == None:
+        return plan
+
+    _plans[key] = plan
+    while len(_plans) > PLAN_CACHE_SIZE:
+        _plans.popitem(last=False)
+
+    return plan
+
+def clear_plans():
+    """ コンパイル済みの反映手順を全て削除
+    """
+    _plans.clear()
+
+# ----------------------------------------------------------------------------------------------------
+# Private Functions
+# ----------------------------------------------------------------------------------------------------
+
+# -- Helper --
+
+def _is_same_value(current, val):
+    """ 現在の値と設定する値が同じか？
+        ※設定する値はコンパイル時に変換済み
+
+    Args:
+        current (Object): 現在の値
+        val (Object): 設定する値
+
+    Returns:
+        bool: True = Yes, False = No
+    """
+    if type(val) is tuple:
+        try:
+            return tuple(current) == val
+        except TypeError:
+            return False
+
+    return current == val
@@ -0,0 +1,217 @@
+import contextlib
+import json
+import threading
+import time
+
+# ----------------------------------------------------------------------------------------------------
+# 定数
+# ----------------------------------------------------------------------------------------------------
+
+# ログに出力するデータの形式を変えたら上げる
+PROFILE_VERSION = 1
+
+# ----------------------------------------------------------------------------------------------------
+# Class
+# ----------------------------------------------------------------------------------------------------
+
+class LoadProfile:
+    """ 読み込みの処理毎の時間、件数、握りつぶした例外の数の記録
+        ※入れ子になった処理はそれぞれの時間に含まれる
+    """
+    def __init__(self):
+        self.start_time = time.time()
+        self.seconds = 0.0
+        self.phases = {}
+        self.counts = {}
+        self.errors = {}
+        self.info = {}
+        self._start_counter = time.perf_counter()
+        # 並列での出力中に別スレッドから記録されることがある
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """ 処理の時間を記録
+            ※同じ名前の処理は合計する
+
+        Args:
+            name (str): 処理名
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start_time)
+
+    def add_time(self, name, seconds):
+        """ 別に計測した処理の時間を記録
+            ※バックグラウンドで行った処理など、phaseで囲めない処理用
+
+        Args:
+            name (str): 処理名
+            seconds (float): 時間(秒)
+        """
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_count(self, name, count=1):
+        """ 件数を記録
+
+        Args:
+            name (str): 項目名
+            count (int): 件数
+        """
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + count
+
+    def add_error(self, name, count=1):
+        """ 握りつぶした例外の数を記録
+
+        Args:
+            name (str): 発生した処理名
+            count (int): 件数
+        """
+        with self._lock:
+            self.errors[name] = self.errors.get(name, 0) + count
+
+    def finish(self):
+        """ 全体の時間を確定
+        """
+        self.seconds = time.perf_counter() - self._start_counter
+
+    def to_dict(self):
+        """ ログ出力用のDictionaryを取得
+
+        Returns:
+            Dictionary: 記録した内容
+        """
+        return {
+            "version": PROFILE_VERSION,
+            "start_time": self.start_time,
+            "seconds": self.seconds,
+            "phases": dict(self.phases),
+            "counts": dict(self.counts),
+            "errors": dict(self.errors),
+            "info": dict(self.info),
+        }
+
+    def get_summary(self):
+        """ オペレーターのレポート用の1行の概要を取得
+
+        Returns:
+            str: 概要
+        """
+        items = [f"Total : {self.seconds:.2f} sec"]
+        if len(self.phases) > 0:
+            items.append(", ".join(f"{name} {seconds:.3f}" for name, seconds in self.phases.items()))
+        if len(self.counts) > 0:
+            items.append(", ".join(f"{name} {count}" for name, count in self.counts.items()))
+        error_count = sum(self.errors.values())
+        if error_count > 0:
+            items.append(f"Errors : {error_count} (" + ", ".join(f"{name} {count}" for name, count in self.errors.items()) + ")")
+
+        return " / ".join(items)
+
+    def write(self, path):
+        """ ログファイルに1行追記 (JSON Lines)
+
+        Args:
+            path (str): ログファイルのパス
+        """
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.to_dict()) + "\n")
+
+# ----------------------------------------------------------------------------------------------------
+# Public Functions
+# ----------------------------------------------------------------------------------------------------
+
+_current_profile = None
+
+# -- Set --
+
+def start_profile():
+    """ 記録を開始
+        ※以降は終了するまでphase, add_count, add_errorが記録される
+
+    Returns:
+        LoadProfile: 記録先
+    """
+    global _current_profile
+    _current_profile = LoadProfile()
+
+    return _current_profile
+
+def stop_profile():
+    """ 記録を終了
+
+    Returns:
+        LoadProfile: 記録した内容 (開始していない場合はNone)
+    """
+    global _current_profile
+    profile = _current_profile
+    _current_profile = None
+    if profile != None:
+        profile.finish()
+
+    return profile
+
+def phase(name):
+    """ 処理の時間を記録
+        ※記録していない場合は何もしない
+
+    Args:
+        name (str): 処理名
+    """
+    profile = _current_profile
+    if profile == None:
+        return contextlib.nullcontext()
+
+    return profile.phase(name)
+
+def add_time(name, seconds):
+    """ 別に計測した処理の時間を記録
+        ※記録していない場合は何もしない
+
+    Args:
+        name (str): 処理名
+        seconds (float): 時間(秒)
+    """
+    profile = _current_profile
+    if profile != None:
+        profile.add_time(name, seconds)
+
+def add_count(name, count=1):
+    """ 件数を記録
+        ※記録していない場合は何もしない
+
+    Args:
+        name (str): 項目名
+        count (int): 件数
+    """
+    profile = _current_profile
+    if profile != None:
+        profile.add_count(name, count)
+
+def add_error(name, count=1):
+    """ 握りつぶした例外の数を記録
+        ※記録していない場合は何もしない
+
+    Args:
+        name (str): 発生した処理名
+        count (int): 件数
+    """
+    profile = _current_profile
+    if profile != None:
+        profile.add_error(name, count)
+
+def set_info(name, value):
+    """ 付加情報を記録
+        ※記録していない場合は何もしない
+
+    Args:
+        name (str): 項目名
+        value (Object): 値 (JSONで出力出来るもの)
+    """
+    profile = _current_profile
+    if profile != None:
+        profile.info[name] = value
@@ -1,302 +1,427 @@
-import bpy
-from . import compositing_io_util as comp_util
-
-# ----------------------------------------------------------------------------------------------------
-# 定数
-# ----------------------------------------------------------------------------------------------------
-
-COMPOSITING_OPTION_NAME = "CompositingOption"
-
-# ----------------------------------------------------------------------------------------------------
-# Public Functions
-# ----------------------------------------------------------------------------------------------------
-
-# -- Get --
-
-def get_compositing_option():
-    """ Compositingの設定を取得
-
-    Returns:
-        Dictionary: Compositing設定
-    """
-    # 新規シーンなどはノードがない
-    if bpy.context.scene.node_tree == None:
-        return None
-
-    # 標準情報の設定
-    data = {}
-    data["name"] = COMPOSITING_OPTION_NAME
-
-    # 各プロパティの設定
-    data["render_engine"] = bpy.context.scene.render.engine
-    data["node_groups"] = _get_node_groups_names()
-    data["nodes"] = _get_nodes_property(bpy.context.scene.node_tree)
-    data["links"] = _get_links(bpy.context.scene.node_tree)
-    data["render_layers"] = _search_in_render_layer_all()
-
-    return data
-
-# ----------------------------------------------------------------------------------------------------
-# Private Functions
-# ----------------------------------------------------------------------------------------------------
-
-# -- Get --
-
-def _get_node_groups_names():
-    """ NodeGroupsの名称リストを取得
-
-    Returns:
-        str[]: NodeGroupsの名称リスト
-    """
-    node_groups_names = []
-    
-    for ng in bpy.data.node_groups:
-        if ng.type != "COMPOSITING":
-            continue
-        if ng.library != None:
-            continue
-        
-        node_groups_names.append(ng.name)
-    
-    return node_groups_names
-
-def _get_nodes_property(tree):
-    """ ノードリストのプロパティを取得
-
-    Args:
-        tree (bpy.types.NodeTree): ノードツリー
-
-    Returns:
-        Dictionary: ノードリストのプロパティ
-    """
-    nodes = {}
-    for node in tree.nodes:
-        prop = {}
-        prop["auto_prop"] = _get_auto_property(node)
-
-        sp_prop = {}
-        # Parentの接続
-        if node.parent != None:
-            sp_prop["parent"] = node.parent.name
-        # Groupの場合
-        if node.bl_idname == "CompositorNodeGroup":
-            sp_prop["group_name"] = node.node_tree.name
-        # FileOutputの場合
-        if node.bl_idname == "CompositorNodeOutputFile":
-            sp_prop["format"] = _get_auto_property(node.format)
-            sp_prop["layer_slots"] =  [slot.name for slot in node.layer_slots]
-            sp_prop["file_slots"] =  [slot.path for slot in node.file_slots]
-
-        _get_inputs(node, sp_prop)
-
-        prop["sp_prop"] = sp_prop
-        nodes[node.name] = prop
-
-    return nodes
-
-def _get_inputs(node, sp_prop):
-    """ inputsの取得
-
-    Args:
-        node (bpy.types.Node): 対象ノード
-        sp_prop (dict): 設定プロパティ
-    """
-    if not hasattr(node, "inputs"):
-        return
-    
-    for i in node.inputs:
-        try:
-            if (i.bl_idname == "NodeSocketFloat" or 
-                i.bl_idname == "NodeSocketFloatFactor"):
-                sp_prop[i.identifier] = i.default_value
-            elif i.bl_idname == "NodeSocketColor":
-                sp_prop[i.identifier] = (i.default_value[0], i.default_value[1], i.default_value[2], i.default_value[3])
-        except Exception as e:
-            # FileOutputなどカラーで文字列が入ったりノードに応じて特殊パターンがあるため除外
-            # 特殊パターンは別途ノードを判定して個別対応
-            print(f"[{node.name}] {i.name} <- {i.identifier}  : {e}")
-
-def _get_links(tree):
-    """ リンク情報を取得
-
-    Args:
-        tree (bpy.types.NodeTree): ノードツリー
-
-    Returns:
-        Dictionary: リンク情報
-    """
-    links = {}
-    count = 1
-    for link in tree.links:
-        link_data = {}
-        link_data["from_node"] = link.from_node.name
-        link_data["from_socket"] = link.from_socket.identifier
-        link_data["to_node"] = link.to_node.name
-        # FileOutputの場合にソケット名が生成時にはlayer_slots名になっている
-        if link.to_node.bl_idname == "CompositorNodeOutputFile":
-            index = None
-            for i, input in enumerate(link.to_node.inputs):
-                if input.identifier == link.to_socket.identifier:
-                    index = i
-                    break
-            name = None
-            # OpenEXR MultiLayerだとピンの名前の保存先が異なる
-            if link.to_node.format.file_format == "OPEN_EXR_MULTILAYER":
-                name = link.to_node.layer_slots[index].name
-            else:
-                name = link.to_node.file_slots[index].path
-            link_data["to_socket"] = name
-        else:
-            link_data["to_socket"] = link.to_socket.identifier
-        links[str(count).zfill(3)] = link_data
-        count += 1
-
-    return links
-
-def _get_linestyle_names():
-    """ 全てのLineStyleの名前を取得
-    　　LineStyleは元データからAppend出来るので名前だけ取得
-
-    Returns:
-        Dictionary: 全てのLineStyleの名前
-    """
-    linestyle_names = []
-    for ls in bpy.data.linestyles:
-        linestyle_names.append(ls.name)
-        
-    return linestyle_names
-
-def _search_in_render_layer_all():
-    """ 全てのViewLayerのレンダリングプロパティを取得
-
-    Returns:
-        [type]: [description]
-    """
-    render_layer_settings = {}
-
-    render_layer_settings["scene_use_freestyle"] = bpy.context.scene.render.use_freestyle
-    render_layer_settings["linestyle_names"] = _get_linestyle_names()
-
-    render_layer_props = {}
-    for vl in bpy.context.scene.view_layers:
-        render_layer_props[vl.name] = _search_in_render_layer( vl )
-    render_layer_settings["render_layer_props"] = render_layer_props
-
-    return render_layer_settings
-
-def _search_in_render_layer(vl):
-    """ ViewLayerのレンダリングプロパティを取得
-
-    Args:
-        vl (bpy.type.ViewLayer): ViewLayer
-
-    Returns:
-        Dictionary: ViewLayerのレンダリングプロパティ
-    """
-    render_layer = {}
-
-    # Passes, Filters設定
-    render_layer["vl_simple"] = _get_auto_property(vl)
-
-    # AOV設定
-    aovs = []
-    target_aovs = None
-    if hasattr( vl, "aovs" ):
-        # 2.93以降
-        target_aovs = vl.aovs
-    else:
-        # 2.91以前
-        target_aovs = vl.cycles.aovs
-    for aov in target_aovs:
-        # 既にあったら追加しない
-        target_aov = [a for a in aovs if a["name"] == aov.name]
-        if len(target_aov):
-            continue
-
-        prop = {
-            "name": aov.name
-        ,   "type": aov.type
-        }
-        aovs.append(prop)
-    render_layer["aovs"] = aovs
-
-    # Freestyle設定
-    if vl.freestyle_settings.as_render_pass:
-        fs = {}
-        fs["fs_simple"] = _get_auto_property(vl.freestyle_settings)
-
-        linesets = {}
-        for ls in vl.freestyle_settings.linesets:
-            lineset = {}
-            lineset["auto_props"] = _get_auto_property(ls)
-            lineset["manual_props"] = _get_lineset_manual_props(ls)
-            linesets[ls.name] = lineset
-        fs["linesets"] = linesets
-
-        render_layer["free_style"] = fs
-
-    return render_layer
-
-def _get_lineset_manual_props(lineset):
-    """ LineSetの手動設定が必要なプロパティの取得
-
-    Args:
-        lineset (bpy.types.LineSet): 対象ラインセット
-
-    Returns:
-        Dictionary: LineSetの手動設定が必要なプロパティ
-    """
-    props = {}
-    props["linestyle_name"] = lineset.linestyle.name
-    
-    return props
-
-def _get_auto_property(obj):
-    """ 自動取得出来るプロパティを取得
-
-    Args:
-        obj (Object): プロパティを取得するクラス
-
-    Returns:
-        Dictionary: 自動取得したプロパティ
-    """
-    auto_prop = {}
-
-    for attr in dir(obj):
-        if not hasattr(obj, attr):
-            continue
-        if _is_read_only_property(obj, attr):
-            continue
-
-        val = getattr(obj, attr)
-        # そのまま代入できるものはそのまま
-        if comp_util.can_substitute_type(val):
-            auto_prop[attr] = val
-        # Vectorはそのままdumps出来ないので変換
-        if str(type(val)) == "<class 'Vector'>":
-            auto_prop[attr] = (val[0], val[1])
-        # Color
-        if str(type(val)) == "<class 'Color'>":
-            auto_prop[attr] = (val[0], val[1], val[2])
-            
-    return auto_prop
-
-# -- Check --
-
-def _is_read_only_property(obj, attr):
-    """ 読み取り専用のプロパティか？
-
-    Args:
-        obj (Object): 対象オブジェクト
-        attr (str): プロパティ名
-
-    Returns:
-        bool: True = Yes, Fale = No
-    """
-    is_read_only = False
-    val = getattr(obj, attr)
-    try:
-        setattr(obj, attr, val)
-    except:
-        is_read_only = True
-    return is_read_only
\ No newline at end of file
+import bpy
+from . import compositing_fingerprint
+from . import compositing_io_util as comp_util
+from . import compositing_socket
+
+# ----------------------------------------------------------------------------------------------------
+# 定数
+# ----------------------------------------------------------------------------------------------------
+
+COMPOSITING_OPTION_NAME = "CompositingOption"
+# 出力するデータの形式を変えたら上げる (キャッシュのキーに使用)
+# 2 : デフォルト値を省略するcompact形式を追加
+# 3 : 複数Sceneの設定をまとめて出力する形式を追加
+# 4 : Vector, Int, Booleanのソケットの値を追加
+# 5 : 構成の指紋を追加
+COMPOSITING_OPTION_VERSION = 5
+# ファイル全体の情報で、Scene毎の設定には入れないキー
+OPTION_HEADER_KEYS = ("name", "version", "compact", "source_path")
+# 指紋に含めるLineStyleのモディファイア
+LINESTYLE_MODIFIER_ATTRS = ("color_modifiers", "alpha_modifiers", "thickness_modifiers", "geometry_modifiers")
+
+# ----------------------------------------------------------------------------------------------------
+# Public Functions
+# ----------------------------------------------------------------------------------------------------
+
+# -- Get --
+
+def get_compositing_option(scene=None, library=None, is_compact=False, fingerprint_names=None):
+    """ Compositingの設定を取得
+
+    Args:
+        scene (bpy.types.Scene): 対象シーン (Noneは現在のシーン)
+        library (bpy.types.Library): リンクした元ファイル (Noneは現在のファイル)
+        is_compact (bool): デフォルト値と同じプロパティを省略するか？
+        fingerprint_names (dict): 指紋でノード名の代わりに比較に使う名前 (Noneはそのまま)
+
+    Returns:
+        Dictionary: Compositing設定
+    """
+    if scene == None:
+        scene = bpy.context.scene
+
+    # 新規シーンなどはノードがない
+    if scene.node_tree == None:
+        return None
+
+    # 標準情報の設定
+    data = {}
+    data["name"] = COMPOSITING_OPTION_NAME
+    data["version"] = COMPOSITING_OPTION_VERSION
+    data["compact"] = is_compact
+    # 書き出した設定だけを別のファイルに反映する場合に、NodeGroupsなどのアペンド元に使う
+    data["source_path"] = bpy.path.abspath(library.filepath) if library != None else bpy.data.filepath
+
+    # 各プロパティの設定
+    data["render_engine"] = scene.render.engine
+    data["node_groups"] = _get_node_groups_names(library)
+    data["nodes"] = _get_nodes_property(scene.node_tree, is_compact)
+    data["links"] = _get_links(scene.node_tree)
+    data["render_layers"] = _search_in_render_layer_all(scene, library, is_compact)
+    data["fingerprint"] = _get_fingerprint(data, library, is_compact, fingerprint_names)
+
+    return data
+
+def get_compositing_options(scenes=None, active_scene=None, library=None, is_compact=False):
+    """ 複数SceneのCompositingの設定をまとめて取得
+        ※アクティブなSceneの設定は最上位に、それ以外のSceneはscenesにScene名毎に入れる
+          (1つのSceneの設定としてもそのまま読める)
+
+    Args:
+        scenes (bpy.types.Scene[]): 対象シーン (Noneは全てのシーン)
+        active_scene (bpy.types.Scene): 最上位に入れるシーン (Noneは現在のシーン)
+        library (bpy.types.Library): リンクした元ファイル (Noneは現在のファイル)
+        is_compact (bool): デフォルト値と同じプロパティを省略するか？
+
+    Returns:
+        Dictionary: Compositing設定 (ノードがあるシーンがない場合はNone)
+    """
+    if scenes == None:
+        scenes = [scene for scene in bpy.data.scenes if scene.library == library]
+    if active_scene == None:
+        active_scene = bpy.context.scene
+
+    options = {}
+    for scene in scenes:
+        option = get_compositing_option(scene, library, is_compact)
+        if option != None:
+            options[scene.name] = option
+    if len(options) == 0:
+        return None
+
+    # アクティブなSceneにノードがない場合は最初のSceneを最上位にする
+    active_name = active_scene.name if active_scene != None and active_scene.name in options else next(iter(options))
+    data = options.pop(active_name)
+    data["active_scene"] = active_name
+    data["scenes"] = {
+        name: {key: value for key, value in option.items() if key not in OPTION_HEADER_KEYS}
+        for name, option in options.items()
+    }
+
+    return data
+
+def get_datablock_contents(json_data, library=None):
+    """ 指紋に含めるNodeGroups, LineStyleの中身を取得
+        ※NodeGroupsの中で使っているNodeGroupsも含め、デフォルト値を省略した形式で取得する
+
+    Args:
+        json_data (Dictionary): Compositing設定
+        library (bpy.types.Library): リンクした元ファイル (Noneは現在のファイル)
+
+    Returns:
+        dict: node_groups, linestyles毎に名前 -> 中身 (ファイルにない場合はNone)
+    """
+    group_names, linestyle_names = compositing_fingerprint.get_referenced_datablocks(json_data)
+
+    node_groups = {}
+    while len(group_names) > 0:
+        name = group_names.pop()
+        if name in node_groups:
+            continue
+        ng = _find_datablock(bpy.data.node_groups, name, library)
+        if ng == None:
+            node_groups[name] = None
+            continue
+        nodes = _get_nodes_property(ng, is_compact=True)
+        node_groups[name] = {"nodes": nodes, "links": _get_links(ng)}
+        group_names += compositing_fingerprint.get_group_names(nodes)
+
+    linestyles = {}
+    for name in linestyle_names:
+        ls = _find_datablock(bpy.data.linestyles, name, library)
+        linestyles[name] = _get_linestyle_contents(ls) if ls != None else None
+
+    return {"node_groups": node_groups, "linestyles": linestyles}
+
+# ----------------------------------------------------------------------------------------------------
+# Private Functions
+# ----------------------------------------------------------------------------------------------------
+
+# -- Get --
+
+def _get_fingerprint(data, library, is_compact, names=None):
+    """ 構成の指紋を取得
+        ※省略形式かどうかで変わらないように、省略しない形式は取得済みの定義のデフォルト値を省略して揃える
+          (Sceneから取得し直さない)
+
+    Args:
+        data (Dictionary): 取得したCompositing設定
+        library (bpy.types.Library): リンクした元ファイル (Noneは現在のファイル)
+        is_compact (bool): デフォルト値と同じプロパティを省略した設定か？
+        names (dict): ノード名の代わりに比較に使う名前 (Noneはそのまま)
+
+    Returns:
+        dict: 指紋
+    """
+    defaults = None if is_compact else comp_util.get_property_defaults
+    return compositing_fingerprint.get_fingerprint(data, names, get_datablock_contents(data, library), defaults)
+
+def _find_datablock(datablocks, name, library=None):
+    """ 名前と元ファイルが一致するデータブロックを検索
+
+    Args:
+        datablocks (bpy.types.bpy_prop_collection): bpy.data.node_groupsなど
+        name (str): 名前
+        library (bpy.types.Library): リンクした元ファイル (Noneは現在のファイル)
+
+    Returns:
+        bpy.types.ID: データブロック (ない場合はNone)
+    """
+    for datablock in datablocks:
+        if datablock.name == name and datablock.library == library:
+            return datablock
+
+    return None
+
+def _get_linestyle_contents(linestyle):
+    """ 指紋に含めるLineStyleの中身を取得
+
+    Args:
+        linestyle (bpy.types.FreestyleLineStyle): LineStyle
+
+    Returns:
+        Dictionary: LineStyleのプロパティとモディファイア
+    """
+    contents = {}
+    contents["auto_prop"] = _get_auto_property(linestyle, is_compact=True)
+    for attr in LINESTYLE_MODIFIER_ATTRS:
+        contents[attr] = [_get_auto_property(modifier, is_compact=True) for modifier in getattr(linestyle, attr, ())]
+
+    return contents
+
+def _get_node_groups_names(library=None):
+    """ NodeGroupsの名称リストを取得
+
+    Args:
+        library (bpy.types.Library): リンクした元ファイル (Noneは現在のファイル)
+
+    Returns:
+        str[]: NodeGroupsの名称リスト
+    """
+    node_groups_names = []
+    
+    for ng in bpy.data.node_groups:
+        if ng.type != "COMPOSITING":
+            continue
+        if ng.library != library:
+            continue
+        
+        node_groups_names.append(ng.name)
+    
+    return node_groups_names
+
+def _get_nodes_property(tree, is_compact=False):
+    """ ノードリストのプロパティを取得
+
+    Args:
+        tree (bpy.types.NodeTree): ノードツリー
+        is_compact (bool): デフォルト値と同じプロパティを省略するか？
+
+    Returns:
+        Dictionary: ノードリストのプロパティ
+    """
+    nodes = {}
+    for node in tree.nodes:
+        prop = {}
+        prop["auto_prop"] = _get_auto_property(node, is_compact)
+
+        sp_prop = {}
+        # Parentの接続
+        if node.parent != None:
+            sp_prop["parent"] = node.parent.name
+        # Groupの場合
+        if node.bl_idname == "CompositorNodeGroup":
+            sp_prop["group_name"] = node.node_tree.name
+        # FileOutputの場合
+        if node.bl_idname == "CompositorNodeOutputFile":
+            sp_prop["format"] = _get_auto_property(node.format, is_compact)
+            sp_prop["layer_slots"] =  [slot.name for slot in node.layer_slots]
+            sp_prop["file_slots"] =  [slot.path for slot in node.file_slots]
+
+        _get_inputs(node, sp_prop)
+
+        prop["sp_prop"] = sp_prop
+        nodes[node.name] = prop
+
+    return nodes
+
+def _get_inputs(node, sp_prop):
+    """ inputsの取得
+        ※ノードの種類毎に読み書き方法をまとめ、値を持つソケットのみ取得
+
+    Args:
+        node (bpy.types.Node): 対象ノード
+        sp_prop (dict): 設定プロパティ
+    """
+    sp_prop.update(compositing_socket.get_input_values(node))
+
+def _get_links(tree):
+    """ リンク情報を取得
+
+    Args:
+        tree (bpy.types.NodeTree): ノードツリー
+
+    Returns:
+        Dictionary: リンク情報
+    """
+    links = {}
+    count = 1
+    for link in tree.links:
+        link_data = {}
+        link_data["from_node"] = link.from_node.name
+        link_data["from_socket"] = link.from_socket.identifier
+        link_data["to_node"] = link.to_node.name
+        # FileOutputの場合にソケット名が生成時にはlayer_slots名になっている
+        if link.to_node.bl_idname == "CompositorNodeOutputFile":
+            index = None
+            for i, input in enumerate(link.to_node.inputs):
+                if input.identifier == link.to_socket.identifier:
+                    index = i
+                    break
+            name = None
+            # OpenEXR MultiLayerだとピンの名前の保存先が異なる
+            if link.to_node.format.file_format == "OPEN_EXR_MULTILAYER":
+                name = link.to_node.layer_slots[index].name
+            else:
+                name = link.to_node.file_slots[index].path
+            link_data["to_socket"] = name
+        else:
+            link_data["to_socket"] = link.to_socket.identifier
+        links[str(count).zfill(3)] = link_data
+        count += 1
+
+    return links
+
+def _get_linestyle_names(library=None):
+    """ 全てのLineStyleの名前を取得
+    　　LineStyleは元データからAppend出来るので名前だけ取得
+
+    Args:
+        library (bpy.types.Library): リンクした元ファイル (Noneは現在のファイル)
+
+    Returns:
+        Dictionary: 全てのLineStyleの名前
+    """
+    linestyle_names = []
+    for ls in bpy.data.linestyles:
+        if library != None and ls.library != library:
+            continue
+        linestyle_names.append(ls.name)
+        
+    return linestyle_names
+
+def _search_in_render_layer_all(scene, library=None, is_compact=False):
+    """ 全てのViewLayerのレンダリングプロパティを取得
+
+    Args:
+        scene (bpy.types.Scene): 対象シーン
+        library (bpy.types.Library): リンクした元ファイル (Noneは現在のファイル)
+        is_compact (bool): デフォルト値と同じプロパティを省略するか？
+
+    Returns:
+        [type]: [description]
+    """
+    render_layer_settings = {}
+
+    render_layer_settings["scene_use_freestyle"] = scene.render.use_freestyle
+    render_layer_settings["linestyle_names"] = _get_linestyle_names(library)
+
+    render_layer_props = {}
+    for vl in scene.view_layers:
+        render_layer_props[vl.name] = _search_in_render_layer( vl, is_compact )
+    render_layer_settings["render_layer_props"] = render_layer_props
+
+    return render_layer_settings
+
+def _search_in_render_layer(vl, is_compact=False):
+    """ ViewLayerのレンダリングプロパティを取得
+
+    Args:
+        vl (bpy.type.ViewLayer): ViewLayer
+        is_compact (bool): デフォルト値と同じプロパティを省略するか？
+
+    Returns:
+        Dictionary: ViewLayerのレンダリングプロパティ
+    """
+    render_layer = {}
+
+    # Passes, Filters設定
+    render_layer["vl_simple"] = _get_auto_property(vl, is_compact)
+
+    # AOV設定
+    aovs = []
+    target_aovs = None
+    if hasattr( vl, "aovs" ):
+        # 2.93以降
+        target_aovs = vl.aovs
+    else:
+        # 2.91以前
+        target_aovs = vl.cycles.aovs
+    for aov in target_aovs:
+        # 既にあったら追加しない
+        target_aov = [a for a in aovs if a["name"] == aov.name]
+        if len(target_aov):
+            continue
+
+        prop = {
+            "name": aov.name
+        ,   "type": aov.type
+        }
+        aovs.append(prop)
+    render_layer["aovs"] = aovs
+
+    # Freestyle設定
+    if vl.freestyle_settings.as_render_pass:
+        fs = {}
+        fs["fs_simple"] = _get_auto_property(vl.freestyle_settings, is_compact)
+
+        linesets = {}
+        for ls in vl.freestyle_settings.linesets:
+            lineset = {}
+            lineset["auto_props"] = _get_auto_property(ls, is_compact)
+            lineset["manual_props"] = _get_lineset_manual_props(ls)
+            linesets[ls.name] = lineset
+        fs["linesets"] = linesets
+
+        render_layer["free_style"] = fs
+
+    return render_layer
+
+def _get_lineset_manual_props(lineset):
+    """ LineSetの手動設定が必要なプロパティの取得
+
+    Args:
+        lineset (bpy.types.LineSet): 対象ラインセット
+
+    Returns:
+        Dictionary: LineSetの手動設定が必要なプロパティ
+    """
+    props = {}
+    props["linestyle_name"] = lineset.linestyle.name
+    
+    return props
+
+def _get_auto_property(obj, is_compact=False):
+    """ 自動取得出来るプロパティを取得
+        ※取得するプロパティはbl_rnaのタイプ毎にキャッシュした定義を使う
+
+    Args:
+        obj (Object): プロパティを取得するクラス
+        is_compact (bool): デフォルト値と同じプロパティを省略するか？
+
+    Returns:
+        Dictionary: 自動取得したプロパティ
+    """
+    auto_prop = {}
+
+    for attr, is_array, default in comp_util.get_property_descriptors(obj):
+        val = getattr(obj, attr)
+        # Vector, Colorはそのままdumps出来ないので変換
+        if is_array:
+            val = tuple(val)
+        # デフォルト値は読み込み時に補完出来るので省略
+        if is_compact and default != None and val == default:
+            continue
+        auto_prop[attr] = val
+            
+    return auto_prop
\ No newline at end of file
@@ -0,0 +1,305 @@
+import numpy as np
+from . import compositing_profile
+
+# ----------------------------------------------------------------------------------------------------
+# 定数
+# ----------------------------------------------------------------------------------------------------
+
+# 値を読み書きするソケットの種類 -> 値の型
+SOCKET_VALUE_TYPES = {
+    "VALUE": float,
+    "INT": int,
+    "BOOLEAN": bool,
+    "RGBA": float,
+    "VECTOR": float,
+}
+# 値が配列のソケットの種類
+ARRAY_SOCKET_TYPES = ("RGBA", "VECTOR")
+# まとめて読み書きする際の配列の型
+# (ソケットの小数は32bitで保持されるので、同じ型にしてforeach_get / foreach_setで要素毎の変換をさせない)
+VALUE_DTYPES = {
+    float: np.float32,
+    int: np.int32,
+    bool: bool,
+}
+# inputの数、種類が同じ種類のノードでも変わるノード (読み書き方法をキャッシュしない)
+DYNAMIC_INPUT_NODE_TYPES = (
+    "CompositorNodeGroup",
+    "CompositorNodeOutputFile",
+    "CompositorNodeSwitchView",
+    "NodeGroupInput",
+    "NodeGroupOutput",
+    "NodeReroute",
+)
+
+# ----------------------------------------------------------------------------------------------------
+# Class
+# ----------------------------------------------------------------------------------------------------
+
+class SocketLayout:
+    """ ノードの種類毎のinputの値の読み書き方法
+        ※全てのinputが同じ種類の場合はforeach_get / foreach_setでまとめて読み書きする
+          (foreach_get / foreach_setはinputリスト全体が対象なので、種類が混ざるノードは1つずつ読み書きする)
+    """
+    def __init__(self, sockets, input_count):
+        # (インデックス, identifier, 値の型, 要素数(配列でない場合はNone))[]
+        self.sockets = sockets
+        self.uniform_type = None
+        self.uniform_length = None
+        if len(sockets) > 0 and len(sockets) == input_count:
+            value_types = {(value_type, length) for _, _, value_type, length in sockets}
+            if len(value_types) == 1:
+                self.uniform_type, self.uniform_length = value_types.pop()
+
+    def is_uniform(self):
+        """ まとめて読み書き出来るか？
+
+        Returns:
+            bool: True = Yes, False = No
+        """
+        return self.uniform_type != None
+
+# ----------------------------------------------------------------------------------------------------
+# Public Functions
+# ----------------------------------------------------------------------------------------------------
+
+_layouts = {}
+
+# -- Get --
+
+def get_socket_layout(node):
+    """ ノードのinputの値の読み書き方法を取得
+        ※同じ種類のノードは前回の結果を使う
+
+    Args:
+        node (bpy.types.Node): 対象ノード
+
+    Returns:
+        SocketLayout: inputの値の読み書き方法
+    """
+    inputs = node.inputs
+    if node.bl_idname in DYNAMIC_INPUT_NODE_TYPES:
+        return _create_socket_layout(inputs)
+
+    key = (node.bl_idname, len(inputs))
+    layout = _layouts.get(key)
+    if layout == None:
+        layout = _create_socket_layout(inputs)
+        _layouts[key] = layout
+
+    return layout
+
+def get_input_values(node):
+    """ inputの値を取得
+
+    Args:
+        node (bpy.types.Node): 対象ノード
+
+    Returns:
+        Dictionary: identifier -> 値 (配列はtuple)
+    """
+    if not hasattr(node, "inputs"):
+        return {}
+
+    layout = get_socket_layout(node)
+    if layout.is_uniform():
+        array = _read_uniform_values(node.inputs, layout)
+        return {
+            identifier: _to_python_value(array[index], layout.uniform_length)
+            for index, identifier, _, _ in layout.sockets
+        }
+
+    # inputリストはインデックスで参照すると先頭から辿るので、まとめてリストにする
+    inputs = node.inputs[:]
+    values = {}
+    for index, identifier, _, length in layout.sockets:
+        value = inputs[index].default_value
+        values[identifier] = tuple(value[:]) if length != None else value
+
+    return values
+
+# -- Set --
+
+def set_input_values(node, values):
+    """ inputの値を設定
+        ※値が異なるものだけ設定する。型、要素数が合わない値は設定しない
+
+    Args:
+        node (bpy.types.Node): 対象ノード
+        values (Dictionary): identifier -> 値 (ノードのプロパティなど、他のキーが含まれていても良い)
+
+    Returns:
+        int: 設定したinputの数
+    """
+    if not hasattr(node, "inputs"):
+        return 0
+
+    layout = get_socket_layout(node)
+    if layout.is_uniform():
+        return _set_uniform_values(node, layout, values)
+
+    inputs = node.inputs[:]
+    change_count = 0
+    for index, identifier, value_type, length in layout.sockets:
+        if identifier not in values:
+            continue
+        value = _to_socket_value(values[identifier], value_type, length)
+        if value == None:
+            print(f"[{node.name}] {identifier} : invalid value {values[identifier]!r}")
+            compositing_profile.add_error("set_inputs")
+            continue
+
+        socket = inputs[index]
+        current = socket.default_value
+        if _is_same_value(current[:] if length != None else current, value, value_type):
+            continue
+        socket.default_value = value
+        change_count += 1
+
+    return change_count
+
+def clear_socket_layouts():
+    """ ノードの種類毎の読み書き方法のキャッシュを削除
+    """
+    _layouts.clear()
+
+# ----------------------------------------------------------------------------------------------------
+# Private Functions
+# ----------------------------------------------------------------------------------------------------
+
+# -- Get --
+
+def _create_socket_layout(inputs):
+    """ inputの種類から値の読み書き方法を作成
+
+    Args:
+        inputs (bpy.types.NodeInputs): inputリスト
+
+    Returns:
+        SocketLayout: inputの値の読み書き方法
+    """
+    sockets = []
+    for index, socket in enumerate(inputs):
+        value_type = SOCKET_VALUE_TYPES.get(socket.type)
+        # Shaderなど値を持たないソケット
+        if value_type == None or not hasattr(socket, "default_value"):
+            continue
+        length = len(socket.default_value) if socket.type in ARRAY_SOCKET_TYPES else None
+        sockets.append((index, socket.identifier, value_type, length))
+
+    return SocketLayout(sockets, len(inputs))
+
+def _read_uniform_values(inputs, layout):
+    """ 全てのinputの値をまとめて取得
+
+    Args:
+        inputs (bpy.types.NodeInputs): inputリスト
+        layout (SocketLayout): inputの値の読み書き方法
+
+    Returns:
+        numpy.ndarray: 値 (input数 x 要素数、配列でない場合はinput数)
+    """
+    length = layout.uniform_length or 1
+    array = np.empty(len(inputs) * length, dtype=VALUE_DTYPES[layout.uniform_type])
+    inputs.foreach_get("default_value", array)
+
+    return array.reshape(-1, length) if layout.uniform_length != None else array
+
+def _to_python_value(value, length):
+    """ 配列から取り出した値をJSONに出力出来る値に変換
+
+    Args:
+        value (numpy.ndarray | numpy.generic): 値
+        length (int): 要素数 (配列でない場合はNone)
+
+    Returns:
+        Object: 値 (配列はtuple)
+    """
+    return tuple(value.tolist()) if length != None else value.item()
+
+def _to_socket_value(value, value_type, length):
+    """ 設定する値をソケットの値の型に変換
+
+    Args:
+        value (Object): 設定する値
+        value_type (type): 値の型
+        length (int): 要素数 (配列でない場合はNone)
+
+    Returns:
+        Object: 変換した値 (型、要素数が合わない場合はNone)
+    """
+    if length != None:
+        if not isinstance(value, (list, tuple)) or len(value) != length:
+            return None
+        if not all(_is_number(v) for v in value):
+            return None
+        return tuple(value_type(v) for v in value)
+
+    if not _is_number(value):
+        return None
+    # 整数のソケットに小数が入っている場合は丸めずに設定しない
+    if value_type == int and value != int(value):
+        return None
+
+    return value_type(value)
+
+def _is_same_value(current, value, value_type):
+    """ ソケットの現在の値と設定する値が同じか？
+        ※小数はソケットと同じ32bitに揃えて比較する (64bitのまま比較すると変わらない値も変更として数える)
+
+    Args:
+        current (Object): ソケットの現在の値
+        value (Object): 設定する値
+        value_type (type): 値の型
+
+    Returns:
+        bool: True = Yes, False = No
+    """
+    dtype = VALUE_DTYPES[value_type]
+    return np.array_equal(np.asarray(current, dtype=dtype), np.asarray(value, dtype=dtype))
+
+def _is_number(value):
+    """ 数値か？ (boolを含む)
+
+    Args:
+        value (Object): 値
+
+    Returns:
+        bool: True = Yes, False = No
+    """
+    return isinstance(value, (bool, int, float))
+
+# -- Set --
+
+def _set_uniform_values(node, layout, values):
+    """ 全てのinputの値をまとめて設定
+        ※変更がない場合は設定しない
+
+    Args:
+        node (bpy.types.Node): 対象ノード
+        layout (SocketLayout): inputの値の読み書き方法
+        values (Dictionary): identifier -> 値
+
+    Returns:
+        int: 設定したinputの数
+    """
+    inputs = node.inputs
+    array = _read_uniform_values(inputs, layout)
+    change_count = 0
+    for index, identifier, value_type, length in layout.sockets:
+        if identifier not in values:
+            continue
+        value = _to_socket_value(values[identifier], value_type, length)
+        if value == None:
+            print(f"[{node.name}] {identifier} : invalid value {values[identifier]!r}")
+            compositing_profile.add_error("set_inputs")
+            continue
+        if _is_same_value(array[index], value, value_type):
+            continue
+        array[index] = value
+        change_count += 1
+
+    if change_count > 0:
+        inputs.foreach_set("default_value", array.ravel())
+
+    return change_count
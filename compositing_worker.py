@@ -0,0 +1,386 @@
+import atexit
+import bpy
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+import uuid
+
+# ----------------------------------------------------------------------------------------------------
+# 定数
+# ----------------------------------------------------------------------------------------------------
+
+WORKER_SCRIPT_PATH = os.path.join(os.path.dirname(__file__), "export_worker.py")
+RESPONSE_PREFIX = "@@COMPOSITING_IO_WORKER@@"
+STARTUP_TIMEOUT = 120
+REQUEST_TIMEOUT = 600
+SHUTDOWN_TIMEOUT = 5
+# 中止されたかを確認する間隔(秒)
+CANCEL_POLL_INTERVAL = 0.1
+
+# ----------------------------------------------------------------------------------------------------
+# Class
+# ----------------------------------------------------------------------------------------------------
+
+class _ExportWorker:
+    """ バックグラウンドで常駐するBlender
+        起動は1セッションに1回で、リクエスト毎にファイルを開き直して出力する
+        ※ワーカーは1件ずつ処理するので、複数のスレッドからのリクエストは送信からレスポンスまでを1件ずつ行う
+    """
+    def __init__(self, binary_path):
+        self._binary_path = binary_path
+        self._process = None
+        self._responses = None
+        self._lock = threading.Lock()
+        # ロックを待っている先読み以外のリクエストの数 (先読みは後回しにする)
+        self._waiting_loads = 0
+        self._waiting_lock = threading.Lock()
+        # 中止したリクエストのID -> 出力先のパス (後から届いた出力は削除する)
+        self._abandoned = {}
+
+    def is_alive(self):
+        """ ワーカーが起動中か？
+
+        Returns:
+            bool: True = Yes, False = No
+        """
+        return self._process != None and self._process.poll() == None
+
+    def start(self, cancel_event=None):
+        """ ワーカーを起動
+            ※起動を待っている間に中止した場合は、起動中のワーカーを次のリクエストで使う
+
+        Args:
+            cancel_event (threading.Event): 中止の通知 (Noneは中止しない)
+
+        Returns:
+            bool: True = 起動成功, False = 失敗
+        """
+        self.stop()
+
+        try:
+            self._process = subprocess.Popen(
+                [
+                    self._binary_path,
+                    "-b",
+                    "-P",
+                    WORKER_SCRIPT_PATH,
+                    "--",
+                    RESPONSE_PREFIX,
+                ],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                encoding="utf-8",
+                errors="replace",
+                bufsize=1,
+            )
+        except OSError as e:
+            print(f"Can't start Compositing export worker : {e}")
+            self._process = None
+            return False
+
+        self._responses = queue.Queue()
+        reader = threading.Thread(target=_read_responses, args=(self._process, self._responses), daemon=True)
+        reader.start()
+
+        response = self._wait_response(None, STARTUP_TIMEOUT, cancel_event)
+        if response == None and _is_cancelled(cancel_event):
+            return False
+        if response == None or response.get("status") != "ready":
+            print("Compositing export worker did not become ready.")
+            self.stop()
+            return False
+
+        return True
+
+    def request(self, load_path, output_path, timeout, is_compact=False, is_indexed=False, is_all_scenes=False, cancel_event=None, prefetch_event=None):
+        """ Compositing設定の出力をリクエスト
+            ※他のリクエストの処理中は完了を待ってから送る (タイムアウトは送ってからの時間)
+              先読みは、待っている読み込みがあればその後に送る
+
+        Args:
+            load_path (str): 読み込むBlenderファイルのパス
+            output_path (str): 出力先のパス
+            timeout (float): タイムアウト(秒)
+            is_compact (bool): デフォルト値を省略した形式で出力するか？
+            is_indexed (bool): セクション毎に読み込める形式で出力するか？
+            is_all_scenes (bool): 全てのSceneの設定を出力するか？
+            cancel_event (threading.Event): 中止の通知 (Noneは中止しない)
+            prefetch_event (threading.Event): セットされている間は先読みとして後回しにする (Noneは先読みではない)
+
+        Returns:
+            bool: True = 出力成功, False = 失敗 (中止した場合を含む)
+        """
+        if not self._acquire(cancel_event, prefetch_event):
+            return False
+
+        try:
+            return self._request(load_path, output_path, timeout, is_compact, is_indexed, is_all_scenes, cancel_event)
+        finally:
+            self._lock.release()
+
+    def _acquire(self, cancel_event, prefetch_event):
+        """ リクエストを送る順番を待つ
+
+        Args:
+            cancel_event (threading.Event): 中止の通知 (Noneは中止しない)
+            prefetch_event (threading.Event): セットされている間は先読みとして後回しにする (Noneは先読みではない)
+
+        Returns:
+            bool: True = 送れる (ロック済み), False = 待っている間に中止した
+        """
+        is_load = not _is_prefetch(prefetch_event)
+        if is_load:
+            with self._waiting_lock:
+                self._waiting_loads += 1
+        try:
+            while True:
+                if _is_cancelled(cancel_event):
+                    return False
+                if _is_prefetch(prefetch_event) and self._waiting_loads > 0:
+                    time.sleep(CANCEL_POLL_INTERVAL)
+                    continue
+                if self._lock.acquire(timeout=CANCEL_POLL_INTERVAL):
+                    return True
+        finally:
+            if is_load:
+                with self._waiting_lock:
+                    self._waiting_loads -= 1
+
+    def _request(self, load_path, output_path, timeout, is_compact, is_indexed, is_all_scenes, cancel_event):
+        """ Compositing設定の出力を送ってレスポンスを待つ (ロック中に呼ぶ)
+
+        Args:
+            load_path (str): 読み込むBlenderファイルのパス
+            output_path (str): 出力先のパス
+            timeout (float): タイムアウト(秒)
+            is_compact (bool): デフォルト値を省略した形式で出力するか？
+            is_indexed (bool): セクション毎に読み込める形式で出力するか？
+            is_all_scenes (bool): 全てのSceneの設定を出力するか？
+            cancel_event (threading.Event): 中止の通知 (Noneは中止しない)
+
+        Returns:
+            bool: True = 出力成功, False = 失敗
+        """
+        # 前回のリクエストで落ちていたら再起動
+        if not self.is_alive() and not self.start(cancel_event):
+            return False
+
+        request_id = uuid.uuid4().hex
+        request = {
+            "id": request_id,
+            "load_path": load_path,
+            "output_path": output_path,
+            "is_compact": is_compact,
+            "is_indexed": is_indexed,
+            "is_all_scenes": is_all_scenes,
+        }
+        try:
+            self._process.stdin.write(json.dumps(request) + "\n")
+            self._process.stdin.flush()
+        except OSError as e:
+            print(f"Can't send request to Compositing export worker : {e}")
+            self.stop()
+            return False
+
+        response = self._wait_response(request_id, timeout, cancel_event)
+        if response == None and _is_cancelled(cancel_event):
+            # 処理中の出力は止められないので、他のリクエストのためにワーカーは残して結果だけ捨てる
+            self._abandoned[request_id] = output_path
+            return False
+        if response == None:
+            # ハングした、もしくは落ちたワーカーは次のリクエストで再起動する
+            self.stop()
+            return False
+
+        if response.get("status") != "ok":
+            print(f"Compositing export worker failed : {response.get('message', '')}")
+            return False
+
+        return True
+
+    def stop(self):
+        """ ワーカーを終了
+        """
+        process = self._process
+        self._process = None
+        self._responses = None
+        if process == None:
+            return
+
+        if process.poll() == None:
+            try:
+                process.stdin.write(json.dumps({"command": "quit"}) + "\n")
+                process.stdin.flush()
+                process.wait(SHUTDOWN_TIMEOUT)
+            except (OSError, subprocess.TimeoutExpired):
+                process.kill()
+                process.wait()
+
+        for stream in (process.stdin, process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+    def _wait_response(self, request_id, timeout, cancel_event=None):
+        """ レスポンスを待つ
+            ※前に中止したリクエストのレスポンスは捨てる
+
+        Args:
+            request_id (str): 待つリクエストのID (Noneは起動完了の通知)
+            timeout (float): タイムアウト(秒)
+            cancel_event (threading.Event): 中止の通知 (Noneは中止しない)
+
+        Returns:
+            dict: レスポンス (タイムアウト、中止、ワーカー終了時はNone)
+        """
+        # 別のスレッドから終了された場合も、終了前のキューで終了の通知を受け取る
+        responses = self._responses
+        deadline = time.monotonic() + timeout
+        while True:
+            if _is_cancelled(cancel_event):
+                return None
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"Compositing export worker timed out after {timeout} sec.")
+                return None
+
+            try:
+                response = responses.get(timeout=min(remaining, CANCEL_POLL_INTERVAL))
+            except queue.Empty:
+                continue
+
+            # 標準出力が閉じた = ワーカーが終了した
+            if response == None:
+                print("Compositing export worker exited unexpectedly.")
+                return None
+
+            if response.get("id") == request_id:
+                return response
+            self._discard_response(response)
+
+    def _discard_response(self, response):
+        """ 待っていないレスポンスを捨てる
+            ※中止したリクエストの出力は読み込まれないので削除する
+
+        Args:
+            response (dict): レスポンス
+        """
+        output_path = self._abandoned.pop(response.get("id"), None)
+        if output_path == None:
+            return
+
+        try:
+            os.remove(output_path)
+        except OSError:
+            pass
+
+# ----------------------------------------------------------------------------------------------------
+# Public Functions
+# ----------------------------------------------------------------------------------------------------
+
+_worker = None
+_worker_lock = threading.Lock()
+
+def export_compositing_option(load_path, output_path, timeout=REQUEST_TIMEOUT, is_compact=False, is_indexed=False, is_all_scenes=False, cancel_event=None, prefetch_event=None):
+    """ 常駐ワーカーでCompositing設定を出力
+        ※ワーカーは初回呼び出し時に起動する。別のスレッドから同時に呼び出しても1つのワーカーを順番に使う
+
+    Args:
+        load_path (str): 読み込むBlenderファイルのパス
+        output_path (str): 出力先のパス
+        timeout (float): タイムアウト(秒)
+        is_compact (bool): デフォルト値を省略した形式で出力するか？
+        is_indexed (bool): セクション毎に読み込める形式で出力するか？
+        is_all_scenes (bool): 全てのSceneの設定を出力するか？
+        cancel_event (threading.Event): 中止の通知 (セットすると、このリクエストだけ待つのをやめる)
+        prefetch_event (threading.Event): セットされている間は先読みとして、読み込みのリクエストを先に送る
+
+    Returns:
+        bool: True = 出力成功, False = 失敗 (中止した場合を含む)
+    """
+    global _worker
+    with _worker_lock:
+        if _worker == None:
+            _worker = _ExportWorker(bpy.app.binary_path)
+        worker = _worker
+
+    return worker.request(load_path, output_path, timeout, is_compact, is_indexed, is_all_scenes, cancel_event, prefetch_event)
+
+def shutdown_worker():
+    """ 常駐ワーカーを終了
+        ※処理中のリクエストは失敗になる
+    """
+    global _worker
+    with _worker_lock:
+        worker = _worker
+        _worker = None
+    if worker == None:
+        return
+
+    worker.stop()
+
+# ----------------------------------------------------------------------------------------------------
+# Private Functions
+# ----------------------------------------------------------------------------------------------------
+
+def _is_cancelled(cancel_event):
+    """ 中止されたか？
+
+    Args:
+        cancel_event (threading.Event): 中止の通知 (Noneは中止しない)
+
+    Returns:
+        bool: True = Yes, False = No
+    """
+    return cancel_event != None and cancel_event.is_set()
+
+def _is_prefetch(prefetch_event):
+    """ 先読みとして後回しにするか？
+
+    Args:
+        prefetch_event (threading.Event): セットされている間は先読み (Noneは先読みではない)
+
+    Returns:
+        bool: True = Yes, False = No
+    """
+    return prefetch_event != None and prefetch_event.is_set()
+
+def _read_responses(process, responses):
+    """ ワーカーの標準出力からレスポンスを読み込む(スレッド用)
+
+    Args:
+        process (subprocess.Popen): ワーカーのプロセス
+        responses (queue.Queue): レスポンスの格納先
+    """
+    try:
+        for line in process.stdout:
+            if not line.startswith(RESPONSE_PREFIX):
+                continue
+            try:
+                responses.put(json.loads(line[len(RESPONSE_PREFIX):]))
+            except ValueError:
+                continue
+    except (OSError, ValueError):
+        pass
+
+    # 終了を通知
+    responses.put(None)
+
+# ----------------------------------------------------------------------------------------------------
+# Register / Unregister
+# ----------------------------------------------------------------------------------------------------
+
+def register():
+    """ セッション終了時にワーカーも終了させる
+    """
+    atexit.register(shutdown_worker)
+
+def unregister():
+    """ ワーカーを終了
+    """
+    atexit.unregister(shutdown_worker)
+    shutdown_worker()
@@ -1,18 +1,42 @@
-# ----------------------------------------------------------------------------------------------------
-# subprocessからCompositing設定ファイルの出力用
-# ----------------------------------------------------------------------------------------------------
-
-import bpy
-import sys
-
-def main():
-    try:
-        bpy.ops.qcommon.compositing_io_export()
-    except Exception as e:
-        print(e)
-        sys.exit(1)
-
-    sys.exit(0)
-    
-if __name__ == "__main__":
+# ----------------------------------------------------------------------------------------------------
+# subprocessからCompositing設定ファイルの出力用
+# ----------------------------------------------------------------------------------------------------
+
+import argparse
+import bpy
+import sys
+
+def main():
+    # 「--」以降の引数があれば出力先のパスとオプション
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser()
+    parser.add_argument("filepath", nargs="?", default="")
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--compression", default="NONE")
+    parser.add_argument("--indexed", action="store_true")
+    parser.add_argument("--all-scenes", action="store_true")
+    parser.add_argument("--scenes", default="")
+    args = parser.parse_args(argv)
+
+    try:
+        result = bpy.ops.qcommon.compositing_io_export(
+            filepath=args.filepath,
+            is_compact=args.compact,
+            compression=args.compression,
+            is_indexed=args.indexed,
+            is_all_scenes=args.all_scenes,
+            scene_names=args.scenes,
+        )
+    except Exception as e:
+        print(e)
+        sys.exit(1)
+
+    # ノードがないSceneなどで書き出さなかった場合も失敗にする
+    if "FINISHED" not in result:
+        print(f"Can't export Compositing : {result}")
+        sys.exit(1)
+
+    sys.exit(0)
+    
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,75 @@
+# ----------------------------------------------------------------------------------------------------
+# 常駐ワーカーからCompositing設定ファイルの出力用
+# 標準入力から1行1リクエスト(JSON)を受け取り、結果を標準出力に返す
+# ----------------------------------------------------------------------------------------------------
+
+import bpy
+import json
+import sys
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if len(argv) < 1:
+        print("Response prefix is not specified.")
+        sys.exit(1)
+    response_prefix = argv[0]
+
+    _send(response_prefix, {"status": "ready"})
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            _send(response_prefix, {"status": "error", "message": str(e)})
+            continue
+
+        if request.get("command") == "quit":
+            break
+
+        _send(response_prefix, _export(request))
+
+    sys.exit(0)
+
+def _export(request):
+    """ リクエストされたファイルを開いてCompositing設定を出力
+
+    Args:
+        request (dict): リクエスト
+
+    Returns:
+        dict: レスポンス
+    """
+    response = {"id": request.get("id"), "status": "error"}
+    try:
+        bpy.ops.wm.open_mainfile(filepath=request["load_path"], load_ui=False)
+        result = bpy.ops.qcommon.compositing_io_export(
+            filepath=request["output_path"],
+            is_compact=request.get("is_compact", False),
+            is_indexed=request.get("is_indexed", False),
+            is_all_scenes=request.get("is_all_scenes", False),
+        )
+    except Exception as e:
+        response["message"] = str(e)
+        return response
+
+    if "FINISHED" in result:
+        response["status"] = "ok"
+    return response
+
+def _send(response_prefix, response):
+    """ レスポンスを標準出力に書き出し
+        ※Blender自体のログと区別するためにプレフィックスを付ける
+
+    Args:
+        response_prefix (str): レスポンスのプレフィックス
+        response (dict): レスポンス
+    """
+    sys.stdout.write(response_prefix + json.dumps(response) + "\n")
+    sys.stdout.flush()
+
+if __name__ == "__main__":
+    main()
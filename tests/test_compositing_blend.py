@@ -0,0 +1,112 @@
+# ----------------------------------------------------------------------------------------------------
+# compositing_blend のテスト (Blender不要)
+#
+#   python -m unittest discover -s tests
+# ----------------------------------------------------------------------------------------------------
+
+import os
+import struct
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compositing_blend
+
+# ----------------------------------------------------------------------------------------------------
+# Private Functions
+# ----------------------------------------------------------------------------------------------------
+
+def _make_blend(endian, is_large_bhead=False):
+    """ Scene, NodeGroup, LineStyleだけの最小限のBlenderファイルを作成
+
+    Args:
+        endian (str): エンディアン ("<" or ">")
+        is_large_bhead (bool): 新形式のヘッダー、ブロックヘッダーにするか？
+
+    Returns:
+        bytes: ファイルの中身
+    """
+    pointer_format = endian + "Q"
+    types = ["char", "short", "int", "void", "ID", "Scene", "bNodeTree", "FileGlobal", "FreestyleLineStyle"]
+    names = ["*next", "*prev", "*newid", "*lib", "*asset_data", "name[66]", "flag", "id", "*nodetree", "idname[64]", "type", "*curscene"]
+    structs = [
+        ("ID", [("void", "*next"), ("void", "*prev"), ("ID", "*newid"), ("void", "*lib"), ("void", "*asset_data"), ("char", "name[66]"), ("short", "flag")]),
+        ("Scene", [("ID", "id"), ("bNodeTree", "*nodetree")]),
+        ("bNodeTree", [("ID", "id"), ("char", "idname[64]"), ("int", "type")]),
+        ("FileGlobal", [("Scene", "*curscene")]),
+        ("FreestyleLineStyle", [("ID", "id")]),
+    ]
+    id_size = 5 * 8 + 66 + 2
+    type_lengths = [1, 2, 4, 0, id_size, id_size + 8, id_size + 68, 8, id_size]
+    struct_indexes = {name: i for i, (name, _) in enumerate(structs)}
+
+    def pad(chunk):
+        return chunk + b"\0" * (-len(chunk) % 4)
+
+    sdna = b"SDNA" + b"NAME" + struct.pack(endian + "i", len(names)) + b"".join(name.encode() + b"\0" for name in names)
+    sdna = pad(sdna) + b"TYPE" + struct.pack(endian + "i", len(types)) + b"".join(name.encode() + b"\0" for name in types)
+    sdna = pad(sdna) + b"TLEN" + struct.pack(f"{endian}{len(types)}h", *type_lengths)
+    sdna = pad(sdna) + b"STRC" + struct.pack(endian + "i", len(structs))
+    for struct_name, fields in structs:
+        sdna += struct.pack(endian + "hh", types.index(struct_name), len(fields))
+        for type_name, name in fields:
+            sdna += struct.pack(endian + "hh", types.index(type_name), names.index(name))
+
+    def id_code(code):
+        # 2文字のコードはintとして書き出される
+        return code + b"\0\0" if endian == "<" else b"\0\0" + code
+
+    def id_data(code, name):
+        return struct.pack(endian + "5Q", 0, 0, 0, 0, 0) + (code + name).encode().ljust(66, b"\0") + b"\0\0"
+
+    def block(code, data, old=0, sdna_index=0):
+        if is_large_bhead:
+            return struct.pack(endian + "4siQqq", code, sdna_index, old, len(data), 1) + data
+        return struct.pack(endian + "4siQii", code, len(data), old, sdna_index, 1) + data
+
+    endian_char = b"v" if endian == "<" else b"V"
+    if is_large_bhead:
+        data = b"BLENDER17-01" + endian_char + b"0500"
+    else:
+        data = b"BLENDER-" + endian_char + b"405"
+    data += block(b"GLOB", struct.pack(pointer_format, 0x2000), 0x10, struct_indexes["FileGlobal"])
+    data += block(id_code(b"SC"), id_data("SC", "Scene") + struct.pack(pointer_format, 0), 0x1000, struct_indexes["Scene"])
+    data += block(id_code(b"SC"), id_data("SC", "Main") + struct.pack(pointer_format, 0x4000), 0x2000, struct_indexes["Scene"])
+    data += block(id_code(b"NT"), id_data("NT", "Glare Group") + b"CompositorNodeTree".ljust(64, b"\0") + struct.pack(endian + "i", 1), 0x3000, struct_indexes["bNodeTree"])
+    data += block(id_code(b"LS"), id_data("LS", "LineStyle"), 0x5000, struct_indexes["FreestyleLineStyle"])
+    data += block(b"DNA1", pad(sdna))
+    data += block(b"ENDB", b"")
+
+    return data
+
+# ----------------------------------------------------------------------------------------------------
+# Class
+# ----------------------------------------------------------------------------------------------------
+
+class ReadBlendInfoTest(unittest.TestCase):
+
+    def _read(self, data):
+        with tempfile.NamedTemporaryFile(suffix=".blend", delete=False) as f:
+            f.write(data)
+        try:
+            return compositing_blend.read_blend_info(f.name)
+        finally:
+            os.remove(f.name)
+
+    def test_endians(self):
+        for endian in ("<", ">"):
+            for is_large_bhead in (False, True):
+                with self.subTest(endian=endian, is_large_bhead=is_large_bhead):
+                    info = self._read(_make_blend(endian, is_large_bhead))
+                    self.assertIsNotNone(info)
+                    self.assertEqual(info.is_little_endian, endian == "<")
+                    self.assertEqual(info.scenes, ["Scene", "Main"])
+                    self.assertEqual(info.active_scene, "Main")
+                    self.assertEqual(info.node_groups, ["Glare Group"])
+                    self.assertEqual(info.linestyles, ["LineStyle"])
+                    self.assertEqual(info.scene_node_trees, {"Scene": False, "Main": True})
+
+if __name__ == "__main__":
+    unittest.main()
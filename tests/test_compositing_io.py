@@ -0,0 +1,197 @@
+# ----------------------------------------------------------------------------------------------------
+# compositing_io のテスト (benchmarks/bpy_standin.py の代用のbpyで実行する)
+#
+#   python -m unittest discover -s tests
+# ----------------------------------------------------------------------------------------------------
+
+import importlib
+import json
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ADDON_DIR, "benchmarks"))
+
+import bpy_standin
+import synthetic
+
+# ----------------------------------------------------------------------------------------------------
+# 定数
+# ----------------------------------------------------------------------------------------------------
+
+SOURCE_PATH = os.path.join(ADDON_DIR, "source.blend")
+
+# ----------------------------------------------------------------------------------------------------
+# Private Functions
+# ----------------------------------------------------------------------------------------------------
+
+def _import_addon():
+    """ 代用のbpyでアドオンを読み込んで登録
+
+    Returns:
+        (module, dict): (代用のbpy, アドオンのモジュール)
+    """
+    bpy = sys.modules.get("bpy")
+    if bpy == None:
+        bpy = bpy_standin.install()
+    sys.path.insert(0, os.path.dirname(ADDON_DIR))
+    package = importlib.import_module(os.path.basename(ADDON_DIR))
+    if not hasattr(bpy.types.Scene, "compositing_io"):
+        package.register_package()
+
+    return bpy, {
+        name: importlib.import_module(f"{package.__name__}.{name}")
+        for name in ("compositing_io", "compositing_load", "compositing_save")
+    }
+
+# ----------------------------------------------------------------------------------------------------
+# Class
+# ----------------------------------------------------------------------------------------------------
+
+class _Operator:
+    """ レポートだけを受け取るオペレーターの代用
+    """
+    def __init__(self):
+        self.reports = []
+
+    def report(self, report_type, message):
+        self.reports.append((report_type, message))
+
+class _WindowManager:
+    """ モーダルの登録、進捗の表示だけを受け取るWindowManagerの代用
+    """
+    def event_timer_add(self, time_step, window=None):
+        return "timer"
+
+    def event_timer_remove(self, timer):
+        pass
+
+    def modal_handler_add(self, operator):
+        pass
+
+    def progress_begin(self, min, max):
+        pass
+
+    def progress_end(self):
+        pass
+
+class ApplyCompositingOptionTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bpy, cls.modules = _import_addon()
+        if not getattr(cls.bpy, "__is_standin__", False):
+            raise unittest.SkipTest("needs benchmarks/bpy_standin.py")
+
+    def setUp(self):
+        bpy = self.bpy
+        bpy_standin.reset()
+        synthetic.build_scene(bpy, bpy.context.scene, 20)
+        self.json_data = json.loads(json.dumps(self.modules["compositing_save"].get_compositing_option(is_compact=True)))
+        bpy_standin.register_blend_file(
+            SOURCE_PATH,
+            node_groups=list(self.json_data["node_groups"]),
+            linestyles=list(self.json_data["render_layers"]["linestyle_names"]),
+            scenes=["Scene"],
+        )
+
+    def _apply(self):
+        props = self.bpy.context.scene.compositing_io
+        props.use_prefetch = False
+        props.use_fingerprint = False
+        operator = _Operator()
+        result = self.modules["compositing_io"]._apply_compositing_option(operator, self.bpy.context, json.loads(json.dumps(self.json_data)), SOURCE_PATH)
+        return result, operator.reports
+
+    def test_nodes_only_keeps_linestyles(self):
+        linestyles = [ls.name for ls in self.bpy.data.linestyles]
+        self.assertGreater(len(linestyles), 0)
+
+        # ViewLayerを読み込まない場合はViewLayerのセクションを読み込まない
+        del self.json_data["render_layers"]
+        props = self.bpy.context.scene.compositing_io
+        props.is_load_view_layer = False
+        props.is_clear_freestyle = True
+        result, reports = self._apply()
+
+        self.assertEqual(result, {'FINISHED'}, reports)
+        self.assertEqual([ls.name for ls in self.bpy.data.linestyles], linestyles)
+        for vl in self.bpy.context.scene.view_layers:
+            for lineset in vl.freestyle_settings.linesets:
+                self.assertIsNotNone(lineset.linestyle)
+
+class FingerprintTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bpy, cls.modules = _import_addon()
+        if not getattr(cls.bpy, "__is_standin__", False):
+            raise unittest.SkipTest("needs benchmarks/bpy_standin.py")
+
+    def test_same_with_and_without_compact(self):
+        bpy_standin.reset()
+        synthetic.build_scene(self.bpy, self.bpy.context.scene, 20)
+        compositing_save = self.modules["compositing_save"]
+        full = compositing_save.get_compositing_option(is_compact=False)
+        compact = compositing_save.get_compositing_option(is_compact=True)
+
+        self.assertNotEqual(full["nodes"], compact["nodes"])
+        self.assertEqual(full["fingerprint"], compact["fingerprint"])
+
+@unittest.skipIf(os.name == "nt", "needs an executable script as the Blender binary")
+class BackgroundLoadTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bpy, cls.modules = _import_addon()
+        if not getattr(cls.bpy, "__is_standin__", False):
+            raise unittest.SkipTest("needs benchmarks/bpy_standin.py")
+
+    def setUp(self):
+        bpy = self.bpy
+        bpy_standin.reset()
+        synthetic.build_scene(bpy, bpy.context.scene, 5)
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+        # 出力が終わらないBlenderの代用
+        binary_path = os.path.join(self.temp_dir.name, "blender")
+        with open(binary_path, "w") as f:
+            f.write(f"#!{sys.executable}\nimport time\ntime.sleep(30)\n")
+        os.chmod(binary_path, 0o755)
+        self.addCleanup(setattr, bpy.app, "binary_path", bpy.app.binary_path)
+        bpy.app.binary_path = binary_path
+
+        load_path = os.path.join(self.temp_dir.name, "source.blend")
+        with open(load_path, "wb") as f:
+            f.write(b"BLENDER-v405")
+        props = bpy.context.scene.compositing_io
+        props.load_path = load_path
+        props.export_mode = self.modules["compositing_load"].EXPORT_MODE_SUBPROCESS
+        props.use_cache = False
+        props.use_background_load = True
+
+        context = bpy.context
+        context.window_manager = _WindowManager()
+        context.workspace = types.SimpleNamespace(status_text_set=lambda text: None)
+
+    def test_file_load_ends_running_load(self):
+        operator_class = self.modules["compositing_io"].QCOMMON_OT_compositing_io_load
+        operator = operator_class()
+        result = operator.invoke(self.bpy.context, types.SimpleNamespace(type='NONE', value='NOTHING'))
+        self.addCleanup(operator_class.cancel_running)
+        self.assertEqual(result, {'RUNNING_MODAL'}, operator.reports)
+        self.assertFalse(operator_class.poll(self.bpy.context))
+
+        # ファイルを開くとモーダルは終了処理を通らずに破棄される
+        for handler in self.bpy.app.handlers.load_pre:
+            handler(None)
+
+        self.assertTrue(operator._job.is_cancelled)
+        self.assertTrue(operator_class.poll(self.bpy.context))
+
+if __name__ == "__main__":
+    unittest.main()
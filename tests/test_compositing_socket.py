@@ -0,0 +1,76 @@
+# ----------------------------------------------------------------------------------------------------
+# compositing_socket のテスト (benchmarks/bpy_standin.py の代用のbpyで実行する)
+#
+#   python -m unittest discover -s tests
+# ----------------------------------------------------------------------------------------------------
+
+import importlib
+import os
+import sys
+import unittest
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ADDON_DIR, "benchmarks"))
+
+import bpy_standin
+
+# ----------------------------------------------------------------------------------------------------
+# Private Functions
+# ----------------------------------------------------------------------------------------------------
+
+def _import_addon():
+    """ 代用のbpyでアドオンを読み込んで登録
+
+    Returns:
+        (module, module): (代用のbpy, compositing_socket)
+    """
+    bpy = sys.modules.get("bpy")
+    if bpy == None:
+        bpy = bpy_standin.install()
+    sys.path.insert(0, os.path.dirname(ADDON_DIR))
+    package = importlib.import_module(os.path.basename(ADDON_DIR))
+    if not hasattr(bpy.types.Scene, "compositing_io"):
+        package.register_package()
+
+    return bpy, importlib.import_module(f"{package.__name__}.compositing_socket")
+
+# ----------------------------------------------------------------------------------------------------
+# Class
+# ----------------------------------------------------------------------------------------------------
+
+class SetInputValuesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bpy, cls.compositing_socket = _import_addon()
+        if not getattr(cls.bpy, "__is_standin__", False):
+            raise unittest.SkipTest("needs benchmarks/bpy_standin.py")
+
+    def setUp(self):
+        bpy_standin.reset()
+        scene = self.bpy.context.scene
+        scene.use_nodes = True
+        self.tree = scene.node_tree
+        self.compositing_socket.clear_socket_layouts()
+
+    def _assert_unchanged_after_set(self, node, values):
+        compositing_socket = self.compositing_socket
+        compositing_socket.set_input_values(node, values)
+        # 32bitに丸められた値と64bitの値を比べて変更として数えない
+        self.assertEqual(compositing_socket.set_input_values(node, values), 0)
+        self.assertEqual(compositing_socket.set_input_values(node, compositing_socket.get_input_values(node)), 0)
+
+    def test_uniform_float_inputs(self):
+        node = self.tree.nodes.new("CompositorNodeMath")
+        self.assertTrue(self.compositing_socket.get_socket_layout(node).is_uniform())
+        self._assert_unchanged_after_set(node, {socket.identifier: 0.1 for socket in node.inputs})
+
+    def test_mixed_inputs(self):
+        node = self.tree.nodes.new("CompositorNodeMath")
+        node.inputs.new("NodeSocketInt", "Count")
+        node.inputs.new("NodeSocketVector", "Dir")
+        self.assertFalse(self.compositing_socket.get_socket_layout(node).is_uniform())
+        self._assert_unchanged_after_set(node, {"Value": 0.1, "Count": 3, "Dir": (0.1, 0.2, 0.3)})
+
+if __name__ == "__main__":
+    unittest.main()